@@ -0,0 +1,87 @@
+"""Compare `convex_layers()` with peeling layers off `Graph`s.
+
+Each workload has ``--points`` points: uniform in a square, normally
+distributed, or on a circle. Peeling with a `Graph` builds one from the
+remaining points for each layer, so it is only timed on ``--graph-points``
+points.
+
+Usage::
+
+    python benchmarks/convex_layers.py [--points N] [--graph-points N]
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from incrementalconvexhull.graph import Graph  # noqa: E402
+from incrementalconvexhull.layers import convex_layers  # noqa: E402
+
+
+def circle(rng, n):
+    angles = rng.uniform(0, 2 * np.pi, n)
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+WORKLOADS = {
+    'uniform': lambda rng, n: rng.uniform(size=(n, 2)),
+    'gaussian': lambda rng, n: rng.normal(size=(n, 2)),
+    'circle': circle,
+}
+
+
+def graph_layers(points) -> int:
+    """Peel layers by building a `Graph` of the remaining points for each,
+    and return how many there were. Points in the middle of edges are never
+    vertices, so this finds the vertices of each layer only.
+    """
+    remaining = {tuple(p) for p in points.tolist()}
+    count = 0
+    while remaining:
+        g = Graph()
+        for x, y in remaining:
+            try:
+                g.add_vertex(x, y)
+            except ValueError:
+                pass  # colinear
+        remaining -= {tuple(v.loc.tolist()) for v in g.vertices}
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=100_000)
+    parser.add_argument('--graph-points', type=int, default=1000,
+                        help='points to peel with Graphs')
+    parser.add_argument('--seed', type=int, default=46)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for name, make in WORKLOADS.items():
+        points = make(rng, args.points)
+        start = time.perf_counter()
+        result = convex_layers(points)
+        seconds = time.perf_counter() - start
+        print(f"{name:>8} convex_layers: {seconds:8.3f}s for "
+              f"{args.points:,} points, {len(result):,} layers")
+
+        points = make(rng, args.graph_points)
+        start = time.perf_counter()
+        count = graph_layers(points)
+        graph_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        convex_layers(points)
+        seconds = time.perf_counter() - start
+        print(f"{name:>8} Graph peeling: {graph_seconds:8.3f}s for "
+              f"{args.graph_points:,} points, {count:,} layers, "
+              f"{graph_seconds / seconds:.0f}x slower than convex_layers")
+
+
+if __name__ == '__main__':
+    main()
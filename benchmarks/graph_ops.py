@@ -0,0 +1,374 @@
+"""Benchmark the hot paths of `Graph` on generated workloads.
+
+For every workload and size, a graph is built by inserting the workload's
+points one at a time (the ``add_vertex`` benchmark) and then queried and
+mutated by the other benchmarks. Each result records the throughput and,
+unless ``--no-memory`` is given, the peak memory allocated while running the
+same operations again under `tracemalloc` (which would skew the timings if
+both were measured at once).
+
+Workloads:
+
+==========  ==============================================================
+circle      points on a circle in random order; every point is on the hull
+uniform     points uniform in a square; the hull stays small
+gaussian    normally distributed points; the hull stays very small
+fan         points along a quarter circle in angular order, so that the
+            first vertex is connected to every other one
+==========  ==============================================================
+
+Usage::
+
+    python benchmarks/graph_ops.py [--sizes 100 1000 ...] [-o results.json]
+    python benchmarks/graph_ops.py --dtype int64 [...]
+    python benchmarks/graph_ops.py --compare old.json new.json
+
+Sizes run in increasing order. Inserting into a large hull is quadratic
+overall, so a workload stops before any size whose build would take longer
+than ``--time-limit`` seconds, extrapolating quadratically from the previous
+size. With ``--dtype``, graphs store integer locations (see `Graph`) and
+the workload points are rounded; workloads that then have colinear points
+stop at the first build that fails. Compare mode prints the change in
+throughput of every benchmark present in both files and exits with status 1
+if any got slower by more than ``--threshold``.
+"""
+
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from incrementalconvexhull.graph import Graph, Vertex  # noqa: E402
+
+
+DEFAULT_SIZES = [100, 1000, 10000]
+SCALE = 1000.0
+
+
+###############################################################################
+# WORKLOADS
+
+def circle_points(n, rng):
+    angles = rng.permutation(n) * (2 * np.pi / n)
+    return SCALE * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+def uniform_points(n, rng):
+    return rng.uniform(-SCALE, SCALE, size=(n, 2))
+
+
+def gaussian_points(n, rng):
+    return rng.normal(0.0, SCALE, size=(n, 2))
+
+
+def fan_points(n, rng):
+    # Each new point only sees the edge back to the first point, so the
+    # first point gains an edge with every insertion.
+    angles = np.arange(n) * (np.pi / 2 / n)
+    return SCALE * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+WORKLOADS = {
+    'circle': circle_points,
+    'uniform': uniform_points,
+    'gaussian': gaussian_points,
+    'fan': fan_points,
+}
+
+
+###############################################################################
+# BENCHMARKS
+#
+# Each benchmark takes the graph and an RNG, does its setup, and returns a
+# function that runs the timed operations and returns how many it ran.
+
+def bench_hull_contains(g, rng, queries):
+    points = _query_box_points(g, rng, queries)
+
+    def run():
+        for x, y in points:
+            g.hull_contains(x, y)
+        return len(points)
+    return run
+
+
+def bench_distance(g, rng, queries):
+    points = _query_box_points(g, rng, queries)
+    g.distance(0, 0)  # gather the vertex locations outside the timing
+
+    def run():
+        for x, y in points:
+            g.distance(x, y)
+        return len(points)
+    return run
+
+
+def bench_distances(g, rng, queries):
+    points = np.array(_query_box_points(g, rng, queries))
+    g.distance(0, 0)
+
+    def run():
+        g.distances(points)
+        return len(points)
+    return run
+
+
+def bench_find_convex_nbrs(g, rng, queries):
+    # Points well outside the hull, in every direction.
+    coords = np.array([v.loc for v in g.vertices])
+    radius = 2 * np.max(np.hypot(coords[:, 0], coords[:, 1]))
+    angles = rng.uniform(0, 2 * np.pi, size=queries)
+    points = radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    def run():
+        for x, y in points.tolist():
+            g.find_convex_nbrs(Vertex(x, y))
+        return len(points)
+    return run
+
+
+def bench_flip_edge(g, rng, queries):
+    edges = [e for e in g.edges() if g.can_flip(*e)]
+    if not edges:
+        return None
+    picks = [edges[i] for i in rng.integers(len(edges), size=queries)]
+
+    def run():
+        # Flip each edge and then flip it back, so that every pick is still
+        # in the graph when its turn comes.
+        for v1, v2 in picks:
+            n1 = v1.get_next_nbr(v2)
+            n2 = v2.get_next_nbr(v1)
+            g.flip_edge(v1, v2)
+            g.flip_edge(n1, n2)
+        return 2 * len(picks)
+    return run
+
+
+def bench_get_cross_edges(g, rng, queries):
+    n = len(g)
+    if n < 4:
+        return None
+    # Tangent pairs of an insertion are usually close together on the hull.
+    starts = rng.integers(n, size=queries)
+    spans = rng.integers(2, min(16, n - 1), size=queries, endpoint=True)
+    pairs = [(g[int(i)], g[int(i + k)]) for i, k in zip(starts, spans)]
+
+    def run():
+        for a, b in pairs:
+            for _ in g.get_cross_edges(a, b):
+                pass
+        return len(pairs)
+    return run
+
+
+QUERY_BENCHMARKS = {
+    'hull_contains': bench_hull_contains,
+    'distance': bench_distance,
+    'distances': bench_distances,
+    'find_convex_nbrs': bench_find_convex_nbrs,
+    'flip_edge': bench_flip_edge,
+    'get_cross_edges': bench_get_cross_edges,
+}
+
+
+def _query_box_points(g, rng, count):
+    """Return points in the bounding box of the graph grown by 10%, so
+    that some are inside the hull and some are not.
+    """
+    coords = np.array([v.loc for v in g.vertices])
+    lo = coords.min(axis=0)
+    hi = coords.max(axis=0)
+    pad = (hi - lo) * 0.1
+    return rng.uniform(lo - pad, hi + pad, size=(count, 2)).tolist()
+
+
+def build(points, dtype=None):
+    g = Graph(dtype=dtype, quantize=True)
+    for x, y in points.tolist():
+        g.add_vertex(x, y)
+    return g
+
+
+def measure(run, memory):
+    """Time a function returning an operation count; if `memory`, call
+    `memory()` under tracemalloc and return its peak allocation too.
+    """
+    start = time.perf_counter()
+    ops = run()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory is not None:
+        tracemalloc.start()
+        try:
+            memory()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return ops, seconds, peak
+
+
+def result(workload, size, op, ops, seconds, peak):
+    return {
+        'workload': workload,
+        'size': size,
+        'op': op,
+        'ops': ops,
+        'seconds': seconds,
+        'ops_per_sec': ops / seconds if seconds else None,
+        'peak_bytes': peak,
+    }
+
+
+def run_workload(name, sizes, queries, time_limit, track_memory, seed,
+                 dtype=None):
+    results = []
+    previous = None
+    for size in sorted(sizes):
+        if previous is not None:
+            last_size, last_seconds = previous
+            predicted = last_seconds * (size / last_size) ** 2
+            if predicted > time_limit:
+                print(f"{name:>9} {size:>8}: skipped, build would take about "
+                      f"{predicted:.0f}s", file=sys.stderr)
+                break
+        points = WORKLOADS[name](size, np.random.default_rng(seed))
+
+        graphs = []
+
+        def timed_build():
+            graphs.append(build(points, dtype))
+            return size
+
+        try:
+            ops, seconds, peak = measure(
+                timed_build,
+                (lambda: build(points, dtype)) if track_memory else None,
+            )
+        except ValueError as e:
+            # Floating point orientation tests give up on nearly colinear
+            # points in the densest workloads.
+            print(f"{name:>9} {size:>8}: build failed: {e}", file=sys.stderr)
+            break
+        results.append(result(name, size, 'add_vertex', ops, seconds, peak))
+        report(results[-1])
+        g = graphs[0]
+
+        for op, bench in QUERY_BENCHMARKS.items():
+            run = bench(g, np.random.default_rng(seed), queries)
+            if run is None:
+                continue
+            again = bench(g, np.random.default_rng(seed), queries)
+            ops, op_seconds, peak = measure(
+                run, again if track_memory else None)
+            results.append(result(name, size, op, ops, op_seconds, peak))
+            report(results[-1])
+        previous = (size, seconds)
+    return results
+
+
+def report(r):
+    peak = '' if r['peak_bytes'] is None else f"{r['peak_bytes'] / 1e6:10.2f} MB"
+    print(f"{r['workload']:>9} {r['size']:>8} {r['op']:>17} "
+          f"{r['ops_per_sec']:>14,.0f} ops/s {peak}", file=sys.stderr)
+
+
+###############################################################################
+# COMPARISON
+
+def compare(old_path, new_path, threshold):
+    """Print the throughput change of every benchmark in both files and
+    return whether any regressed by more than `threshold`.
+    """
+    def load(path):
+        with open(path) as f:
+            data = json.load(f)
+        return {(r['workload'], r['size'], r['op']): r
+                for r in data['results']}
+
+    old = load(old_path)
+    new = load(new_path)
+    regressed = False
+    print(f"{'workload':>9} {'size':>8} {'op':>17} {'old ops/s':>14} "
+          f"{'new ops/s':>14} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        before = old[key]['ops_per_sec']
+        after = new[key]['ops_per_sec']
+        if not before or not after:
+            continue
+        change = after / before - 1
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{key[0]:>9} {key[1]:>8} {key[2]:>17} {before:>14,.0f} "
+              f"{after:>14,.0f} {change:>+8.1%}{flag}")
+    for key in sorted(old.keys() ^ new.keys()):
+        side = 'old' if key in old else 'new'
+        print(f"{key[0]:>9} {key[1]:>8} {key[2]:>17}  only in {side} results")
+    return regressed
+
+
+###############################################################################
+# MAIN
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS),
+                        default=list(WORKLOADS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help='graph sizes, e.g. 100 1000 ... 1000000')
+    parser.add_argument('--queries', type=int, default=1000,
+                        help='operations per query benchmark')
+    parser.add_argument('--time-limit', type=float, default=30.0,
+                        help='longest predicted build time of a size that '
+                             'is still run')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc runs')
+    parser.add_argument('--seed', type=int, default=40)
+    parser.add_argument('--dtype', choices=['int32', 'int64'],
+                        help='build graphs with integer locations, rounding '
+                             'the workload points')
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two results files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = []
+    for name in args.workloads:
+        results += run_workload(name, args.sizes, args.queries,
+                                args.time_limit, not args.no_memory,
+                                args.seed, args.dtype)
+
+    data = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'dtype': args.dtype or 'float64',
+            'queries': args.queries,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
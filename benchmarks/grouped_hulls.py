@@ -0,0 +1,60 @@
+"""Compare `grouped_hulls()` with building a `Graph` per group.
+
+Points are normally distributed around a random center per group. Building
+graphs is slow, so it is only timed on the first ``--graph-groups`` groups
+and extrapolated to all of them.
+
+Usage::
+
+    python benchmarks/grouped_hulls.py [--points N] [--groups N]
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from incrementalconvexhull.graph import Graph  # noqa: E402
+from incrementalconvexhull.grouped import grouped_hulls  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--groups', type=int, default=200_000)
+    parser.add_argument('--graph-groups', type=int, default=2000,
+                        help='groups to build graphs for')
+    parser.add_argument('--seed', type=int, default=43)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    groups = rng.integers(args.groups, size=args.points)
+    centers = rng.uniform(-1000, 1000, size=(args.groups, 2))
+    points = centers[groups] + rng.normal(size=(args.points, 2))
+
+    start = time.perf_counter()
+    hulls = grouped_hulls(points, groups)
+    seconds = time.perf_counter() - start
+    print(f"grouped_hulls: {seconds:8.3f}s for {len(hulls):,} groups, "
+          f"{hulls.sizes().mean():.1f} vertices per hull")
+
+    count = min(args.graph_groups, len(hulls))
+    subset = np.isin(groups, hulls.keys[:count])
+    start = time.perf_counter()
+    graphs = {}
+    for key, (x, y) in zip(groups[subset].tolist(), points[subset].tolist()):
+        try:
+            graphs.setdefault(key, Graph()).add_vertex(x, y)
+        except ValueError:
+            pass  # colinear
+    graph_seconds = (time.perf_counter() - start) * len(hulls) / count
+    print(f"Graph per group: {graph_seconds:8.3f}s (extrapolated from "
+          f"{count:,} groups), {graph_seconds / seconds:.0f}x slower")
+
+
+if __name__ == '__main__':
+    main()
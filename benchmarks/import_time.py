@@ -0,0 +1,74 @@
+"""Measure the cold-start cost of importing modules of the package.
+
+Every import runs in a fresh interpreter, so nothing is cached in
+``sys.modules``. For each module this prints the median time spent in the
+``import`` statement itself and whether it pulled in pyglet.
+
+Usage::
+
+    python benchmarks/import_time.py [--runs N] [MODULE ...]
+"""
+
+import argparse
+import pathlib
+import statistics
+import subprocess
+import sys
+
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = [
+    'numpy',
+    'incrementalconvexhull.point',
+    'incrementalconvexhull.graph',
+    'incrementalconvexhull.journal',
+    'incrementalconvexhull.snapshot',
+    'incrementalconvexhull.server',
+    'incrementalconvexhull.main',
+]
+
+CHILD = """\
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, 'pyglet' in sys.modules)
+"""
+
+
+def time_import(module, runs):
+    """Return the import times of a module in seconds, one per fresh
+    interpreter, and whether pyglet was loaded.
+    """
+    times = []
+    loads_pyglet = False
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        seconds, pyglet_loaded = result.stdout.split()
+        times.append(float(seconds))
+        loads_pyglet = pyglet_loaded == 'True'
+    return times, loads_pyglet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'module':<34} {'median ms':>10} {'min ms':>8}  pyglet")
+    for module in args.modules:
+        try:
+            times, loads_pyglet = time_import(module, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<34} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{module:<34} {1000 * statistics.median(times):>10.1f} "
+              f"{1000 * min(times):>8.1f}  {'yes' if loads_pyglet else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Mapping between world coordinates and window pixels.
+
+A camera looks at the world point `center`, which is drawn in the middle of
+the window, magnified by `scale` pixels per world unit. World coordinates
+are what the graph stores; pixels are what pyglet reports for mouse events.
+"""
+
+import numpy as np
+
+
+MIN_SCALE = 1e-6
+MAX_SCALE = 1e6
+
+
+class Camera:
+    """Pan and zoom state for a window."""
+
+    def __init__(self, width, height):
+        """Create a camera that initially maps window pixels one-to-one onto
+        world coordinates, with the origin in the bottom left corner.
+
+        Params:
+            width (int): window width in pixels
+            height (int): window height in pixels
+        """
+        self.width = width
+        self.height = height
+        self.center = np.array([width / 2, height / 2])
+        self.scale = 1.0
+
+    def resize(self, width, height):
+        """Change the window size, keeping the center and scale."""
+        self.width = width
+        self.height = height
+
+    def to_world(self, x, y) -> np.ndarray:
+        """Return the world position drawn at a window pixel."""
+        return self.center + (np.array([x, y], dtype=float)
+                              - self._half_size()) / self.scale
+
+    def to_screen(self, p) -> np.ndarray:
+        """Return the window pixel at which a world position is drawn."""
+        return (np.asarray(p, dtype=float) - self.center) * self.scale \
+            + self._half_size()
+
+    def transform(self):
+        """Return ``(tx, ty, s)`` such that a world position ``p`` is drawn
+        at pixel ``p * s + (tx, ty)``; suitable for `glTranslatef()` followed
+        by `glScalef()`.
+        """
+        tx, ty = self._half_size() - self.center * self.scale
+        return tx, ty, self.scale
+
+    def bounds(self):
+        """Return the ``(lo, hi)`` corners of the world box that is visible
+        in the window.
+        """
+        half = self._half_size() / self.scale
+        return self.center - half, self.center + half
+
+    def pan(self, dx, dy):
+        """Move the view so that the world follows a mouse drag of `dx`,
+        `dy` pixels.
+        """
+        self.center = self.center - np.array([dx, dy], dtype=float) / self.scale
+
+    def zoom(self, factor, x, y):
+        """Multiply the scale by `factor`, keeping the world position under
+        pixel `x`, `y` in place.
+        """
+        anchor = self.to_world(x, y)
+        scale = min(max(self.scale * factor, MIN_SCALE), MAX_SCALE)
+        self.center = anchor + (self.center - anchor) * (self.scale / scale)
+        self.scale = scale
+
+    def fit(self, lo, hi, margin=0.0):
+        """Center the view on the world box from `lo` to `hi` and zoom so
+        that it fills the window, leaving `margin` pixels on every side.
+        """
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        self.center = (lo + hi) / 2
+        room = np.maximum(self._half_size() * 2 - 2 * margin, 1.0)
+        size = hi - lo
+        with np.errstate(divide='ignore'):
+            scale = np.min(np.where(size > 0, room / size, np.inf))
+        if np.isfinite(scale):
+            self.scale = min(max(float(scale), MIN_SCALE), MAX_SCALE)
+
+    def _half_size(self):
+        return np.array([self.width / 2, self.height / 2])
@@ -0,0 +1,210 @@
+"""Signed distances from points to a convex polygon, and the nearest points on
+its boundary.
+
+Use `Graph.distance()` and `Graph.closest_point()`, or their batch versions
+`Graph.distances()` and `Graph.closest_points()`, rather than this module
+directly.
+
+For a point outside the polygon, `hull_distances()` finds the nearest
+boundary point with four binary searches over the polygon's vertices, all
+done for every query at once:
+
+1. The fan of triangles from the first vertex locates the point, finding an
+   edge it can see (i.e. that it is strictly outside the line of), or
+   showing that it is inside.
+2. The visible edges are contiguous along the polygon, and the edge starting
+   half a turn of edge directions after a visible one, or the edge before
+   that, is never visible.
+3. Between a visible and an invisible edge, searches in both directions find
+   the ends of the visible chain.
+4. Along the visible chain, the distance to the point first decreases and
+   then increases, so the nearest point is on the first edge whose end is
+   farther away than its nearest point.
+
+That is O(log n) per query. Points inside are compared with the line of
+every edge, which is O(n) per query.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+# Largest number of query-edge pairs compared at once for points inside
+CHUNK_SIZE = 1 << 20
+
+
+def hull_distances(coords, points) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the signed distance from each point to a convex polygon and the
+    nearest point on its boundary.
+
+    Distances are positive outside the polygon, negative inside it and zero
+    on its boundary. A polygon of two vertices is a segment, and one of one
+    vertex is a point; every point is outside them.
+
+    Params:
+        coords (np.ndarray): (N, 2) vertices of a strictly convex polygon in
+            ccw order
+        points (np.ndarray): (M, 2) query points
+
+    Returns:
+        ``(distances, closest)``: (M,) signed distances and (M, 2) nearest
+        boundary points
+
+    Raises:
+        ValueError: The polygon has no vertices
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(coords)
+    if n == 0:
+        raise ValueError("no vertices to measure the distance to")
+    if n == 1:
+        closest = np.broadcast_to(coords[0], points.shape).copy()
+        return np.hypot(*(points - closest).T), closest
+    if n == 2:
+        closest = _clamp_to_edges(coords, coords[1] - coords[0],
+                                  np.zeros(len(points), dtype=int), points)
+        return np.hypot(*(points - closest).T), closest
+
+    edges = np.roll(coords, -1, axis=0) - coords
+    distances = np.empty(len(points))
+    closest = np.empty_like(points)
+
+    visible, inside = _find_visible_edge(coords, edges, points)
+    outside = ~inside
+    distances[inside], closest[inside] = _inside(coords, edges,
+                                                 points[inside])
+    distances[outside], closest[outside] = _outside(
+        coords, edges, points[outside], visible[outside])
+    return distances, closest
+
+
+def _find_visible_edge(coords, edges, points):
+    """Return an edge that each point is strictly outside of, and whether it
+    is inside or on the boundary instead.
+    """
+    n = len(coords)
+    m = len(points)
+    visible = np.zeros(m, dtype=int)
+    inside = np.zeros(m, dtype=bool)
+    rel = points - coords[0]
+    before_first = _cross(edges[0], rel) < 0
+    after_last = ~before_first & (_cross(coords[n - 1] - coords[0], rel) > 0)
+    visible[after_last] = n - 1
+
+    # Otherwise the point is in the wedge at the first vertex spanned by the
+    # others; find the triangle of the fan it is in.
+    fan = np.flatnonzero(~before_first & ~after_last)
+    spokes = coords[1:] - coords[0]
+    i = _first_true(
+        lambda i: _cross(spokes[i], rel[fan]) <= 0,
+        np.ones(len(fan), dtype=int), np.full(len(fan), n - 2, dtype=int),
+    )
+    # Vertex i + 1 is the first one the point is not left of, so the point is
+    # in the triangle 0, i, i + 1 or beyond its edge from i to i + 1.
+    seen = _cross(edges[i], points[fan] - coords[i]) < 0
+    visible[fan] = i
+    inside[fan[~seen]] = True
+    return visible, inside
+
+
+def _outside(coords, edges, points, visible):
+    n = len(coords)
+    m = len(points)
+    if not m:
+        return np.empty(0), np.empty((0, 2))
+
+    def is_visible(edge):
+        edge = edge % n
+        return _cross(edges[edge], points - coords[edge]) < 0
+
+    # An edge that is not visible: the one starting where the edge direction
+    # has turned half way around from that of the visible edge, or the one
+    # before it.
+    def half_turned(t):
+        e = edges[(visible + t) % n]
+        c = _cross(edges[visible], e)
+        return (c < 0) | ((c == 0) & (np.sum(edges[visible] * e, axis=1) < 0))
+
+    t = _first_true(half_turned, np.ones(m, dtype=int),
+                    np.full(m, n - 1, dtype=int))
+    hidden = visible + t
+    hidden = np.where(is_visible(hidden), hidden - 1, hidden) % n
+
+    # Ends of the visible chain: the first hidden edge going forwards, and
+    # the last visible one going backwards.
+    ahead = _first_true(lambda t: ~is_visible(visible + t),
+                        np.ones(m, dtype=int), (hidden - visible) % n)
+    behind = _first_true(lambda t: ~is_visible(visible - t),
+                         np.ones(m, dtype=int), (visible - hidden) % n)
+    first = visible - behind + 1
+    length = ahead + behind - 1
+
+    def moving_away(u):
+        edge = (first + u) % n
+        return np.sum((points - coords[(edge + 1) % n]) * edges[edge],
+                      axis=1) < 0
+
+    # Past the end of the chain, the nearest point is its last vertex, which
+    # is the start of the next edge clamped to 0.
+    u = _first_true(moving_away, np.zeros(m, dtype=int), length)
+    edge = (first + u) % n
+    closest = _clamp_to_edges(coords, edges[edge], edge, points)
+    return np.hypot(*(points - closest).T), closest
+
+
+def _inside(coords, edges, points):
+    """Return the distances and nearest points for points inside or on the
+    boundary, by comparing each with every edge.
+    """
+    m = len(points)
+    distances = np.empty(m)
+    closest = np.empty((m, 2))
+    lengths = np.hypot(*edges.T)
+    step = max(1, CHUNK_SIZE // len(coords))
+    for start in range(0, m, step):
+        p = points[start:start + step]
+        rel = p[:, None, :] - coords[None, :, :]
+        # Distance to each edge's line; positive inside
+        depth = (edges[None, :, 0] * rel[:, :, 1]
+                 - edges[None, :, 1] * rel[:, :, 0]) / lengths
+        edge = np.argmin(depth, axis=1)
+        distances[start:start + step] = \
+            -depth[np.arange(len(p)), edge] + 0.0
+        closest[start:start + step] = _clamp_to_edges(coords, edges[edge],
+                                                      edge, p)
+    return distances, closest
+
+
+def _clamp_to_edges(coords, edges, starts, points):
+    """Return the nearest point to each point on the edge with the given
+    start vertex and direction.
+    """
+    a = coords[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.sum((points - a) * edges, axis=-1) / np.sum(edges * edges,
+                                                           axis=-1)
+    t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+    return a + t[:, None] * edges
+
+
+def _first_true(pred, lo, hi):
+    """Binary search, for each query, for the smallest t in ``[lo, hi]`` for
+    which `pred` is true, where `pred` is false and then true as t increases
+    and is true at `hi`. `pred` is given an array of t for every query.
+    """
+    lo = lo.copy()
+    hi = hi.copy()
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        found = pred(mid)
+        hi = np.where(found, mid, hi)
+        lo = np.where(found, lo, mid + 1)
+    return lo
+
+
+def _cross(u, v):
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
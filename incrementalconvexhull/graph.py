@@ -1,22 +1,188 @@
 from __future__ import annotations
 
+import contextlib
 import operator
-from typing import List, Sequence, Union
+import os
+import tempfile
+from typing import Callable, List, Sequence, Union
 
 import numpy as np
 
-from . import point
+from . import distance, instrument, point
 
 
 class Graph:
     """Undirected convex graph of 2D Euclidean points.
     Points are stored in a list in counterclockwise sorted order. Edges are
     stored using an adjacency list on each vertex.
+
+    Every mutation increments `version` and is reported to subscribers (see
+    `subscribe()`) as a ``(kind, payload)`` event:
+
+    - ``('add_vertex', v)``, followed by an ``add_edge`` event for each of
+      its edges
+    - ``('remove_vertex', v)``, which implies the removal of all its edges
+    - ``('add_edge', (v1, v2))``
+    - ``('remove_edge', (v1, v2))``
+    - ``('flip_edge', ((v1, v2), (n1, n2)))``, where edge v1-v2 was replaced
+      by edge n1-n2
+
+    Call `enable_stats()` to count the work done by each method and time it;
+    see `stats()`.
+
+    A graph created with an integer `dtype` stores vertex locations as
+    integers and tests orientations exactly (see `point.orient_exact()`), so
+    nearly colinear points are never misjudged. Each location is a small
+    array of its own, whose overhead outweighs its data, so the integer type
+    saves little memory in a graph; smaller types such as ``np.int32`` do
+    halve the size of the coordinates written by `save()`.
     """
 
-    def __init__(self):
-        """Construct a graph with no vertices."""
+    def __init__(self, dtype=None, quantize=False):
+        """Construct a graph with no vertices.
+
+        Params:
+            dtype (np.dtype): integer type to store vertex locations as, or
+                `None` to store them as given (usually floats)
+            quantize (bool): with an integer `dtype`, round the coordinates
+                passed to `add_vertex()` to the nearest integer instead of
+                rejecting those that are not integers
+        """
+        if dtype is not None:
+            dtype = np.dtype(dtype)
+            if dtype.kind not in 'iu':
+                raise ValueError(f"dtype must be an integer type, not {dtype}")
+        self.dtype = dtype
+        self.quantize = quantize
         self.vertices: List[Vertex] = []
+        self.version = 0
+        self._subscribers: List[Callable] = []
+        self._batch_depth = 0
+        self._batched_events: List[tuple] = []
+        self._instrumentation = None
+        self._coords_cache = (None, None)
+
+    def subscribe(self, callback: Callable) -> Callable:
+        """Register a callback to be notified of changes to the graph.
+
+        The callback receives a list of events. Each call to `add_vertex()` or
+        `flip_between()` is delivered as a single list, however many flips it
+        performed; see also `batch()`.
+
+        Params:
+            callback (Callable): function taking a list of events
+
+        Returns:
+            The callback, for use with `unsubscribe()`
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        """Stop notifying a callback registered with `subscribe()`."""
+        self._subscribers.remove(callback)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Deliver all events emitted inside the context to subscribers as a
+        single list when the outermost batch exits.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batched_events:
+                events, self._batched_events = self._batched_events, []
+                self._deliver(events)
+
+    def _emit(self, kind: str, payload):
+        self.version += 1
+        if not self._subscribers:
+            return
+        if self._batch_depth:
+            self._batched_events.append((kind, payload))
+        else:
+            self._deliver([(kind, payload)])
+
+    def _deliver(self, events: List[tuple]):
+        for callback in list(self._subscribers):
+            callback(events)
+
+    def _orient(self, p1, p2, p3) -> int:
+        """Compute the orientation of three points; see `point.orient()`.
+        Every orientation test of the graph goes through here, so that
+        `enable_stats()` can count them.
+        """
+        return point.orient(p1, p2, p3)
+
+    def enable_stats(self):
+        """Start collecting statistics about calls to the graph's methods;
+        see `stats()`. Until this is called, the statistics cost nothing.
+        """
+        if self._instrumentation is None:
+            self._instrumentation = instrument.Instrumentation(self)
+
+    def disable_stats(self):
+        """Stop collecting statistics and discard them, along with any
+        hooks.
+        """
+        if self._instrumentation is not None:
+            self._instrumentation.close()
+            self._instrumentation = None
+
+    def reset_stats(self):
+        """Zero the statistics collected so far."""
+        if self._instrumentation is not None:
+            self._instrumentation.reset()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the statistics collected since
+        `enable_stats()` or `reset_stats()`, or an empty dict if they are not
+        enabled.
+
+        The snapshot has two keys:
+
+        - ``'counters'``: number of calls to each instrumented method
+          (including nested calls; e.g. ``'flip_edge'`` counts flips and
+          ``'index'`` counts scans of the vertex list) and of orientation
+          tests (``'orient'``)
+        - ``'operations'``: for each method, the number of ``'calls'``, the
+          ``'counters'`` of the work done inside the calls that were not
+          nested in another instrumented method, and a ``'latency'``
+          histogram with power-of-two microsecond buckets
+        """
+        if self._instrumentation is None:
+            return {}
+        return self._instrumentation.snapshot()
+
+    def add_stats_hook(self, hook: Callable) -> Callable:
+        """Call a function after every call to an instrumented method that
+        was not nested in another one, e.g. to export statistics. Enables
+        statistics if necessary.
+
+        Params:
+            hook (Callable): function taking the method name, its duration in
+                seconds and a dict of the counters of the work it did
+
+        Returns:
+            The hook, for use with `remove_stats_hook()`
+        """
+        self.enable_stats()
+        self._instrumentation.hooks.append(hook)
+        return hook
+
+    def remove_stats_hook(self, hook: Callable):
+        """Stop calling a hook registered with `add_stats_hook()`.
+
+        Raises:
+            ValueError: if the hook is not registered, including when
+                `disable_stats()` discarded it
+        """
+        if self._instrumentation is None:
+            raise ValueError("hook is not registered: statistics are not "
+                             "enabled")
+        self._instrumentation.hooks.remove(hook)
 
     def add_vertex(self, x, y):
         """Add a vertex at an XY position to the graph and return the new
@@ -31,12 +197,45 @@ class Graph:
 
         Returns:
             None
+
+        Raises:
+            ValueError: The graph has an integer `dtype`, and a coordinate is
+                out of its range, or is not an integer and the graph does not
+                `quantize`
+        """
+        x, y = self._ingest(x, y)
+        with self.batch():
+            return self._add_vertex(x, y)
+
+    def _ingest(self, x, y):
+        """Return coordinates converted to the graph's `dtype`, if it has
+        one.
         """
-        z = Vertex(x, y)
+        if self.dtype is None:
+            return x, y
+        info = np.iinfo(self.dtype)
+        coords = []
+        for c in (x, y):
+            try:
+                rounded = int(np.rint(c)) if self.quantize else int(c)
+            except (OverflowError, ValueError):
+                raise ValueError(f"coordinate {c!r} is not finite")
+            if rounded != c and not self.quantize:
+                raise ValueError(f"coordinate {c!r} is not an integer; create "
+                                 "the graph with quantize=True to round it")
+            if not info.min <= rounded <= info.max:
+                raise ValueError(f"coordinate {c!r} is out of range for "
+                                 f"{self.dtype}")
+            coords.append(rounded)
+        return coords
+
+    def _add_vertex(self, x, y):
+        z = Vertex(x, y, dtype=self.dtype)
 
         if len(self) < 2:
             # 2 or fewer vertices are always in ccw order
             self.vertices.append(z)
+            self._emit('add_vertex', z)
             if len(self) == 2:
                 # Add edge between both vertices
                 self.add_edge(*self.vertices)
@@ -62,6 +261,7 @@ class Graph:
 
             # Keep vertices in ccw order
             self.vertices.insert(self.index(b), z)
+            self._emit('add_vertex', z)
 
             self.add_edge(a, z)
             self.add_edge(b, z)
@@ -84,10 +284,72 @@ class Graph:
             return False
         new_point = np.array([x, y])
         for v1, v2 in self.vertex_pairs():
-            if point.orient(v1.loc, v2.loc, new_point) < 0:
+            if self._orient(v1.loc, v2.loc, new_point) < 0:
                 return False
         return True
 
+    def distance(self, x, y) -> float:
+        """Return the signed distance from an XY position to the convex hull
+        of the vertices of the graph.
+
+        Takes O(log n) time for positions outside the hull and O(n) for
+        positions inside it, once the vertex locations have been gathered
+        into an array. That takes O(n) time after each change to the graph.
+
+        Params:
+            x (float): position x coordinate
+            y (float): position y coordinate
+
+        Returns:
+            Distance to the hull boundary (float); positive outside the hull,
+            negative inside it and zero on its boundary.
+
+        Raises:
+            ValueError: The graph has no vertices
+        """
+        return float(self.distances([[x, y]])[0])
+
+    def closest_point(self, x, y) -> np.ndarray:
+        """Return the point on the boundary of the convex hull of the
+        vertices of the graph nearest to an XY position. See `distance()`.
+
+        Params:
+            x (float): position x coordinate
+            y (float): position y coordinate
+
+        Returns:
+            XY location of the nearest point (np.ndarray)
+
+        Raises:
+            ValueError: The graph has no vertices
+        """
+        return self.closest_points([[x, y]])[0]
+
+    def distances(self, points) -> np.ndarray:
+        """Return the signed distance from each of an (N, 2) array of
+        positions to the convex hull. See `distance()`.
+        """
+        return distance.hull_distances(self._hull_coords(), points)[0]
+
+    def closest_points(self, points) -> np.ndarray:
+        """Return the nearest point on the boundary of the convex hull to
+        each of an (N, 2) array of positions, as an (N, 2) array. See
+        `distance()`.
+        """
+        return distance.hull_distances(self._hull_coords(), points)[1]
+
+    def _hull_coords(self) -> np.ndarray:
+        """Return the locations of the vertices as an (N, 2) array, cached
+        until the graph changes.
+        """
+        key = (self.version, len(self))
+        cached_key, coords = self._coords_cache
+        if cached_key != key:
+            coords = np.array([v.loc for v in self.vertices],
+                              dtype=float).reshape(-1, 2)
+            self._coords_cache = (key, coords)
+        return coords
+
     def __len__(self) -> int:
         """Return the number of vertices in the graph.
 
@@ -157,8 +419,9 @@ class Graph:
         if v2 in v1.nbrs:
             raise ValueError("Edge already exists between Verticies.")
 
-        v1.add_neighbor(v2)
-        v2.add_neighbor(v1)
+        v1.add_neighbor(v2, self._orient)
+        v2.add_neighbor(v1, self._orient)
+        self._emit('add_edge', (v1, v2))
 
     def edges(self):
         """Return a generator over all edges in the graph.
@@ -206,21 +469,24 @@ class Graph:
         Raises:
             ValueError: The edge cannot be flipped
         """
+        # A removed vertex keeps its neighbors, but they no longer have it.
         try:
-            i1 = self.vertices.index(v1)
-            i2 = self.vertices.index(v2)
+            i = v1.nbrs.index(v2)
         except ValueError:
-            raise ValueError("vertex not in graph")
+            raise ValueError("edge does not exist")
+        if v1 not in v2.nbrs:
+            raise ValueError("edge does not exist")
 
-        diff = abs(i1 - i2)
-        if diff == 1 or diff == len(self) - 1:
+        # An interior edge has a triangle on either side, made with the
+        # neighbors of v1 just before and after v2. Around a hull vertex of
+        # degree 3 or more, the two hull neighbors are never adjacent, so a
+        # hull edge lacks one of the triangles. This avoids scanning the
+        # vertex list for the positions of v1 and v2 on the hull.
+        before = v1.nbrs[i - 1]
+        after = v1.nbrs[(i + 1) % len(v1.nbrs)]
+        if before is after or before not in v2.nbrs or after not in v2.nbrs:
             raise ValueError("edge is on convex hull")
 
-        if v1 in v2.nbrs:
-            return  # Edge exists and can be flipped!
-        else:
-            raise ValueError("edge does not exist")
-
     def flip_edge(self, v1: Vertex, v2: Vertex):
         """Flip an edge between two vertices in graph.
 
@@ -231,8 +497,7 @@ class Graph:
         Raises a `ValueError` if the edge cannot be flipped for any of the
         following reasons:
 
-        - Either vertex is not in the graph.
-        - The edge is not in the graph.
+        - The edge is not in the graph, e.g. because either vertex is not.
         - The edge is on the convex hull of the graph.
 
         Note that the quadrilateral formed by the triangles on either side of
@@ -252,8 +517,15 @@ class Graph:
         self.check_can_flip(v1, v2)
         n1 = v1.get_next_nbr(v2)
         n2 = v2.get_next_nbr(v1)
-        self.remove_edge(v1, v2)
-        self.add_edge(n1, n2)
+        v1.remove_neighbor(v2)
+        v2.remove_neighbor(v1)
+        # The triangles v1, v2, n1 and v2, v1, n2 are ccw, so around n1 the
+        # new neighbor goes right after v1, and around n2 right after v2. This
+        # avoids the angular search of add_neighbor(), which is linear in the
+        # degree.
+        n1.nbrs.insert(n1.nbrs.index(v1) + 1, n2)
+        n2.nbrs.insert(n2.nbrs.index(v2) + 1, n1)
+        self._emit('flip_edge', ((v1, v2), (n1, n2)))
 
     def remove_vertex(self, v1: Vertex):
         """Remove a vertex and all its edges from the graph.
@@ -269,7 +541,8 @@ class Graph:
             node.nbrs.remove(v1)
 
         # Remove v1 from graph
-        self.vertices.remove(v1)
+        del self.vertices[self.index(v1)]
+        self._emit('remove_vertex', v1)
 
     def remove_edge(self, v1: Vertex, v2: Vertex):
         """Remove the edge between two vertictes from the graph.
@@ -286,6 +559,7 @@ class Graph:
 
         # Remove V2 from V1 neighbors
         v2.remove_neighbor(v1)
+        self._emit('remove_edge', (v1, v2))
 
     def find_convex_nbrs(self, v: Vertex):
         """Find neighbors of the newly inserted point in the existing graph
@@ -305,14 +579,14 @@ class Graph:
             )
         else:
             a, b = None, None
-            prev_orient = point.orient(
+            prev_orient = self._orient(
                 self.vertices[-1].loc,
                 self.vertices[0].loc,
                 v.loc,
             )
 
             for v1, v2 in self.vertex_pairs():
-                curr_orient = point.orient(v1.loc, v2.loc, v.loc)
+                curr_orient = self._orient(v1.loc, v2.loc, v.loc)
 
                 # Set A before B
                 if prev_orient == 1 and curr_orient == -1:
@@ -350,8 +624,9 @@ class Graph:
         Returns:
             None
         """
-        for c in self.get_cross_edges(a, b):
-            self.flip_edge(*c)
+        with self.batch():
+            for c in self.get_cross_edges(a, b):
+                self.flip_edge(*c)
 
     def get_cross_edges(self, a: Vertex, b: Vertex):
         """Compute the edges in the graph that cross the line through the specified vertices.
@@ -375,6 +650,232 @@ class Graph:
                 if lv in rv.nbrs:
                     yield (rv, lv)
 
+    def validate(self):
+        """Check the invariants of the graph in O(n + E) time.
+
+        The graph is valid if:
+
+        - `vertices` form a strictly convex polygon in ccw order
+        - adjacency is symmetric, with no loops, duplicate edges or edges to
+          vertices outside the graph
+        - each vertex's neighbors are in ccw angular order, going from the
+          next vertex on the hull to the previous one
+        - the edges triangulate the polygon: every two angularly consecutive
+          neighbors of a vertex are adjacent, and there are 2n - 3 edges
+
+        Params:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: An invariant does not hold
+        """
+        n = len(self)
+        if len(set(self.vertices)) != n:
+            raise ValueError("vertex appears more than once in the hull")
+
+        # Directed adjacency, as pairs of indices into `vertices`
+        index = {v: i for i, v in enumerate(self.vertices)}
+        arcs = set()
+        centers, firsts, seconds = [], [], []
+        for i, v in enumerate(self.vertices):
+            nbrs = []
+            for u in v.nbrs:
+                j = index.get(u)
+                if j is None:
+                    raise ValueError(f"vertex {v} has neighbor {u} that is "
+                                     "not in the graph")
+                if j == i:
+                    raise ValueError(f"vertex {v} is its own neighbor")
+                if (i, j) in arcs:
+                    raise ValueError(f"edge {v}-{u} appears more than once")
+                arcs.add((i, j))
+                nbrs.append(j)
+            # Angularly consecutive pairs of neighbors, cyclically
+            centers += [i] * len(nbrs)
+            firsts += nbrs
+            seconds += nbrs[1:] + nbrs[:1]
+        for i, j in arcs:
+            if (j, i) not in arcs:
+                raise ValueError(f"edge {self[i]}-{self[j]} is only in the "
+                                 "neighbors of one of its vertices")
+        edge_count = len(arcs) // 2
+        if edge_count != max(2 * n - 3, 0):
+            raise ValueError(f"{n} vertices should have {max(2 * n - 3, 0)} "
+                             f"edges, not {edge_count}")
+        if n < 2:
+            return
+        for i in range(n):
+            if (i, (i + 1) % n) not in arcs:
+                raise ValueError(f"hull edge {self[i]}-{self[i+1]} is missing")
+        if n < 3:
+            return
+
+        # Integer locations are checked exactly, with Python integers.
+        coords = np.array([v.loc.tolist() for v in self.vertices],
+                          dtype=float if self.dtype is None else object)
+        prev = np.roll(coords, 1, axis=0)
+        after = np.roll(coords, -1, axis=0)
+        turns = _cross(coords - prev, after - coords)
+        bad = np.flatnonzero(turns <= 0)
+        if len(bad):
+            raise ValueError(f"hull is not strictly convex and ccw at vertex "
+                             f"{self[int(bad[0])]}")
+        # All left turns could still wind around more than once.
+        edges = (after - coords).astype(float)
+        winding = np.sum(np.arctan2(
+            turns.astype(float),
+            np.sum(edges * np.roll(edges, 1, 0), axis=1)))
+        if round(winding / (2 * np.pi)) != 1:
+            raise ValueError("hull winds around more than once")
+
+        # Around a vertex, each angularly consecutive pair of neighbors is a
+        # ccw turn, except for the single pair spanning the outside of the
+        # hull, which must go from the previous hull vertex to the next.
+        centers = np.array(centers)
+        firsts = np.array(firsts)
+        seconds = np.array(seconds)
+        c = coords[centers]
+        turns = _cross(coords[firsts] - c, coords[seconds] - c)
+        gaps = ((firsts == (centers - 1) % n) & (seconds == (centers + 1) % n))
+        bad = np.flatnonzero((turns <= 0) != gaps)
+        if len(bad):
+            i = int(centers[bad[0]])
+            raise ValueError(f"neighbors of vertex {self[i]} are not in ccw "
+                             "angular order")
+        for i, j, k in zip(centers[~gaps].tolist(), firsts[~gaps].tolist(),
+                           seconds[~gaps].tolist()):
+            if (j, k) not in arcs:
+                raise ValueError(f"triangle {self[i]}, {self[j]}, {self[k]} "
+                                 "is missing an edge")
+
+    def save(self, path):
+        """Save the graph to a directory of flat NumPy arrays.
+
+        The directory contains `coords.npy` (vertex locations in ccw hull
+        order), `nbr_offsets.npy` and `nbr_indices.npy` (adjacency in CSR form,
+        with each vertex's neighbors in their ccw angular order), and
+        `quantize.npy` (the graph's `quantize` flag).
+
+        Each array is written to a temporary file that then replaces the old
+        one, so graphs loaded from the directory with `mmap` keep the arrays
+        they mapped.
+
+        Params:
+            path (str): directory to write; created if it does not exist
+
+        Returns:
+            None
+        """
+        index = {v: i for i, v in enumerate(self.vertices)}
+        coords = np.array([v.loc for v in self.vertices],
+                          dtype=self.dtype).reshape(-1, 2)
+        nbr_offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        for i, v in enumerate(self.vertices):
+            nbr_offsets[i + 1] = nbr_offsets[i] + len(v.nbrs)
+        nbr_indices = np.array(
+            [index[n] for v in self.vertices for n in v.nbrs],
+            dtype=np.int64,
+        )
+
+        arrays = {
+            'coords.npy': coords,
+            'nbr_offsets.npy': nbr_offsets,
+            'nbr_indices.npy': nbr_indices,
+            'quantize.npy': np.array(self.quantize),
+        }
+
+        os.makedirs(path, exist_ok=True)
+        written = {}
+        try:
+            for name, array in arrays.items():
+                fd, tmp = tempfile.mkstemp(prefix=f'.{name}.', dir=path)
+                written[name] = tmp
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, array)
+            for name, tmp in list(written.items()):
+                os.replace(tmp, os.path.join(path, name))
+                del written[name]
+        finally:
+            for tmp in written.values():
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path, mmap=True) -> Graph:
+        """Load a graph written by `save()`.
+
+        With `mmap`, the arrays are memory-mapped read-only and each vertex's
+        location is a view into the mapped coordinates, so no coordinate data
+        is copied. A graph saved with integer locations is loaded with that
+        `dtype`, and with the `quantize` flag it was saved with.
+
+        Params:
+            path (str): directory written by `save()`
+            mmap (bool): memory-map the arrays instead of reading them
+
+        Returns:
+            The loaded graph (Graph)
+        """
+        mmap_mode = 'r' if mmap else None
+        coords = np.load(os.path.join(path, 'coords.npy'), mmap_mode=mmap_mode)
+        nbr_offsets = np.load(os.path.join(path, 'nbr_offsets.npy'),
+                              mmap_mode=mmap_mode)
+        nbr_indices = np.load(os.path.join(path, 'nbr_indices.npy'),
+                              mmap_mode=mmap_mode)
+
+        g = cls()
+        if coords.dtype.kind in 'iu':
+            g.dtype = coords.dtype
+        quantize = os.path.join(path, 'quantize.npy')
+        if os.path.exists(quantize):
+            g.quantize = bool(np.load(quantize))
+        # Rows of a plain view are plain arrays; rows of an `np.memmap` would
+        # each be a slower `np.memmap` of their own.
+        g.vertices = [Vertex.from_loc(loc) for loc in coords.view(np.ndarray)]
+        offsets = nbr_offsets.tolist()
+        indices = nbr_indices.tolist()
+        for i, v in enumerate(g.vertices):
+            v.nbrs = [g.vertices[j] for j in indices[offsets[i]:offsets[i+1]]]
+        return g
+
+    @classmethod
+    def from_convex_polygon(cls, coords) -> Graph:
+        """Create a graph from the vertices of a convex polygon, triangulated
+        as a fan from the first vertex.
+
+        This takes O(n) time, where inserting the vertices one at a time with
+        `add_vertex()` takes O(n^2). The polygon is not checked; call
+        `validate()` if it might not be strictly convex.
+
+        Params:
+            coords (np.ndarray): (N, 2) vertex locations in ccw order; the
+                graph has their `dtype` if it is an integer type
+
+        Returns:
+            The new graph (Graph)
+        """
+        g = cls()
+        coords = np.array(coords).reshape(-1, 2)
+        if coords.dtype.kind in 'iu':
+            g.dtype = coords.dtype
+        vs = [Vertex.from_loc(loc) for loc in coords]
+        n = len(vs)
+        if n > 1:
+            vs[0].nbrs = vs[1:]
+            # Around each other vertex: the next vertex, the first, and the
+            # previous one, leaving out the first when it is adjacent.
+            for i in range(1, n):
+                nbrs = [vs[(i + 1) % n], vs[0], vs[i - 1]]
+                if i == 1:
+                    del nbrs[2]
+                if i == n - 1:
+                    del nbrs[0]
+                vs[i].nbrs = nbrs
+        g.vertices = vs
+        return g
+
 
 class Vertex:
     """Vertex in an undirected graph of 2D Euclidean points.
@@ -383,21 +884,37 @@ class Vertex:
     however the starting index is arbitrary.
     """
 
-    def __init__(self, x, y):
+    def __init__(self, x, y, dtype=None):
         """Create a vertex with an XY location and empty neighbors list.
 
         Params:
             x (float):
             y (float):
+            dtype (np.dtype): type of the location array, or `None` to infer
+                it from the coordinates
         """
-        self.loc = np.array([x, y])
+        self.loc = np.array([x, y], dtype=dtype)
         self.nbrs: List[Vertex] = []
 
-    def add_neighbor(self, v: Vertex):
+    @classmethod
+    def from_loc(cls, loc) -> Vertex:
+        """Create a vertex whose location is the given array, without copying
+        it.
+
+        Params:
+            loc (np.ndarray): XY location of the vertex
+        """
+        v = cls.__new__(cls)
+        v.loc = loc
+        v.nbrs = []
+        return v
+
+    def add_neighbor(self, v: Vertex, orient: Callable = point.orient):
         """Add another vertex as a neighbor to this one.
 
         Params:
             v (Vertex): Adds the vertex to the list of neighbors in the current vertex
+            orient (Callable): orientation test to use; see `point.orient()`
 
         Returns:
             None
@@ -411,32 +928,32 @@ class Vertex:
         # Search through nbrs to find correct location
         else:
             # Between last and first point - will not appear in adjacent pairs list
-            if point.orient(self.nbrs[-1].loc, v.loc, self.nbrs[0].loc) == 1:
-                if (point.orient(self.nbrs[-2].loc, self.nbrs[-1].loc, v.loc)) == 1:
-                    if (point.orient(v.loc, self.nbrs[0].loc, self.nbrs[1].loc)) == 1:
+            if orient(self.nbrs[-1].loc, v.loc, self.nbrs[0].loc) == 1:
+                if (orient(self.nbrs[-2].loc, self.nbrs[-1].loc, v.loc)) == 1:
+                    if (orient(v.loc, self.nbrs[0].loc, self.nbrs[1].loc)) == 1:
                         self.nbrs.insert(0, v)
                         return
 
             # Iterate through adjacent pairs of verticies
             for v1, v2 in self.nbr_pairs():
                 # If v1, v, v2 is CCW
-                if point.orient(v1.loc, v.loc, v2.loc) == 1:
+                if orient(v1.loc, v.loc, v2.loc) == 1:
                     # Save position of v2 for special case indexing
                     idx = self.nbrs.index(v2)
 
                     # Special Case Indexing if v1 = n-2 and v2 = n-1
                     if idx == size - 1:
-                        if point.orient(self.nbrs[(idx - 2)].loc, v1.loc, v.loc) == 1:
+                        if orient(self.nbrs[(idx - 2)].loc, v1.loc, v.loc) == 1:
                             # if v, v2, v2+ 1 is CCW
-                            if point.orient(v.loc, v2.loc, self.nbrs[0].loc) == 1:
+                            if orient(v.loc, v2.loc, self.nbrs[0].loc) == 1:
                                 self.nbrs.insert(idx, v)
                                 return
 
                     # No special indexing needed
                     else:
-                        if point.orient(self.nbrs[(idx - 2)].loc, v1.loc, v.loc) == 1:
+                        if orient(self.nbrs[(idx - 2)].loc, v1.loc, v.loc) == 1:
                             # if v, v2, v2+ 1 is CCW
-                            if point.orient(v.loc, v2.loc, self.nbrs[(idx + 1)].loc) == 1:
+                            if orient(v.loc, v2.loc, self.nbrs[(idx + 1)].loc) == 1:
                                 self.nbrs.insert(idx, v)
                                 return
 
@@ -475,3 +992,10 @@ class Vertex:
         n = len(self.nbrs)
         for i in range(n):
             yield (self.nbrs[i], self.nbrs[(i+1) % n])
+
+
+def _cross(u, v):
+    """Return the z components of the cross products of two (N, 2) arrays of
+    vectors.
+    """
+    return u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
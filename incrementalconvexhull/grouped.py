@@ -0,0 +1,250 @@
+"""Convex hulls of many groups of points at once.
+
+`grouped_hulls()` computes the hull of every group in a labelled point array
+with array operations over all groups together, instead of building a
+`Graph` per group. It is Andrew's monotone chain algorithm with the stack
+replaced by rounds of parallel deletions:
+
+1. Points are sorted by group, then x, then y, and exact duplicates within a
+   group are dropped.
+2. Points strictly inside the quadrilateral of each group's leftmost,
+   lowest, rightmost and highest points cannot be on its hull, and are
+   dropped (Akl & Toussaint's heuristic).
+3. For the lower chain, every point that does not make a strict left turn
+   with the surviving points before and after it in its group is deleted,
+   in all groups at once, until no group changes. The upper chain is the
+   same on the reversed order. Groups still changing after `max_rounds`
+   rounds are finished with the sequential algorithm.
+
+Each round only looks at groups that changed in the previous one, and most
+points are deleted in the first round, so a few rounds usually suffice.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from .graph import Graph
+
+
+MAX_ROUNDS = 32
+
+
+class GroupedHulls:
+    """Convex hulls of groups of points, stored as offsets into one array of
+    point indices (like the adjacency arrays of `Graph.save()`).
+
+    The hull of the group ``keys[k]`` is ``indices[offsets[k]:offsets[k+1]]``,
+    the indices into `points` of its vertices in ccw order, starting from
+    the lowest of its leftmost points. Hulls are strictly convex: points in
+    the middle of an edge are not vertices, so a group of colinear points
+    has a hull of two vertices, and a group of one distinct point has one.
+    """
+
+    def __init__(self, points, keys, offsets, indices):
+        #: (N, 2) array of all the points
+        self.points = points
+        #: Sorted array of the distinct group keys
+        self.keys = keys
+        #: Start of each group's hull in `indices`, plus the total length
+        self.offsets = offsets
+        #: Point indices of the vertices of all hulls, group after group
+        self.indices = indices
+
+    def __len__(self) -> int:
+        """Return the number of groups."""
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return self._position(key) is not None
+
+    def sizes(self) -> np.ndarray:
+        """Return the number of hull vertices of each group, in the order of
+        `keys`.
+        """
+        return np.diff(self.offsets)
+
+    def hull(self, key) -> np.ndarray:
+        """Return the point indices of the hull vertices of a group, in ccw
+        order.
+
+        Raises:
+            KeyError: There is no group with the key
+        """
+        k = self._position(key)
+        if k is None:
+            raise KeyError(key)
+        return self.indices[self.offsets[k]:self.offsets[k + 1]]
+
+    def coords(self, key) -> np.ndarray:
+        """Return the locations of the hull vertices of a group, in ccw
+        order, as an (N, 2) array.
+
+        Raises:
+            KeyError: There is no group with the key
+        """
+        return self.points[self.hull(key)]
+
+    def graph(self, key) -> Graph:
+        """Return the hull of a group as a triangulated `Graph`; see
+        `Graph.from_convex_polygon()`.
+
+        Raises:
+            KeyError: There is no group with the key
+        """
+        return Graph.from_convex_polygon(self.coords(key))
+
+    def _position(self, key):
+        k = int(np.searchsorted(self.keys, key))
+        if k < len(self.keys) and self.keys[k] == key:
+            return k
+        return None
+
+
+def grouped_hulls(points, groups, max_rounds=MAX_ROUNDS) -> GroupedHulls:
+    """Compute the convex hull of each group of points.
+
+    Params:
+        points (np.ndarray): (N, 2) point locations
+        groups (np.ndarray): N group keys, one per point, of any type that
+            NumPy can sort
+        max_rounds (int): rounds of parallel deletions before the groups
+            that are still changing are finished one at a time
+
+    Returns:
+        The hulls (GroupedHulls)
+
+    Raises:
+        ValueError: The arrays do not have matching shapes
+    """
+    points = np.asarray(points, dtype=float)
+    groups = np.asarray(groups)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"points must have shape (N, 2), not {points.shape}")
+    if groups.shape != (len(points),):
+        raise ValueError(f"expected {len(points)} group keys, not shape "
+                         f"{groups.shape}")
+
+    keys, group = np.unique(groups, return_inverse=True)
+    group = group.reshape(-1)
+    x, y = points[:, 0], points[:, 1]
+
+    order = np.lexsort((y, x, group))
+    g, xs, ys = group[order], x[order], y[order]
+    duplicate = np.zeros(len(order), dtype=bool)
+    duplicate[1:] = (g[1:] == g[:-1]) & (xs[1:] == xs[:-1]) \
+        & (ys[1:] == ys[:-1])
+    order = order[~duplicate]
+
+    order = order[~_inside_quadrilateral(x[order], y[order], group[order])]
+    g, xs, ys = group[order], x[order], y[order]
+
+    lower = _chain(xs, ys, g, max_rounds)
+    upper = _chain(xs[::-1], ys[::-1], g[::-1], max_rounds)[::-1]
+
+    # Walk each group's lower chain forwards and its upper chain backwards,
+    # leaving out the last point of each since it starts the other chain.
+    first = np.ones(len(g), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    last = np.ones(len(g), dtype=bool)
+    last[:-1] = g[1:] != g[:-1]
+    positions = np.arange(len(g))
+    lower_part = np.flatnonzero(lower & (~last | first))
+    upper_part = np.flatnonzero(upper & ~first)
+    part = np.concatenate([np.zeros(len(lower_part), dtype=int),
+                           np.ones(len(upper_part), dtype=int)])
+    chosen = np.concatenate([lower_part, upper_part])
+    step = np.concatenate([positions[lower_part], -positions[upper_part]])
+    chosen = chosen[np.lexsort((step, part, g[chosen]))]
+
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(g[chosen], minlength=len(keys)), out=offsets[1:])
+    return GroupedHulls(points, keys, offsets, order[chosen].astype(np.int64))
+
+
+def _inside_quadrilateral(x, y, g) -> np.ndarray:
+    """Return which points are strictly inside the quadrilateral of the
+    extreme points of their group. Points must be sorted by group, then x,
+    then y.
+    """
+    n = len(g)
+    inside = np.zeros(n, dtype=bool)
+    if n == 0:
+        return inside
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    # Leftmost and rightmost points are the first and last of each group.
+    corners = [starts, _extreme(y, g, starts, np.minimum), ends,
+               _extreme(y, g, starts, np.maximum)]
+    # Group of each point -> position of its group among `starts`
+    which = np.cumsum(np.r_[True, g[1:] != g[:-1]]) - 1
+    inside[:] = True
+    # Corners can coincide; edges between them are left out, and groups
+    # with fewer than three distinct corners have no inside.
+    edges = np.zeros(n, dtype=int)
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        ax, ay = x[a][which], y[a][which]
+        bx, by = x[b][which], y[b][which]
+        empty = (ax == bx) & (ay == by)
+        edges += ~empty
+        inside &= empty | ((bx - ax) * (y - ay) - (by - ay) * (x - ax) > 0)
+    return inside & (edges >= 3)
+
+
+def _extreme(values, g, starts, ufunc) -> np.ndarray:
+    """Return the position of a point of each group with the extreme value,
+    chosen by `ufunc` (`np.minimum` or `np.maximum`).
+    """
+    best = ufunc.reduceat(values, starts)
+    which = np.cumsum(np.r_[True, g[1:] != g[:-1]]) - 1
+    hits = np.flatnonzero(values == best[which])
+    _, first_hit = np.unique(which[hits], return_index=True)
+    return hits[first_hit]
+
+
+def _chain(x, y, g, max_rounds, strict=True) -> np.ndarray:
+    """Return which points are on the lower monotone chain of their group,
+    for points sorted by group and then along the chain.
+
+    A point with neighbors ``a`` before and ``b`` after it is deleted if
+    ``a``, it, ``b`` is not a ccw turn. This only ever deletes points that
+    are not on the chain, so every round can delete all such points at once.
+    Unless `strict`, only cw turns are deleted, so points in the middle of
+    the chain's edges stay on it.
+    """
+    # A point is deleted if the turn is at most this
+    limit = 0 if strict else -1
+    on_chain = np.ones(len(g), dtype=bool)
+    # Positions of the surviving points of the groups that are still
+    # changing
+    live = np.arange(len(g))
+    for _ in range(max_rounds):
+        if len(live) < 3:
+            return on_chain
+        a, p, b = live[:-2], live[1:-1], live[2:]
+        delete = np.zeros(len(live), dtype=bool)
+        delete[1:-1] = (g[a] == g[p]) & (g[p] == g[b]) & (
+            np.sign(_cross(x, y, a, p, b)) <= limit)
+        if not delete.any():
+            return on_chain
+        on_chain[live[delete]] = False
+        if g[live[0]] == g[live[-1]]:
+            live = live[~delete]
+        else:
+            changed = np.unique(g[live[delete]])
+            live = live[~delete & np.isin(g[live], changed)]
+
+    # Finish the groups that are still changing one at a time.
+    starts = np.flatnonzero(np.r_[True, g[live[1:]] != g[live[:-1]]])
+    for segment in np.split(live, starts[1:]):
+        stack = []
+        for i in segment.tolist():
+            while (len(stack) >= 2 and
+                   np.sign(_cross(x, y, stack[-2], stack[-1], i)) <= limit):
+                on_chain[stack.pop()] = False
+            stack.append(i)
+    return on_chain
+
+
+def _cross(x, y, a, p, b):
+    return (x[p] - x[a]) * (y[b] - y[a]) - (y[p] - y[a]) * (x[b] - x[a])
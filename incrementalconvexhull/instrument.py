@@ -0,0 +1,224 @@
+"""Opt-in counters and latency histograms for the methods of a `Graph`.
+
+Use `Graph.enable_stats()` rather than this module directly. Instrumenting a
+graph shadows its methods with timing wrappers on the instance, and its
+`Graph._orient()` with one that counts orientation tests, so nothing changes
+for other graphs, whichever thread they run in.
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import math
+import time
+from typing import Callable, Dict, List
+
+
+# Methods that are timed, and counted when called inside another one.
+METHODS = (
+    'add_vertex',
+    'remove_vertex',
+    'add_edge',
+    'remove_edge',
+    'flip_edge',
+    'flip_between',
+    'hull_contains',
+    'find_convex_nbrs',
+    'get_cross_edges',
+    'can_flip',
+    'index',
+    # JournaledGraph
+    'undo',
+    'redo',
+    'goto',
+)
+
+# Methods that return generators; these are timed while they are iterated.
+GENERATORS = ('get_cross_edges',)
+
+
+class LatencyHistogram:
+    """Histogram of durations with power-of-two microsecond buckets."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Bucket i counts durations of less than 2**i microseconds (and at
+        # least 2**(i-1), for i > 0).
+        self.buckets: Dict[int, int] = collections.Counter()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        micros = seconds * 1e6
+        bucket = 0 if micros < 1 else math.floor(math.log2(micros)) + 1
+        self.buckets[bucket] += 1
+
+    def quantile(self, q) -> float:
+        """Return an upper bound on the `q` quantile, in seconds."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(2 ** bucket / 1e6, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            # Upper bound in microseconds -> count
+            'buckets': {2 ** b: n for b, n in sorted(self.buckets.items())},
+        }
+
+
+class Instrumentation:
+    """Collects statistics for one graph; see `Graph.stats()`.
+
+    Counters are attributed to the outermost instrumented call that was
+    running, so the counters of ``add_vertex`` include the orientation tests,
+    index scans and flips done by the methods it calls. Every method call,
+    nested or not, is recorded in that method's latency histogram.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.hooks: List[Callable] = []
+        #: Counts since the instrumentation was enabled or reset
+        self.counters = collections.Counter()
+        self._calls = collections.Counter()
+        self._operation_counters: Dict[str, collections.Counter] = \
+            collections.defaultdict(collections.Counter)
+        self._latency: Dict[str, LatencyHistogram] = \
+            collections.defaultdict(LatencyHistogram)
+        self._depth = 0
+
+        self._methods = [name for name in METHODS if hasattr(graph, name)]
+        for name in self._methods:
+            method = getattr(graph, name)
+            if name in GENERATORS:
+                wrapper = self._wrap_generator(name, method)
+            else:
+                wrapper = self._wrap(name, method)
+            setattr(graph, name, wrapper)
+        graph._orient = self._wrap_orient(graph._orient)
+
+    def close(self):
+        """Restore the graph's methods."""
+        for name in self._methods:
+            delattr(self.graph, name)
+        self._methods = []
+        del self.graph._orient
+
+    def reset(self):
+        self.counters.clear()
+        self._calls.clear()
+        self._operation_counters.clear()
+        self._latency.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            'counters': dict(self.counters),
+            'operations': {
+                name: {
+                    'calls': self._calls[name],
+                    'counters': dict(self._operation_counters[name]),
+                    'latency': self._latency[name].snapshot(),
+                }
+                for name in self._calls
+            },
+        }
+
+    def _enter(self, name=None):
+        """Start running an instrumented call, counting it if `name` is
+        given. Returns the counters to compute the operation's counts from,
+        if it is the outermost call.
+        """
+        if name is not None:
+            self.counters[name] += 1
+        if self._depth == 0:
+            # Copied after counting the call, so that an operation's counts
+            # do not include itself.
+            before = self.counters.copy()
+        else:
+            before = None
+        self._depth += 1
+        return before
+
+    def _exit(self, before):
+        self._depth -= 1
+        if before is None:
+            return None
+        return self.counters - before
+
+    def _record(self, name, seconds, delta):
+        self._calls[name] += 1
+        self._latency[name].add(seconds)
+        if delta is not None:
+            self._operation_counters[name].update(delta)
+            for hook in list(self.hooks):
+                hook(name, seconds, dict(delta))
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            before = self._enter(name)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                self._record(name, seconds, self._exit(before))
+        return wrapper
+
+    def _wrap_orient(self, orient):
+        @functools.wraps(orient)
+        def wrapper(p1, p2, p3):
+            self.counters['orient'] += 1
+            return orient(p1, p2, p3)
+        return wrapper
+
+    def _wrap_generator(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return self._timed_steps(name, method(*args, **kwargs))
+        return wrapper
+
+    def _timed_steps(self, name, generator):
+        # Only time spent producing items counts, not time the caller spends
+        # between them.
+        seconds = 0.0
+        delta = None
+        outermost = self._depth == 0
+        first = True
+        try:
+            while True:
+                before = self._enter(name if first else None)
+                first = False
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start
+                    step = self._exit(before)
+                    if step is not None:
+                        delta = step if delta is None else delta + step
+                yield item
+        finally:
+            generator.close()
+            if outermost and delta is None:
+                delta = collections.Counter()
+            self._record(name, seconds, delta if outermost else None)
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+from typing import Dict, List, Tuple
+
+from .graph import Graph, Vertex
+
+
+class JournaledGraph(Graph):
+    """Graph that records every mutation so it can be rewound and replayed.
+
+    Each public mutation (`add_vertex()`, `remove_vertex()`, `flip_edge()`,
+    `flip_between()`) is recorded as one journal entry made of primitive
+    steps, each of which knows its own inverse:
+
+    - ``('flip', v1, v2, n1, n2, old, new)``: edge v1-v2 was flipped to
+      n1-n2; flipping n1-n2 back undoes it. `old` and `new` hold the positions
+      of each endpoint in the other's neighbor list, so that neighbor lists
+      are restored exactly rather than merely up to rotation.
+    - ``('insert', v, i, nbrs, positions)``: vertex v was inserted at hull
+      index i, with `positions[k]` being v's index in `nbrs[k].nbrs`.
+    - ``('remove', v, i, nbrs, positions)``: the same record for a removed
+      vertex, so it can be put back exactly where it was.
+
+    A checkpoint of the full graph state is taken once the primitive steps
+    recorded since the last one cost as much as copying the graph, so
+    checkpoints take memory proportional to the journal itself, and jumping
+    to an arbitrary entry with `goto()` costs time proportional to the
+    distance from the nearest checkpoint or the current position, not to the
+    length of the history.
+    """
+
+    def __init__(self, checkpoint_ratio=1.0, dtype=None, quantize=False):
+        """Construct a journaled graph with no vertices.
+
+        Params:
+            checkpoint_ratio (float): multiple of the cost of a checkpoint
+                that the steps since the last one must reach before the next
+                is taken; smaller ratios trade memory for faster `goto()`
+            dtype, quantize: see `Graph.__init__()`
+        """
+        super().__init__(dtype=dtype, quantize=quantize)
+        self.checkpoint_ratio = checkpoint_ratio
+        self.position = 0
+        self._entries: List[List[tuple]] = []
+        # Number of primitive steps before each entry; used to estimate the
+        # cost of moving between two positions.
+        self._step_counts: List[int] = [0]
+        self._checkpoints: List[int] = []
+        self._checkpoint_states: Dict[int, tuple] = {}
+        self._pending: List[tuple] = None
+        self._depth = 0
+        self._take_checkpoint()
+
+    @property
+    def history_length(self) -> int:
+        """Number of entries in the journal, including undone ones."""
+        return len(self._entries)
+
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    def can_redo(self) -> bool:
+        return self.position < len(self._entries)
+
+    ###########################################################################
+    # RECORDING
+
+    @contextlib.contextmanager
+    def operation(self):
+        """Group all mutations made inside the context into a single journal
+        entry.
+        """
+        if self._depth == 0:
+            self._pending = []
+        self._depth += 1
+        try:
+            with self.batch():
+                yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                steps, self._pending = self._pending, None
+                if steps:
+                    self._commit(steps)
+
+    def _commit(self, steps):
+        # Recording a new operation discards everything that was undone.
+        del self._entries[self.position:]
+        del self._step_counts[self.position + 1:]
+        while self._checkpoints and self._checkpoints[-1] > self.position:
+            del self._checkpoint_states[self._checkpoints.pop()]
+
+        self._entries.append(steps)
+        self._step_counts.append(self._step_counts[-1] + len(steps))
+        self.position += 1
+        steps = self._step_counts[-1] - self._step_counts[self._checkpoints[-1]]
+        if steps >= self.checkpoint_ratio * self._checkpoint_cost():
+            self._take_checkpoint()
+
+    def merge_entries(self, start: int):
+        """Merge the entries recorded since a position into a single entry,
+        so that they are undone and redone at once; e.g. for a user action
+        whose operations are applied over several frames. Like recording a
+        new operation, merging several entries discards any that were undone.
+
+        Params:
+            start (int): position before the first entry to merge, at most
+                `position`
+
+        Returns:
+            None
+        """
+        if not 0 <= start <= self.position:
+            raise ValueError('journal position out of range')
+        if self.position - start < 2:
+            return
+        steps = [step for entry in self._entries[start:self.position]
+                 for step in entry]
+        self.position = start
+        self._commit(steps)
+
+    def add_vertex(self, x, y):
+        with self.operation():
+            z = super().add_vertex(x, y)
+            if z is not None:
+                self._pending.append(('insert',) + _vertex_record(self, z))
+        return z
+
+    def remove_vertex(self, v1: Vertex):
+        with self.operation():
+            record = _vertex_record(self, v1)
+            super().remove_vertex(v1)
+            self._pending.append(('remove',) + record)
+
+    def flip_edge(self, v1: Vertex, v2: Vertex):
+        with self.operation():
+            self.check_can_flip(v1, v2)
+            n1 = v1.get_next_nbr(v2)
+            n2 = v2.get_next_nbr(v1)
+            old = (v1.nbrs.index(v2), v2.nbrs.index(v1))
+            super().flip_edge(v1, v2)
+            new = (n1.nbrs.index(n2), n2.nbrs.index(n1))
+            self._pending.append(('flip', v1, v2, n1, n2, old, new))
+
+    def flip_between(self, a: Vertex, b: Vertex):
+        with self.operation():
+            super().flip_between(a, b)
+
+    ###########################################################################
+    # REWINDING
+
+    def undo(self) -> bool:
+        """Undo the most recent entry. Returns False if there is nothing to
+        undo.
+        """
+        if not self.can_undo():
+            return False
+        self.position -= 1
+        with self.batch():
+            for step in reversed(self._entries[self.position]):
+                self._apply(step, inverse=True)
+        return True
+
+    def redo(self) -> bool:
+        """Redo the most recently undone entry. Returns False if there is
+        nothing to redo.
+        """
+        if not self.can_redo():
+            return False
+        with self.batch():
+            for step in self._entries[self.position]:
+                self._apply(step, inverse=False)
+        self.position += 1
+        return True
+
+    def goto(self, n: int):
+        """Rewind or replay the journal so that exactly the first `n` entries
+        are applied.
+
+        Params:
+            n (int): target position, between 0 and `history_length`
+
+        Returns:
+            None
+        """
+        if not 0 <= n <= len(self._entries):
+            raise IndexError('journal position out of range')
+
+        best_cost = self._distance(self.position, n)
+        best_checkpoint = None
+        i = bisect.bisect_right(self._checkpoints, n)
+        for c in self._checkpoints[max(i - 1, 0):i + 1]:
+            cost = (self._checkpoint_states[c][2]
+                    + self._distance(c, n))
+            if cost < best_cost:
+                best_cost, best_checkpoint = cost, c
+        with self.batch():
+            if best_checkpoint is not None:
+                self._restore_checkpoint(best_checkpoint)
+            while self.position > n:
+                self.undo()
+            while self.position < n:
+                self.redo()
+
+    def _distance(self, i, j):
+        return abs(self._step_counts[j] - self._step_counts[i])
+
+    def _apply(self, step, inverse):
+        kind = step[0]
+        if kind == 'flip':
+            _, v1, v2, n1, n2, old, new = step
+            if inverse:
+                _replace_edge((n1, n2), new, (v1, v2), old)
+                self._emit('flip_edge', ((n1, n2), (v1, v2)))
+            else:
+                _replace_edge((v1, v2), old, (n1, n2), new)
+                self._emit('flip_edge', ((v1, v2), (n1, n2)))
+        elif (kind == 'insert') != inverse:
+            _insert_vertex(self, *step[1:])
+            self._emit_vertex_added(step[1])
+        else:
+            _delete_vertex(self, *step[1:])
+            self._emit('remove_vertex', step[1])
+
+    def _emit_vertex_added(self, v: Vertex):
+        self._emit('add_vertex', v)
+        for n in v.nbrs:
+            self._emit('add_edge', (v, n))
+
+    ###########################################################################
+    # CHECKPOINTS
+
+    def _checkpoint_cost(self) -> int:
+        """Return the cost of checkpointing the graph, without looking at
+        every vertex.
+        """
+        n = len(self.vertices)
+        # A triangulated convex polygon has 2n - 3 edges, each of which is in
+        # two neighbor lists.
+        return n + 2 * max(2 * n - 3, 0)
+
+    def _take_checkpoint(self):
+        nbrs = [(v, list(v.nbrs)) for v in self.vertices]
+        cost = len(self.vertices) + sum(len(n) for _, n in nbrs)
+        self._checkpoints.append(self.position)
+        self._checkpoint_states[self.position] = (list(self.vertices), nbrs,
+                                                  cost)
+
+    def _restore_checkpoint(self, position):
+        vertices, nbrs, _ = self._checkpoint_states[position]
+        for v in self.vertices:
+            self._emit('remove_vertex', v)
+        self.vertices = list(vertices)
+        for v, n in nbrs:
+            v.nbrs = list(n)
+        visited = set()
+        for v in self.vertices:
+            self._emit('add_vertex', v)
+            visited.add(v)
+            for n in v.nbrs:
+                if n in visited:
+                    self._emit('add_edge', (v, n))
+        self.position = position
+
+
+def _vertex_record(g: Graph, v: Vertex) -> Tuple[Vertex, int, list, list]:
+    """Return the information needed to put `v` back exactly where it is."""
+    nbrs = list(v.nbrs)
+    return (v, g.index(v), nbrs, [n.nbrs.index(v) for n in nbrs])
+
+
+def _insert_vertex(g: Graph, v: Vertex, index, nbrs, positions):
+    g.vertices.insert(index, v)
+    v.nbrs = list(nbrs)
+    for n, pos in zip(nbrs, positions):
+        n.nbrs.insert(pos, v)
+
+
+def _delete_vertex(g: Graph, v: Vertex, index, nbrs, positions):
+    for n, pos in zip(nbrs, positions):
+        del n.nbrs[pos]
+    del g.vertices[index]
+
+
+def _replace_edge(removed, removed_positions, added, added_positions):
+    v1, v2 = removed
+    del v1.nbrs[removed_positions[0]]
+    del v2.nbrs[removed_positions[1]]
+    n1, n2 = added
+    n1.nbrs.insert(added_positions[0], n2)
+    n2.nbrs.insert(added_positions[1], n1)
@@ -0,0 +1,196 @@
+"""Convex layers (onion peeling) of a set of points.
+
+The first layer is every point on the boundary of the convex hull, the
+second every point on the boundary of the hull of the rest, and so on, so a
+point's layer number is its depth in the set. `convex_layers()` sorts the
+points once and peels one layer per step, finding the upper and lower chains
+of the remaining points with the parallel monotone chain of `grouped`,
+keeping points in the middle of edges.
+
+Most points are deep inside the set, so the points strictly inside a slightly
+shrunken octagon of the extreme points (the core) are set aside, and only
+the others (the shell) are peeled. That is right for as long as the hull of
+the shell contains the octagon; once a layer does not, the remaining points
+are split again. A step costs a few array operations over the shell, instead
+of a `Graph` built from the remaining points one at a time.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from . import grouped
+from .graph import Graph
+
+
+# Size of the octagon whose inside is set aside while peeling, relative to
+# the octagon of extreme points. Smaller cores take longer to reach, but
+# larger ones are reached sooner and split again more often.
+CORE_SCALE = 0.95
+
+
+class ConvexLayers:
+    """Convex layers of a set of points, stored as offsets into one array of
+    point indices (like `grouped.GroupedHulls`).
+
+    The points of layer ``k`` are ``indices[offsets[k]:offsets[k+1]]``, in
+    ascending order. Layer 0 is the outermost.
+    """
+
+    def __init__(self, points, layers, offsets, indices):
+        #: (N, 2) array of all the points
+        self.points = points
+        #: Layer number of each point
+        self.layers = layers
+        #: Start of each layer in `indices`, plus the total length
+        self.offsets = offsets
+        #: Point indices of all layers, layer after layer
+        self.indices = indices
+
+    def __len__(self) -> int:
+        """Return the number of layers."""
+        return len(self.offsets) - 1
+
+    def sizes(self) -> np.ndarray:
+        """Return the number of points in each layer."""
+        return np.diff(self.offsets)
+
+    def layer(self, k) -> np.ndarray:
+        """Return the indices of the points in layer `k`.
+
+        Raises:
+            IndexError: There is no layer `k`
+        """
+        if not 0 <= k < len(self):
+            raise IndexError(f"layer {k} out of range")
+        return self.indices[self.offsets[k]:self.offsets[k + 1]]
+
+    def graph(self, k) -> Graph:
+        """Return layer `k` as a triangulated `Graph` of the vertices of its
+        hull.
+
+        Points of the layer in the middle of an edge of the hull, and
+        repeated points, are left out, since the vertices of a `Graph` must
+        be in strictly convex position.
+
+        Raises:
+            IndexError: There is no layer `k`
+        """
+        points = self.points[self.layer(k)]
+        hulls = grouped.grouped_hulls(points, np.zeros(len(points), dtype=int))
+        return Graph.from_convex_polygon(hulls.coords(0))
+
+
+def convex_layers(points, max_rounds=grouped.MAX_ROUNDS) -> ConvexLayers:
+    """Compute the convex layers of a set of points.
+
+    Params:
+        points (np.ndarray): (N, 2) point locations
+        max_rounds (int): see `grouped.grouped_hulls()`
+
+    Returns:
+        The layers (ConvexLayers)
+
+    Raises:
+        ValueError: The points do not have shape (N, 2)
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"points must have shape (N, 2), not {points.shape}")
+    # Repeated points would never make a cw turn with each other, so only
+    # distinct points are peeled; they come sorted by x and then y.
+    unique, inverse = np.unique(points, axis=0, return_inverse=True)
+    x, y = unique[:, 0], unique[:, 1]
+
+    layers = np.full(len(unique), -1, dtype=np.int64)
+    alive = np.ones(len(unique), dtype=bool)
+    # Sorted indices of the remaining distinct points that are peeled next,
+    # and of those strictly inside `octagon`, which are left alone while the
+    # hull of the others contains it.
+    shell = core = octagon = None
+    k = 0
+    while True:
+        fresh = shell is None
+        if fresh:
+            remaining = np.flatnonzero(alive)
+            if not len(remaining):
+                break
+            inside, octagon = _inside_octagon(x[remaining], y[remaining],
+                                              CORE_SCALE)
+            shell, core = remaining[~inside], remaining[inside]
+
+        xs, ys = x[shell], y[shell]
+        group = np.zeros(len(shell), dtype=np.int64)
+        lower = grouped._chain(xs, ys, group, max_rounds, strict=False)
+        upper = grouped._chain(xs[::-1], ys[::-1], group, max_rounds,
+                               strict=False)[::-1]
+        # The shell's hull contains the octagon when it is split off, so
+        # the check can only fail later.
+        if not fresh and len(core) and not _contains(
+                _polygon(xs, ys, lower, upper), octagon):
+            # Some of the core may be on this layer; sort it out again.
+            shell = None
+            continue
+
+        on_hull = lower | upper
+        layers[shell[on_hull]] = k
+        alive[shell[on_hull]] = False
+        shell = shell[~on_hull]
+        k += 1
+        if not len(shell) and not len(core):
+            break
+
+    layers = layers[inverse.reshape(-1)]
+    indices = np.argsort(layers, kind='stable')
+    offsets = np.zeros(k + 1, dtype=np.int64)
+    np.cumsum(np.bincount(layers, minlength=k), out=offsets[1:])
+    return ConvexLayers(points, layers, offsets, indices.astype(np.int64))
+
+
+def _inside_octagon(x, y, scale):
+    """Return which points are strictly inside the octagon of the extreme
+    points in the directions of the axes and diagonals, scaled by `scale`
+    about its center, and the (8, 2) corners of the scaled octagon, for
+    points sorted by x and then y.
+    """
+    plus, minus = x + y, x - y
+    # In ccw order, starting from the leftmost point
+    corners = [0, np.argmin(plus), np.argmin(y), np.argmax(minus),
+               len(x) - 1, np.argmax(plus), np.argmax(y), np.argmin(minus)]
+    octagon = np.stack([x[corners], y[corners]], axis=1)
+    octagon = octagon.mean(axis=0) * (1 - scale) + octagon * scale
+    inside = np.ones(len(x), dtype=bool)
+    edges = 0
+    for (ax, ay), (bx, by) in zip(octagon, np.roll(octagon, -1, axis=0)):
+        if ax == bx and ay == by:
+            continue
+        edges += 1
+        inside &= (bx - ax) * (y - ay) - (by - ay) * (x - ax) > 0
+    if edges < 3:
+        inside[:] = False
+    return inside, octagon
+
+
+def _polygon(x, y, lower, upper) -> np.ndarray:
+    """Return the (N, 2) ccw boundary of the hull of points sorted by x and
+    then y, given which are on its lower and upper chains.
+    """
+    lower = np.flatnonzero(lower)
+    upper = np.flatnonzero(upper)[::-1]
+    order = np.concatenate([lower[:-1], upper[:-1]])
+    if not len(order):
+        order = lower
+    return np.stack([x[order], y[order]], axis=1)
+
+
+def _contains(polygon, points) -> bool:
+    """Return whether a convex polygon contains all the points, including
+    those on its boundary. Polygons of fewer than three vertices contain
+    nothing.
+    """
+    if len(polygon) < 3:
+        return False
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    rel = points[:, None, :] - polygon[None, :, :]
+    return bool(np.all(edges[None, :, 0] * rel[:, :, 1]
+                       - edges[None, :, 1] * rel[:, :, 0] >= 0))
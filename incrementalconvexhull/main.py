@@ -1,19 +1,34 @@
-from collections.abc import Iterable
 import base64
+import collections
 import math
 import numpy as np
-import pyglet
 import re
 import textwrap
-
-from .graph import Graph, Vertex
+import time
+
+try:
+    import pyglet
+except ImportError as e:
+    raise ImportError(
+        "the visualizer needs pyglet; install it with "
+        "`pip install incremental-convex-hull[gui]`"
+    ) from e
+
+from .camera import Camera
+from .graph import Vertex
+from .journal import JournaledGraph
 from .point import dist
+from .preview import TangentCache
+from .renderer import GraphRenderer
+from .spatial import SpatialIndex
 
 
 WIDTH = 960
 HEIGHT = 720
 FPS = 60
 DEFAULT_ANIMATION_DURATION = 0.5
+# Seconds per frame spent applying operations in turbo mode
+TURBO_FRAME_BUDGET = 0.5 / FPS
 
 
 VERT_COLOR = (127, 127, 127)
@@ -24,6 +39,7 @@ FLIPPABLE_EDGE_COLOR = (63, 63, 255)
 GHOST_EDGE_COLOR = (47, 47, 47)
 CROSS_EDGE_COLOR = (127, 47, 47)
 WARNING_TEXT_COLOR = (255, 0, 127, 255)
+STATS_TEXT_COLOR = (127, 127, 127, 255)
 
 VERT_RADIUS = 3.0
 HOVERED_VERT_RADIUS = 4.0
@@ -35,6 +51,9 @@ GHOST_EDGE_RADIUS = 1.0
 VERTEX_HOVER_RADIUS = 15.0
 EDGE_HOVER_RADIUS = 10.0
 
+ZOOM_STEP = 1.25
+FIT_MARGIN = 40.0
+
 
 class VisualizationWindow(pyglet.window.Window):
     def __init__(self):
@@ -74,18 +93,70 @@ class VisualizationWindow(pyglet.window.Window):
         )
 
         # Visualization state
-        self.graph = Graph()
+        self.graph = JournaledGraph()
         self.animation_multiplier = 1
+        self.camera = Camera(self.width, self.height)
+        self.lod = True
+        # Last mouse position in window pixels, and the world position under it
+        self.mouse_screen_pos = np.array([0.0, 0.0])
         self.mouse_pos = np.array([0.0, 0.0])
         self.hover_target = None
 
         # Animation state
         self.animation_progress = 0.0
-        self.animation_queue = []
-        self.replay_lines = []
+        self.animation_queue = collections.deque()
+        # Number of times each edge (as a frozenset) is queued to be flipped
+        self.queued_flips = collections.Counter()
+        # Journal position before the queued action, whose flips are merged
+        # into one entry with it so that it is undone at once
+        self.action_start = 0
+        self.replay_lines = collections.deque()
+        self.replay_total = 0
+        self.replay_done = 0
+        self.turbo = False
         self.warning_text_countdown = 0.0
 
-        pyglet.clock.schedule_interval(self.step_animation, 1/FPS)
+        # Grids of vertices and edges for hover picking and culling, with
+        # cells sized to the graph rather than to the zoom level
+        self.spatial_index = SpatialIndex(self.graph)
+
+        # Edges on the hull (as frozensets), or `None` if they need to be
+        # recomputed. This subscriber must run before the renderer's, which
+        # asks for the flippability of edges while handling the same events.
+        self.hull_edges = None
+        self.graph.subscribe(self.forget_hull_edges)
+        self.tangents = TangentCache(self.graph)
+
+        # Persistent draw lists, patched as the graph changes
+        self.renderer = GraphRenderer(
+            self.graph, self.vertex_style, self.edge_style,
+            index=self.spatial_index,
+        )
+        self.graph.subscribe(self.on_graph_change)
+        self.update_view()
+
+        # Redraw scheduling: the window is only redrawn when something visible
+        # changed, and the animation clock only runs while there is something
+        # to animate.
+        self.animating = False
+        self.ghost_edges_dirty = True
+        self.frame_stats = FrameStats()
+        self.stats_label = pyglet.text.Label(
+            "",
+            x=10,
+            y=10,
+            anchor_x='left',
+            anchor_y='bottom',
+            color=STATS_TEXT_COLOR,
+        )
+        self.progress_label = pyglet.text.Label(
+            "",
+            x=self.width - 10,
+            y=10,
+            anchor_x='right',
+            anchor_y='bottom',
+        )
+        pyglet.clock.schedule_interval(self.update_stats_text, 1.0)
 
     ###########################################################################
     # INPUT
@@ -95,20 +166,59 @@ class VisualizationWindow(pyglet.window.Window):
             self.animation_multiplier *= 5 ** (1/4)
         if symbol == pyglet.window.key.S and self.animation_multiplier > 1/4:
             self.animation_multiplier /= 5 ** (1/4)
+        if symbol == pyglet.window.key.U and not self.animation_queue:
+            self.graph.undo()
+            self.update_nearest_thing()
+        if symbol == pyglet.window.key.R and not self.animation_queue:
+            self.graph.redo()
+            self.update_nearest_thing()
+        if symbol == pyglet.window.key.Z and self.graph.vertices:
+            points = np.array([v.loc for v in self.graph.vertices], dtype=float)
+            self.camera.fit(points.min(axis=0), points.max(axis=0), FIT_MARGIN)
+            self.update_view()
+        if symbol == pyglet.window.key.L:
+            self.lod = not self.lod
+            self.update_view()
+        if symbol == pyglet.window.key.T:
+            self.turbo = not self.turbo
+            self.start_animating()
+        self.invalidate()
 
     def on_mouse_motion(self, x, y, dx, dy):
         self.update_nearest_thing(x, y)
 
-    def on_mouse_drag(self, x, y, *args, **kwargs):
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        if buttons & (pyglet.window.mouse.RIGHT | pyglet.window.mouse.MIDDLE):
+            self.camera.pan(dx, dy)
+            self.update_view()
         self.update_nearest_thing(x, y)
 
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        self.camera.zoom(ZOOM_STEP ** scroll_y, x, y)
+        self.update_view()
+
+    def on_resize(self, width, height):
+        super().on_resize(width, height)
+        # Some platforms resize the window before __init__() has finished.
+        if hasattr(self, 'renderer'):
+            self.camera.resize(width, height)
+            self.progress_label.x = width - 10
+            self.update_view()
+
+    def update_view(self):
+        """Update everything that depends on the camera."""
+        lo, hi = self.camera.bounds()
+        self.renderer.set_view(lo, hi, self.camera.scale, lod=self.lod)
+        # The world position under the mouse moved.
+        self.update_nearest_thing(*self.mouse_screen_pos)
+
     def on_mouse_press(self, x, y, button, modifiers):
         if button != pyglet.window.mouse.LEFT:
             return
         if self.animation_queue:
             return
         if isinstance(self.hover_target, tuple):
-            if self.graph.can_flip(*self.hover_target):
+            if self.can_flip(self.hover_target):
                 self.enqueue_anim('flip', self.hover_target)
         if isinstance(self.hover_target, Vertex):
             self.enqueue_anim('remove', self.hover_target)
@@ -119,41 +229,75 @@ class VisualizationWindow(pyglet.window.Window):
     def on_file_drop(self, x, y, paths):
         for path in paths:
             with open(path) as f:
-                self.replay_lines += list(f)
+                lines = list(f)
+            self.replay_lines.extend(lines)
+            self.replay_total += len(lines)
+        self.start_animating()
 
     def update_nearest_thing(self, x=None, y=None):
         if x is not None and y is not None:
-            self.mouse_pos = np.array([float(x), float(y)])
+            self.mouse_screen_pos = np.array([float(x), float(y)])
+            self.mouse_pos = self.camera.to_world(x, y)
+            self.ghost_edges_dirty = True
+            self.invalidate()
 
         if self.animation_queue:
-            self.hover_target = None
+            self.set_hover_target(None)
             return
 
-        nearest_vertex = None
-        if self.graph.vertices:
-            nearest_vertex = min(
-                self.graph.vertices,
-                key=lambda v: dist(self.mouse_pos, v.loc),
-            )
-            if dist(self.mouse_pos, nearest_vertex.loc) > VERTEX_HOVER_RADIUS:
-                nearest_vertex = None
-
-        nearest_edge = None
-        nearest_edge_dist = EDGE_HOVER_RADIUS
-        for (a, b) in self.graph.edges():
-            edge_dist = dist_point_to_line_segment(
-                a.loc, b.loc, self.mouse_pos,
-            )
-            if edge_dist is not None and edge_dist < nearest_edge_dist:
-                nearest_edge = (a, b)
-                nearest_edge_dist = edge_dist
-
-        self.hover_target = nearest_vertex or nearest_edge
+        # Hover radii are in pixels.
+        nearest_vertex = self.spatial_index.nearest_vertex(
+            self.mouse_pos, VERTEX_HOVER_RADIUS / self.camera.scale,
+        )
+        nearest_edge = self.spatial_index.nearest_edge(
+            self.mouse_pos, EDGE_HOVER_RADIUS / self.camera.scale,
+        )
+        self.set_hover_target(nearest_vertex or nearest_edge)
+
+    def set_hover_target(self, target):
+        old_target = self.hover_target
+        self.hover_target = target
+        if target != old_target:
+            self.refresh_style(old_target)
+            self.refresh_style(target)
+            self.ghost_edges_dirty = True
+            self.invalidate()
+
+    def on_graph_change(self, events):
+        self.ghost_edges_dirty = True
+        self.invalidate()
+        # Flippability of highlighted edges may have changed.
+        if isinstance(self.hover_target, tuple):
+            self.renderer.refresh_edge(self.hover_target)
+        # Flips never move the hull, so queued edges only need restyling
+        # when vertices were added or removed.
+        if any(kind in ('add_vertex', 'remove_vertex') for kind, _ in events):
+            for key in self.queued_flips:
+                self.renderer.refresh_edge(tuple(key))
+
+    def forget_hull_edges(self, events):
+        if any(kind in ('add_vertex', 'remove_vertex') for kind, _ in events):
+            self.hull_edges = None
+
+    def can_flip(self, e):
+        """Return whether an edge that is in the graph can be flipped; like
+        `Graph.can_flip()`, but O(1) while the hull is unchanged.
+        """
+        if self.hull_edges is None:
+            vertices = self.graph.vertices
+            self.hull_edges = {frozenset(pair) for pair
+                               in zip(vertices, vertices[1:] + vertices[:1])}
+        return frozenset(e) not in self.hull_edges
 
     ###########################################################################
     # RENDERING
 
+    def invalidate(self):
+        """Request a redraw on the next iteration of the event loop."""
+        self.invalid = True
+
     def on_draw(self):
+        frame_start = time.perf_counter()
         self.clear()
 
         # Update and draw text
@@ -161,153 +305,150 @@ class VisualizationWindow(pyglet.window.Window):
         self.instructions_label.draw()
         if self.warning_text_countdown > 0.0:
             self.colinear_warning_label.draw()
-
-        # Initialize draw lists
-        self.vertex_coords = []
-        self.vertex_colors = []
-        self.draw_indices = []
-
-        # Draw order (lowest to highest):
-        # - "ghost" edges
-        # - graph edges
-        # - graph vertices
-
-        # Draw ghost edges
-        if self.animation_queue:
-            for action, loc in self.animation_queue:
-                if action == 'add':
-                    self.draw_ghost_edges(loc)
-                    break
-                if action == 'remove':
-                    break
-        elif self.hover_target is None:
-            self.draw_ghost_edges(self.mouse_pos)
-
-        # Draw edges in the graph
-        for e in self.graph.edges():
-            if e == self.hover_target or self.is_flip_queued(e):
-                radius = HOVERED_EDGE_RADIUS
-                if self.graph.can_flip(*e):
-                    color = FLIPPABLE_EDGE_COLOR
-                else:
-                    color = HOVERED_EDGE_COLOR
-            else:
-                radius = EDGE_RADIUS
-                color = EDGE_COLOR
-            if self.is_next_flip_queued(e):
-                self.draw_graph_edge_flip_animation(*e, radius, color)
-            else:
-                v1, v2 = e
-                self.draw_graph_edge(v1.loc, v2.loc, radius, color)
-
-        # Draw vertices in the graph
-        for v in self.graph.vertices:
-            self.draw_graph_vertex(
-                v,
-                radius=HOVERED_VERT_RADIUS if v is self.hover_target else VERT_RADIUS,
-                color=HOVERED_VERT_COLOR if v is self.hover_target else VERT_COLOR,
-            )
-
-        pyglet.graphics.draw_indexed(
-            self.num_verts(),
-            pyglet.gl.GL_TRIANGLES,
-            self.draw_indices,
-            ('v2f', self.vertex_coords),
-            ('c3B', self.vertex_colors),
-        )
+        self.stats_label.draw()
+        self.update_progress_text()
+        self.progress_label.draw()
+
+        # Everything else is already in the renderer's draw lists; only the
+        # ghost edges and the edge being flipped need updating here.
+        if self.ghost_edges_dirty:
+            self.update_ghost_edges()
+            self.ghost_edges_dirty = False
+        self.update_flip_animation()
+        tx, ty, scale = self.camera.transform()
+        pyglet.gl.glPushMatrix()
+        pyglet.gl.glTranslatef(tx, ty, 0.0)
+        pyglet.gl.glScalef(scale, scale, 1.0)
+        self.renderer.draw()
+        pyglet.gl.glPopMatrix()
+
+        self.invalid = False
+        self.frame_stats.record_frame(time.perf_counter() - frame_start)
+
+    def update_stats_text(self, dt):
+        self.stats_label.text = self.frame_stats.report()
+
+    def update_progress_text(self):
+        if not self.replay_lines and not self.animation_queue:
+            # Replay finished
+            self.replay_total = self.replay_done = 0
+        if self.replay_total:
+            text = (f"Replaying {self.replay_done}/{self.replay_total} lines "
+                    f"({100 * self.replay_done / self.replay_total:.0f}%)")
+            if self.turbo:
+                text += " [turbo]"
+        else:
+            text = ""
+        if text != self.progress_label.text:
+            self.progress_label.text = text
 
     def update_instructions_text(self):
-        self.instructions_label.text = textwrap.dedent(f"""\
+        text = textwrap.dedent(f"""\
         Click outside the graph to add a new vertex.
         Click near an edge to flip it.
         Click on a vertex to remove it.
 
-        Cursor: ({int(self.mouse_pos[0])}, {int(self.mouse_pos[1])})
+        Cursor: ({self.mouse_pos[0]:.6g}, {self.mouse_pos[1]:.6g})
+        Zoom: {self.camera.scale:.3g}x{' (LOD)' if self.lod else ''}
 
         Animation multiplier: {self.animation_multiplier:.2f}
         [f] faster
         [s] slower
+        [u] undo
+        [r] redo
+        [scroll] zoom, [right drag] pan
+        [z] zoom to fit
+        [l] toggle level of detail
+        [t] toggle turbo replay{' (on)' if self.turbo else ''}
         """)
+        # Laying out text is expensive, so only do it when it changed.
+        if text != self.instructions_label.text:
+            self.instructions_label.text = text
+
+    def vertex_style(self, v):
+        """Return the radius and color to draw a vertex with."""
+        if v is self.hover_target:
+            return HOVERED_VERT_RADIUS, HOVERED_VERT_COLOR
+        return VERT_RADIUS, VERT_COLOR
+
+    def edge_style(self, e):
+        """Return the radius and color to draw an edge with."""
+        if self.is_hovered_edge(e) or self.is_flip_queued(e):
+            if self.can_flip(e):
+                return HOVERED_EDGE_RADIUS, FLIPPABLE_EDGE_COLOR
+            return HOVERED_EDGE_RADIUS, HOVERED_EDGE_COLOR
+        return EDGE_RADIUS, EDGE_COLOR
+
+    def refresh_style(self, target):
+        """Update the draw lists after the style of a hover target changed."""
+        if isinstance(target, Vertex):
+            self.renderer.refresh_vertex(target)
+        elif isinstance(target, tuple):
+            self.renderer.refresh_edge(target)
+
+    def is_hovered_edge(self, e):
+        if not isinstance(self.hover_target, tuple):
+            return False
+        v1, v2 = e
+        return self.hover_target in ((v1, v2), (v2, v1))
 
-    def draw_graph_vertex(self, v, radius, color):
-        """Add a graph vertex to the draw list."""
-        x, y = v.loc
-        x1, x2 = x - radius, x + radius
-        y1, y2 = y - radius, y + radius
-        coords = [(x1, y1), (x2, y1), (x1, y2), (x2, y2)]
-        self.draw_quad(coords, color)
-
-    def draw_graph_edge_flip_animation(self, v1, v2, radius, color):
+    def update_flip_animation(self):
+        if not self.animation_queue:
+            return
+        action, loc = self.animation_queue[0]
+        if action != 'flip':
+            return
+        v1, v2 = loc
         n1 = v1.get_next_nbr(v2).loc
         n2 = v2.get_next_nbr(v1).loc
-        v1 = v1.loc
-        v2 = v2.loc
+        a = v1.loc
+        b = v2.loc
 
         # Swap points if it will make the animation cover less distance.
-        if dist(v1, n1) + dist(v2, n2) > dist(v1, n2) + dist(v2, n1):
+        if dist(a, n1) + dist(b, n2) > dist(a, n2) + dist(b, n1):
             n1, n2 = n2, n1
 
         # Interpolate between the old vertices and the new ones.
-        p1 = interpolate(v1, n1, self.animation_progress)
-        p2 = interpolate(v2, n2, self.animation_progress)
-        self.draw_graph_edge(p1, p2, radius, color)
+        p1 = interpolate(a, n1, self.animation_progress)
+        p2 = interpolate(b, n2, self.animation_progress)
+        self.renderer.move_edge(loc, p1, p2)
 
-    def draw_ghost_edges(self, new_pos):
+    def update_ghost_edges(self):
+        ghost_edges = []
+        if self.animation_queue:
+            for action, loc in self.animation_queue:
+                if action == 'add':
+                    ghost_edges = self.ghost_edges(loc)
+                    break
+                if action == 'remove':
+                    break
+        elif self.hover_target is None:
+            ghost_edges = self.ghost_edges(self.mouse_pos)
+        self.renderer.set_ghost_edges(ghost_edges)
+
+    def ghost_edges(self, new_pos):
+        """Return the edges that adding a vertex at `new_pos` would create and
+        the edge between the vertices it would connect to.
+        """
         try:
-            v1, v2 = self.graph.find_convex_nbrs(Vertex(*new_pos))
-            if v1 is not None and v2 is not None:
-                radius = GHOST_EDGE_RADIUS
-                color = GHOST_EDGE_COLOR
-                self.draw_graph_edge(new_pos, v1.loc, radius, color)
-                self.draw_graph_edge(new_pos, v2.loc, radius, color)
-                color = CROSS_EDGE_COLOR
-                self.draw_graph_edge(v1.loc, v2.loc, radius, color)
+            v1, v2 = self.tangents.find_convex_nbrs(new_pos)
         except ValueError:
-            pass  # ok if it fails
-
-    def draw_graph_edge(self, a, b, radius, color):
-        """Add a graph edge to the draw list."""
-        fwd = b - a
-        fwd *= np.true_divide(radius, np.linalg.norm(fwd))
-        left = np.array([-fwd[1], fwd[0]])  # rotate `fwd` counterclockwise 90
-        right = -left
-        back = -fwd
-        coords = [
-            a + back + left,
-            a + back + right,
-            b + fwd + left,
-            b + fwd + right,
+            return []  # ok if it fails
+        if v1 is None or v2 is None:
+            return []
+        return [
+            (new_pos, v1.loc, GHOST_EDGE_RADIUS, GHOST_EDGE_COLOR),
+            (new_pos, v2.loc, GHOST_EDGE_RADIUS, GHOST_EDGE_COLOR),
+            (v1.loc, v2.loc, GHOST_EDGE_RADIUS, CROSS_EDGE_COLOR),
         ]
-        self.draw_quad(coords, color)
-
-    def draw_quad(self, quad_verts, color):
-        """Add an arbitrary quadrilateral to the draw list."""
-        assert len(quad_verts) == 4
-        base = self.num_verts()
-        self.vertex_coords += list(flatten(quad_verts))
-        self.vertex_colors += list(color) * 4
-        self.draw_indices += [base + i for i in [0, 1, 2, 3, 2, 1]]
-
-    def num_verts(self):
-        return len(self.vertex_coords) // 2
 
     def is_flip_queued(self, e):
-        v1, v2 = e
-        return (('flip', (v1, v2)) in self.animation_queue
-                or ('flip', (v2, v1)) in self.animation_queue)
-
-    def is_next_flip_queued(self, e):
-        if not self.animation_queue:
-            return False
-        v1, v2 = e
-        next_queued = self.animation_queue[0]
-        return (('flip', (v1, v2)) == next_queued
-                or ('flip', (v2, v1)) == next_queued)
+        return self.queued_flips[frozenset(e)] > 0
 
     def enqueue_anim(self, action, loc, log=True):
         if action == 'add':
             try:
-                a, b = self.graph.find_convex_nbrs(Vertex(*self.mouse_pos))
+                a, b = self.tangents.find_convex_nbrs(loc)
                 for e in self.graph.get_cross_edges(a, b):
                     self.enqueue_anim('flip', e, log=False)
             except ValueError:
@@ -317,96 +458,196 @@ class VisualizationWindow(pyglet.window.Window):
         elif action == 'remove':
             v = loc
             for n in v.nbrs:
-                if self.graph.can_flip(v, n):
+                if self.can_flip((v, n)):
                     self.enqueue_anim('flip', (v, n), log=False)
             if log:
                 print("Remove vertex at", loc)
         elif action == 'flip':
             if log:
                 print("Flip edge between", loc[0], "and", loc[1])
+        if not self.animation_queue:
+            self.action_start = self.graph.position
         self.animation_queue.append((action, loc))
-
-    def step_animation(self, dt):
-        if self.warning_text_countdown > 0.0:
-            self.warning_text_countdown -= dt
-
+        if action == 'flip':
+            self.queued_flips[frozenset(loc)] += 1
+            self.renderer.refresh_edge(loc)
+        self.ghost_edges_dirty = True
+        self.start_animating()
+
+    def start_animating(self):
+        """Run the animation clock until there is nothing left to animate."""
+        if not self.animating:
+            self.animating = True
+            pyglet.clock.schedule_interval(self.step_animation, 1/FPS)
+
+    def stop_animating(self):
+        if self.animating:
+            self.animating = False
+            pyglet.clock.unschedule(self.step_animation)
+            self.invalidate()
+
+    def dequeue_anim(self):
+        """Remove and return the action at the front of the animation
+        queue.
+        """
+        action, loc = self.animation_queue.popleft()
+        if action == 'flip':
+            key = frozenset(loc)
+            self.queued_flips[key] -= 1
+            if not self.queued_flips[key]:
+                del self.queued_flips[key]
+        return action, loc
+
+    def finish_action(self):
+        """Apply the action at the front of the animation queue and remove
+        it from the queue.
+        """
+        self.perform_queued()
+        self.ghost_edges_dirty = True
+        self.update_nearest_thing()
+
+    def perform_queued(self, log=True):
+        """Apply the action at the front of the animation queue and remove
+        it from the queue. Once the queue is empty, the journal entries of
+        the action (and of the flips queued before it) are merged into one.
+        """
+        self.perform(*self.dequeue_anim(), log=log)
         if not self.animation_queue:
-            if self.replay_lines:
-                self.replay_line(self.replay_lines.pop(0))
-            if not self.animation_queue:
-                return
+            self.graph.merge_entries(self.action_start)
 
-        action, loc = self.animation_queue[0]
+    def perform(self, action, loc, log=True):
+        """Apply an action to the graph immediately."""
         if action == 'flip':
-            self.animation_progress += (self.animation_multiplier * dt
-                                        / DEFAULT_ANIMATION_DURATION)
-            if self.animation_progress >= 1:
-                self.graph.flip_edge(*loc)
-                self.animation_queue.pop(0)
-                self.animation_progress = 0.0
-                self.update_nearest_thing()
+            self.graph.flip_edge(*loc)
         elif action == 'add':
             try:
                 self.graph.add_vertex(*loc)
             except ValueError as e:
                 # failed to add vertices (probably because colinear)
-                print("Failed to add vertex:", e)
+                if log:
+                    print("Failed to add vertex:", e)
                 self.warning_text_countdown = 2.0
-            self.animation_queue.pop(0)
-            self.update_nearest_thing()
         elif action == 'remove':
-            self.graph.remove_vertex(loc)
-            self.animation_queue.pop(0)
-            self.update_nearest_thing()
+            # Flip away the interior edges first, like the animation does;
+            # this is a no-op when they were already animated.
+            v = loc
+            with self.graph.operation():
+                for n in list(v.nbrs):
+                    if self.can_flip((v, n)):
+                        self.graph.flip_edge(v, n)
+                self.graph.remove_vertex(v)
+
+    def has_pending_work(self):
+        return bool(self.animation_queue or self.replay_lines
+                    or self.warning_text_countdown > 0.0)
+
+    def step_animation(self, dt):
+        if self.warning_text_countdown > 0.0:
+            self.warning_text_countdown -= dt
+
+        if self.turbo:
+            self.step_turbo()
+        elif not self.animation_queue and self.replay_lines:
+            self.replay_line(self.replay_lines.popleft())
+
+        if self.turbo or not self.animation_queue:
+            if not self.has_pending_work():
+                self.stop_animating()
+            return
+
+        if self.animation_queue[0][0] == 'flip':
+            self.animation_progress += (self.animation_multiplier * dt
+                                        / DEFAULT_ANIMATION_DURATION)
+            if self.animation_progress >= 1:
+                self.animation_progress = 0.0
+                self.finish_action()
+        else:
+            self.finish_action()
+
+    def step_turbo(self):
+        """Apply queued actions and then replay lines without animating or
+        logging them, until `TURBO_FRAME_BUDGET` seconds have passed.
+        """
+        deadline = time.perf_counter() + TURBO_FRAME_BUDGET
+        self.animation_progress = 0.0
+        while time.perf_counter() < deadline:
+            if self.animation_queue:
+                self.perform_queued(log=False)
+            elif self.replay_lines:
+                action = self.parse_replay_line(self.replay_lines.popleft())
+                if action is not None:
+                    self.perform(*action, log=False)
+            else:
+                break
+        self.ghost_edges_dirty = True
+        self.update_nearest_thing()
 
     def replay_line(self, line):
+        action = self.parse_replay_line(line)
+        if action is not None:
+            self.enqueue_anim(*action)
+
+    def parse_replay_line(self, line):
+        """Return the ``(action, loc)`` logged on a line of a replay file, or
+        `None` if the line is not an action.
+        """
+        self.replay_done += 1
         line = line.lower()
-        coords = [float(x) for x in re.findall(r'[\d]+\.', line)]
-
-        if line.startswith('add'):
-            # Add vertex
-            self.enqueue_anim('add', np.array(coords))
-        elif line.startswith('remove'):
-            # Remove vertex
-            self.enqueue_anim('remove', self.find_vertex(coords))
-        elif line.startswith('flip'):
-            # Flip edge
-            edge = (self.find_vertex(coords[:2]),
-                    self.find_vertex(coords[2:]))
-            self.enqueue_anim('flip', edge)
+        coords = [float(x) for x in
+                  re.findall(r'-?\d+(?:\.\d*)?(?:e[-+]?\d+)?', line)]
+
+        try:
+            if line.startswith('add'):
+                # Add vertex
+                return 'add', np.array(coords)
+            elif line.startswith('remove'):
+                # Remove vertex
+                return 'remove', self.find_vertex(coords)
+            elif line.startswith('flip'):
+                # Flip edge
+                edge = (self.find_vertex(coords[:2]),
+                        self.find_vertex(coords[2:]))
+                if self.graph.can_flip(*edge):
+                    return 'flip', edge
+        except ValueError as e:
+            print("Skipping replay line:", e)
+        return None
 
     def find_vertex(self, loc):
-        return [v for v in self.graph.vertices if (v.loc == np.array(loc)).all()][0]
+        v = self.spatial_index.nearest_vertex(loc, 0.0)
+        if v is None:
+            raise ValueError(f"no vertex at {loc}")
+        return v
 
 
-def flatten(it):
-    """Flatten nested iterators.
+class FrameStats:
+    """Counts redraws, time spent drawing and CPU usage between reports."""
 
-    Implementation based on https://stackoverflow.com/a/2158532/4958484.
-    """
-    for elem in it:
-        if isinstance(elem, Iterable) and not isinstance(elem, (str, bytes)):
-            yield from flatten(elem)
-        else:
-            yield elem
-
-
-def dist_point_to_line_segment(a, b, p):
-    """Returns the distance from a point `p` to a line segment `(a, b)`, or
-    `None` if the point is beyond the bounds of the line segment.
-
-    Immplementation based on
-    https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line#Vector_formulation.
-    """
-    n = b - a
-    line_length = np.linalg.norm(n)
-    n /= line_length
-    v = p - a
-    v_parallel = np.dot(v, n)
-    if v_parallel < 0 or v_parallel > line_length:
-        return None
-    v_perpendicular = v - n * v_parallel
-    return np.linalg.norm(v_perpendicular)
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.frame_time = 0.0
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def record_frame(self, seconds):
+        self.frames += 1
+        self.frame_time += seconds
+
+    def report(self):
+        """Return a summary of the stats since the last report and reset
+        them.
+        """
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        frame_ms = 1000 * self.frame_time / self.frames if self.frames else 0.0
+        text = (f"{self.frames / wall:.0f} redraws/s, "
+                f"{frame_ms:.2f} ms/frame, "
+                f"CPU {100 * cpu / wall:.0f}%")
+        self.reset()
+        return text
 
 
 def interpolate(a, b, t):
@@ -11,7 +11,12 @@ def orient(p1, p2, p3):
 
     Returns +1 if the points are in counterclockwise order, -1 if the points are
     in clockwise order, or 0 if the points are colinear.
+
+    If all three points are NumPy arrays of integers, the result is exact; see
+    `orient_exact()`.
     """
+    if _is_integer(p1) and _is_integer(p2) and _is_integer(p3):
+        return orient_exact(p1, p2, p3)
     d = np.linalg.det([np.append(p, 1) for p in [p1, p2, p3]])
     if d > 0:
         return 1
@@ -19,3 +24,78 @@ def orient(p1, p2, p3):
         return -1
     else:
         return 0
+
+
+def orient_exact(p1, p2, p3):
+    """Compute the orientation of three points with integer coordinates, like
+    `orient()`, using Python integers so that the result is exact and cannot
+    overflow.
+    """
+    x1, y1 = int(p1[0]), int(p1[1])
+    d = ((int(p2[0]) - x1) * (int(p3[1]) - y1)
+         - (int(p2[1]) - y1) * (int(p3[0]) - x1))
+    return (d > 0) - (d < 0)
+
+
+def incircle(p1, p2, p3, p4):
+    """Compute whether a point is inside the circle through three others.
+
+    Returns +1 if `p4` is inside the circle through `p1`, `p2` and `p3`, -1 if
+    it is outside, or 0 if it is on the circle. The result is negated if
+    `p1`, `p2` and `p3` are in clockwise order.
+
+    If all four points are NumPy arrays of integers, the result is exact; see
+    `incircle_exact()`.
+    """
+    if all(_is_integer(p) for p in (p1, p2, p3, p4)):
+        return incircle_exact(p1, p2, p3, p4)
+    rows = []
+    for p in (p1, p2, p3):
+        dx, dy = p[0] - p4[0], p[1] - p4[1]
+        rows.append([dx, dy, dx * dx + dy * dy])
+    d = np.linalg.det(np.array(rows, dtype=float))
+    if d > 0:
+        return 1
+    elif d < 0:
+        return -1
+    else:
+        return 0
+
+
+def incircle_exact(p1, p2, p3, p4):
+    """Compute whether a point is inside the circle through three others
+    with integer coordinates, like `incircle()`, using Python integers so
+    that the result is exact and cannot overflow.
+    """
+    x4, y4 = int(p4[0]), int(p4[1])
+    (ax, ay), (bx, by), (cx, cy) = [(int(p[0]) - x4, int(p[1]) - y4)
+                                    for p in (p1, p2, p3)]
+    a2 = ax * ax + ay * ay
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    d = (ax * (by * c2 - b2 * cy)
+         - ay * (bx * c2 - b2 * cx)
+         + a2 * (bx * cy - by * cx))
+    return (d > 0) - (d < 0)
+
+
+def _is_integer(p):
+    return isinstance(p, np.ndarray) and p.dtype.kind in 'iu'
+
+
+def dist_point_to_line_segment(a, b, p):
+    """Returns the distance from a point `p` to a line segment `(a, b)`, or
+    `None` if the point is beyond the bounds of the line segment.
+
+    Immplementation based on
+    https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line#Vector_formulation.
+    """
+    n = np.subtract(b, a, dtype=float)
+    line_length = np.linalg.norm(n)
+    n /= line_length
+    v = p - a
+    v_parallel = np.dot(v, n)
+    if v_parallel < 0 or v_parallel > line_length:
+        return None
+    v_perpendicular = v - n * v_parallel
+    return np.linalg.norm(v_perpendicular)
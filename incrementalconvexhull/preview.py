@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import point
+from .graph import Graph, Vertex
+
+
+class TangentCache:
+    """Remembers which vertices a new point would connect to (see
+    `Graph.find_convex_nbrs()`), for previewing an insertion under a moving
+    cursor.
+
+    For a point outside the hull, the result ``(a, b)`` is the same for every
+    point that sees the edge after `a` and the edge before `b`, but neither
+    the edge before `a` nor the edge after `b`. That region is the
+    intersection of four half-planes, so checking whether a new point is
+    still in it takes four orientation tests instead of a scan of the hull.
+    The cache is discarded whenever the graph's version changes.
+    """
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._pair: Tuple[Optional[Vertex], Optional[Vertex]] = (None, None)
+        # ``(p, q, orientation)`` for each half-plane bounding the region
+        self._region: Optional[List[tuple]] = None
+
+    def find_convex_nbrs(self, p) -> Tuple[Optional[Vertex], Optional[Vertex]]:
+        """Return the same as ``graph.find_convex_nbrs(Vertex(*p))``.
+
+        Raises:
+            ValueError: There are fewer than 2 vertices in the graph
+        """
+        p = np.asarray(p, dtype=float)
+        if self._version == self.graph.version and self._in_region(p):
+            self.hits += 1
+            return self._pair
+
+        self.misses += 1
+        self._version = None
+        a, b = self.graph.find_convex_nbrs(Vertex(*p))
+        self._version = self.graph.version
+        self._pair = (a, b)
+        if a is None or b is None:
+            self._region = None
+        else:
+            g = self.graph
+            ai = g.index(a)
+            bi = g.index(b)
+            self._region = [
+                (g[ai-1].loc, a.loc, 1),
+                (a.loc, g[ai+1].loc, -1),
+                (g[bi-1].loc, b.loc, -1),
+                (b.loc, g[bi+1].loc, 1),
+            ]
+        return a, b
+
+    def _in_region(self, p) -> bool:
+        if self._region is None:
+            return False
+        return all(point.orient(u, v, p) == side
+                   for u, v, side in self._region)
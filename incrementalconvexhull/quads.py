@@ -0,0 +1,90 @@
+"""Vectorized geometry for drawing vertices and edges as colored quads.
+
+Every function works on whole arrays of elements at once, so building the
+draw lists for thousands of edges costs a handful of NumPy operations rather
+than several per edge. Quad corners are ordered so that triangles
+``(0, 1, 2)`` and ``(3, 2, 1)`` cover the quad.
+"""
+
+import numpy as np
+
+
+QUAD_INDICES = np.array([0, 1, 2, 3, 2, 1])
+
+
+def vertex_quads(points, radii) -> np.ndarray:
+    """Return the corners of the squares drawn for vertices.
+
+    Params:
+        points (np.ndarray): (V, 2) vertex locations
+        radii (Union[float, np.ndarray]): half the side length, either one for
+            all vertices or a (V,) array
+
+    Returns:
+        (V, 4, 2) array of corners
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    r = np.broadcast_to(np.asarray(radii, dtype=float), len(points))[:, None]
+    x1, y1 = (points - r).T
+    x2, y2 = (points + r).T
+    return np.stack([
+        np.stack([x1, y1], axis=1),
+        np.stack([x2, y1], axis=1),
+        np.stack([x1, y2], axis=1),
+        np.stack([x2, y2], axis=1),
+    ], axis=1)
+
+
+def edge_quads(endpoints, radii) -> np.ndarray:
+    """Return the corners of the thick lines drawn for edges.
+
+    Each line extends `radius` past both endpoints. Zero-length edges produce
+    zero-area quads.
+
+    Params:
+        endpoints (np.ndarray): (E, 2, 2) array of ``(a, b)`` endpoint pairs
+        radii (Union[float, np.ndarray]): half the line thickness, either one
+            for all edges or an (E,) array
+
+    Returns:
+        (E, 4, 2) array of corners
+    """
+    endpoints = np.asarray(endpoints, dtype=float).reshape(-1, 2, 2)
+    a = endpoints[:, 0]
+    b = endpoints[:, 1]
+    r = np.broadcast_to(np.asarray(radii, dtype=float), len(endpoints))
+
+    fwd = b - a
+    length = np.hypot(fwd[:, 0], fwd[:, 1])
+    scale = np.divide(r, length, out=np.zeros_like(length), where=length > 0)
+    fwd *= scale[:, None]
+    left = np.stack([-fwd[:, 1], fwd[:, 0]], axis=1)  # rotate ccw 90
+    return np.stack([
+        a - fwd + left,
+        a - fwd - left,
+        b + fwd + left,
+        b + fwd - left,
+    ], axis=1)
+
+
+def quad_buffers(corners, colors, base=0):
+    """Flatten quads into vertex, color and index buffers for
+    `pyglet.graphics.draw_indexed()` with ``v2f`` and ``c3B`` attributes.
+
+    Params:
+        corners (np.ndarray): (Q, 4, 2) quad corners
+        colors (np.ndarray): RGB color, either one (3,) color for all quads or
+            a (Q, 3) array
+        base (int): index of the first vertex, when appending to existing
+            buffers
+
+    Returns:
+        ``(coords, colors, indices)``: a (8Q,) float32 array, a (12Q,) uint8
+        array and a (6Q,) int64 array
+    """
+    corners = np.asarray(corners, dtype=np.float32).reshape(-1, 4, 2)
+    n = len(corners)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (n, 3))
+    color_buffer = np.repeat(colors, 4, axis=0).ravel()
+    indices = (base + 4 * np.arange(n)[:, None] + QUAD_INDICES).ravel()
+    return corners.ravel(), color_buffer, indices
@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+import numpy as np
+import pyglet
+
+from . import point, quads
+from .graph import Graph, Vertex
+from .spatial import SpatialIndex
+
+
+# Number of quads stored in each vertex list. Changing one quad only marks
+# its own page for upload to the GPU.
+QUADS_PER_PAGE = 256
+
+# In level-of-detail mode, interior edges shorter than this many pixels are
+# not drawn; the hull outline is always drawn.
+LOD_MIN_EDGE_PIXELS = 1.0
+
+
+class QuadLayer:
+    """Persistent set of colored quads, stored in pages of vertex lists in a
+    `pyglet.graphics.Batch`.
+
+    Each quad is identified by a hashable key and can be moved, recolored or
+    removed in place without touching the other quads.
+    """
+
+    def __init__(self, batch: pyglet.graphics.Batch, group):
+        self.batch = batch
+        self.group = group
+        self._pages: List[pyglet.graphics.vertexdomain.IndexedVertexList] = []
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+
+    def __contains__(self, key) -> bool:
+        return key in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def keys(self):
+        return self._slots.keys()
+
+    def set(self, key, corners, color):
+        """Set the corners and color of a quad, adding it if necessary.
+
+        Params:
+            key (Hashable): identifies the quad
+            corners (Sequence): four XY positions, in triangle strip order
+            color (Tuple[int, int, int]): RGB color
+        """
+        page, i = self._locate(self._slot(key))
+        coords = np.asarray(corners, dtype=float).ravel()
+        page.vertices[i*8:i*8+8] = coords.tolist()
+        page.colors[i*12:i*12+12] = list(color) * 4
+
+    def set_many(self, keys, corners, colors):
+        """Set many quads at once, adding them if necessary.
+
+        Quads that land in consecutive slots of the same page are written
+        with a single slice assignment.
+
+        Params:
+            keys (Sequence[Hashable]): identify the quads
+            corners (np.ndarray): (Q, 4, 2) quad corners
+            colors (np.ndarray): (3,) color for all quads or (Q, 3) colors
+        """
+        if not len(keys):
+            return
+        coords, color_buffer, _ = quads.quad_buffers(corners, colors)
+        coords = coords.reshape(-1, 8)
+        color_buffer = color_buffer.reshape(-1, 12)
+        slots = np.array([self._slot(key) for key in keys])
+        order = np.argsort(slots, kind='stable')
+        slots = slots[order]
+        # Split wherever the slots stop being consecutive or cross a page.
+        breaks = np.flatnonzero((np.diff(slots) != 1)
+                                | (slots[1:] % QUADS_PER_PAGE == 0)) + 1
+        for run in np.split(np.arange(len(slots)), breaks):
+            page, i = self._locate(int(slots[run[0]]))
+            j = i + len(run)
+            page.vertices[i*8:j*8] = coords[order[run]].ravel().tolist()
+            page.colors[i*12:j*12] = color_buffer[order[run]].ravel().tolist()
+
+    def set_color(self, key, color):
+        """Change the color of an existing quad."""
+        page, i = self._locate(self._slots[key])
+        page.colors[i*12:i*12+12] = list(color) * 4
+
+    def remove(self, key):
+        """Remove a quad, if it exists."""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        page, i = self._locate(slot)
+        # A quad with all four corners in the same place draws nothing.
+        page.vertices[i*8:i*8+8] = [0.0] * 8
+        self._free.append(slot)
+
+    def clear(self):
+        """Remove all quads and release their vertex lists."""
+        for page in self._pages:
+            page.delete()
+        self._pages = []
+        self._slots = {}
+        self._free = []
+
+    def _slot(self, key) -> int:
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._add_page()
+            slot = self._slots[key] = self._free.pop()
+        return slot
+
+    def _locate(self, slot):
+        return self._pages[slot // QUADS_PER_PAGE], slot % QUADS_PER_PAGE
+
+    def _add_page(self):
+        _, _, indices = quads.quad_buffers(
+            np.zeros((QUADS_PER_PAGE, 4, 2)), (0, 0, 0))
+        page = self.batch.add_indexed(
+            4 * QUADS_PER_PAGE,
+            pyglet.gl.GL_TRIANGLES,
+            self.group,
+            indices.tolist(),
+            ('v2f/dynamic', [0.0] * (8 * QUADS_PER_PAGE)),
+            ('c3B/dynamic', [0] * (12 * QUADS_PER_PAGE)),
+        )
+        start = len(self._pages) * QUADS_PER_PAGE
+        self._pages.append(page)
+        # Hand out low slots first so that pages fill up in order.
+        self._free.extend(reversed(range(start, start + QUADS_PER_PAGE)))
+
+
+class GraphRenderer:
+    """Keeps GPU-side quads for every vertex and edge of a graph up to date.
+
+    The renderer subscribes to the graph's change events and only rebuilds
+    the quads of the vertices and edges that changed. How each vertex and
+    edge looks is decided by the `vertex_style` and `edge_style` callbacks,
+    which return a ``(radius, color)`` pair; call `refresh_vertex()` or
+    `refresh_edge()` whenever the answer may have changed (e.g. on hover).
+
+    Positions are in world coordinates and radii are in pixels. Once a view
+    is set with `set_view()`, only the elements near it get quads.
+    """
+
+    def __init__(self, graph: Graph, vertex_style: Callable,
+                 edge_style: Callable, index: Optional[SpatialIndex] = None,
+                 batch: Optional[pyglet.graphics.Batch] = None):
+        """Start drawing a graph.
+
+        Params:
+            graph (Graph): graph to draw
+            vertex_style (Callable): returns ``(radius, color)`` for a vertex
+            edge_style (Callable): returns ``(radius, color)`` for an edge
+            index (SpatialIndex): index of the graph, used to find the
+                elements near the view without looking at all of them
+            batch (pyglet.graphics.Batch): batch to add the quads to; a new
+                one by default
+        """
+        self.graph = graph
+        self.vertex_style = vertex_style
+        self.edge_style = edge_style
+        self.index = index
+
+        # Pixels per world unit, and the world box outside of which elements
+        # are culled (or `None` to draw everything).
+        self.scale = 1.0
+        self.lod = False
+        self._cull = None
+
+        self.batch = batch if batch is not None else pyglet.graphics.Batch()
+        # Draw order (lowest to highest):
+        # - "ghost" edges
+        # - graph edges
+        # - graph vertices
+        self.ghost_layer = QuadLayer(self.batch, pyglet.graphics.OrderedGroup(0))
+        self.edge_layer = QuadLayer(self.batch, pyglet.graphics.OrderedGroup(1))
+        self.vertex_layer = QuadLayer(self.batch, pyglet.graphics.OrderedGroup(2))
+
+        self._incident: Dict[Vertex, Set[frozenset]] = {}
+        # Edges on the hull, or `None` until needed again after the graph's
+        # vertices change; flips never change the hull.
+        self._hull: Optional[Set[frozenset]] = None
+        self.rebuild()
+        graph.subscribe(self._on_change)
+
+    def draw(self):
+        self.batch.draw()
+
+    def set_view(self, lo, hi, scale, lod=False) -> bool:
+        """Only draw the elements near the world box from `lo` to `hi`,
+        magnified by `scale` pixels per world unit.
+
+        Elements up to half a view away on every side are kept as well, so
+        panning only rebuilds the quads once the view leaves that margin.
+
+        Params:
+            lo (np.ndarray): lower left corner of the visible world box
+            hi (np.ndarray): upper right corner of the visible world box
+            scale (float): pixels per world unit
+            lod (bool): skip interior edges shorter than
+                `LOD_MIN_EDGE_PIXELS`
+
+        Returns:
+            Whether the quads were rebuilt
+        """
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        if (self._cull is not None and scale == self.scale
+                and lod == self.lod and np.all(lo >= self._cull[0])
+                and np.all(hi <= self._cull[1])):
+            return False
+        pad = (hi - lo) / 2
+        self._cull = (lo - pad, hi + pad)
+        self.scale = scale
+        self.lod = lod
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        """Rebuild the quads of every vertex and edge in the view."""
+        self.edge_layer.clear()
+        self.vertex_layer.clear()
+        self._incident = {}
+
+        if self._cull is not None and self.index is not None:
+            vertices, edges = self.index.query_box(*self._cull)
+            vertices = list(vertices)
+        else:
+            vertices, edges = self.graph.vertices, list(self.graph.edges())
+
+        if vertices:
+            points = np.array([v.loc for v in vertices],
+                              dtype=float).reshape(-1, 2)
+            visible = self._boxes_visible(points, points)
+            vertices = [v for v, keep in zip(vertices, visible) if keep]
+            points = points[visible]
+        if vertices:
+            for v in vertices:
+                self._incident[v] = set()
+            radii, colors = self._styles(vertices, self.vertex_style)
+            self.vertex_layer.set_many(
+                vertices, quads.vertex_quads(points, radii / self.scale),
+                colors)
+
+        if edges:
+            endpoints = np.array([(v1.loc, v2.loc) for v1, v2 in edges],
+                                 dtype=float).reshape(-1, 2, 2)
+            visible = self._boxes_visible(endpoints.min(axis=1),
+                                          endpoints.max(axis=1))
+            if self.lod:
+                fwd = endpoints[:, 1] - endpoints[:, 0]
+                short = (np.hypot(fwd[:, 0], fwd[:, 1]) * self.scale
+                         < LOD_MIN_EDGE_PIXELS)
+                hull = self._hull_edges()
+                for i in np.flatnonzero(visible & short):
+                    visible[i] = frozenset(edges[i]) in hull
+            edges = [e for e, keep in zip(edges, visible) if keep]
+            endpoints = endpoints[visible]
+        if edges:
+            keys = [frozenset(e) for e in edges]
+            for key in keys:
+                for v in key:
+                    self._incident.setdefault(v, set()).add(key)
+            radii, colors = self._styles(edges, self.edge_style)
+            self.edge_layer.set_many(
+                keys, quads.edge_quads(endpoints, radii / self.scale), colors)
+
+    def _boxes_visible(self, lo, hi) -> np.ndarray:
+        """Return which of the (N, 2) boxes from `lo` to `hi` overlap the
+        culling box.
+        """
+        lo = np.asarray(lo, dtype=float).reshape(-1, 2)
+        hi = np.asarray(hi, dtype=float).reshape(-1, 2)
+        if self._cull is None:
+            return np.ones(len(lo), dtype=bool)
+        cull_lo, cull_hi = self._cull
+        return np.all((hi >= cull_lo) & (lo <= cull_hi), axis=1)
+
+    def _vertex_visible(self, v: Vertex) -> bool:
+        return bool(self._boxes_visible(v.loc, v.loc)[0])
+
+    def _edge_visible(self, e) -> bool:
+        v1, v2 = e
+        a = np.asarray(v1.loc, dtype=float)
+        b = np.asarray(v2.loc, dtype=float)
+        if not self._boxes_visible(np.minimum(a, b), np.maximum(a, b))[0]:
+            return False
+        if (self.lod and point.dist(a, b) * self.scale < LOD_MIN_EDGE_PIXELS
+                and frozenset(e) not in self._hull_edges()):
+            return False
+        return True
+
+    def _hull_edges(self) -> Set[frozenset]:
+        """Return the edges on the hull, which are those between consecutive
+        vertices as the graph is in convex position.
+        """
+        if self._hull is None:
+            vertices = self.graph.vertices
+            self._hull = {frozenset(pair) for pair
+                          in zip(vertices, vertices[1:] + vertices[:1])}
+        return self._hull
+
+    @staticmethod
+    def _styles(elements, style):
+        radii, colors = zip(*map(style, elements))
+        return np.array(radii, dtype=float), np.array(colors, dtype=np.uint8)
+
+    def refresh_vertex(self, v: Vertex):
+        """Restyle a vertex, if it is in the graph."""
+        if v in self.vertex_layer:
+            radius, color = self.vertex_style(v)
+            self.vertex_layer.set(
+                v, vertex_quad(v.loc, radius / self.scale), color)
+
+    def refresh_edge(self, e):
+        """Restyle an edge (and put it back in its place, if it was moved by
+        `move_edge()`), if it is in the graph.
+        """
+        v1, v2 = e
+        if frozenset(e) in self.edge_layer:
+            self.move_edge(e, v1.loc, v2.loc)
+
+    def move_edge(self, e, a, b):
+        """Draw an existing edge between two arbitrary positions; used for
+        animations.
+        """
+        radius, color = self.edge_style(e)
+        self.edge_layer.set(
+            frozenset(e), edge_quad(a, b, radius / self.scale), color)
+
+    def set_ghost_edges(self, segments):
+        """Replace the set of "ghost" edges.
+
+        Params:
+            segments (List): ``(a, b, radius, color)`` tuples
+        """
+        for i, (a, b, radius, color) in enumerate(segments):
+            self.ghost_layer.set(
+                i, edge_quad(a, b, radius / self.scale), color)
+        for i in list(self.ghost_layer.keys()):
+            if i >= len(segments):
+                self.ghost_layer.remove(i)
+
+    def _add_vertex(self, v: Vertex):
+        if not self._vertex_visible(v):
+            return
+        self._incident.setdefault(v, set())
+        radius, color = self.vertex_style(v)
+        self.vertex_layer.set(
+            v, vertex_quad(v.loc, radius / self.scale), color)
+
+    def _remove_vertex(self, v: Vertex):
+        self.vertex_layer.remove(v)
+        for key in self._incident.pop(v, ()):
+            self.edge_layer.remove(key)
+            for u in key:
+                if u is not v:
+                    self._incident.get(u, set()).discard(key)
+        if self.lod:
+            # The edges between consecutive neighbors of the vertex (which it
+            # keeps once removed) lost the triangle they made with it, so
+            # they may now be on the hull and drawn however short they are.
+            for u, w in zip(v.nbrs, v.nbrs[1:] + v.nbrs[:1]):
+                if w in u.nbrs and frozenset((u, w)) not in self.edge_layer:
+                    self._add_edge((u, w))
+
+    def _add_edge(self, e):
+        if not self._edge_visible(e):
+            return
+        key = frozenset(e)
+        for v in e:
+            self._incident.setdefault(v, set()).add(key)
+        v1, v2 = e
+        self.move_edge(e, v1.loc, v2.loc)
+
+    def _remove_edge(self, e):
+        key = frozenset(e)
+        for v in e:
+            self._incident.get(v, set()).discard(key)
+        self.edge_layer.remove(key)
+
+    def _on_change(self, events):
+        if any(kind in ('add_vertex', 'remove_vertex') for kind, _ in events):
+            self._hull = None
+        for kind, payload in events:
+            if kind == 'add_vertex':
+                self._add_vertex(payload)
+            elif kind == 'remove_vertex':
+                self._remove_vertex(payload)
+            elif kind == 'add_edge':
+                self._add_edge(payload)
+            elif kind == 'remove_edge':
+                self._remove_edge(payload)
+            elif kind == 'flip_edge':
+                self._remove_edge(payload[0])
+                self._add_edge(payload[1])
+
+
+def vertex_quad(loc, radius):
+    """Return the corners of the square drawn for a vertex."""
+    return quads.vertex_quads(loc, radius)[0]
+
+
+def edge_quad(a, b, radius):
+    """Return the corners of the thick line drawn for an edge."""
+    return quads.edge_quads((a, b), radius)[0]
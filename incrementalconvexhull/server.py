@@ -0,0 +1,394 @@
+"""Asyncio server that ingests points into a `Graph` over a local socket.
+
+Clients send one command per line and get one reply line per command, in
+order:
+
+==========================  =================================================
+``add X Y``                 ``ok``, ``inside`` (already in the hull) or
+                            ``error <message>``
+``addmany N``               followed by ``N`` little-endian float64 XY pairs
+                            (``16 * N`` raw bytes); replies ``ok <added>``
+``remove X Y``              ``ok`` or ``error <message>``
+``flip X1 Y1 X2 Y2``        ``ok`` or ``error <message>``
+``contains X Y``            ``yes`` or ``no``
+``nearest X Y``             ``X Y`` of the nearest vertex, or ``none``
+``stats``                   JSON object of counters
+==========================  =================================================
+
+Coordinates must be finite. ``addmany`` takes at most `MAX_ADDMANY` points;
+as the payload of a count it rejects cannot be skipped, the server closes the
+connection after replying.
+
+Mutations are queued and applied by a single task, which coalesces whatever
+is waiting into one batch. When the queue is full, the server stops reading
+from the connections that are producing mutations until it drains. Queries
+are answered from a `GraphSnapshot` once the connection's earlier mutations
+have been applied, so clients always read their own writes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from .graph import Graph, Vertex
+from .snapshot import SnapshotPublisher
+
+# Most points accepted by one ``addmany`` command (16 bytes each).
+MAX_ADDMANY = 1 << 16
+
+
+class _UnreadPayload(ValueError):
+    """A command was rejected without reading the data that follows it."""
+
+
+class GraphServer:
+    """Serves a single `Graph` to any number of local clients."""
+
+    def __init__(self, graph: Optional[Graph] = None, max_queue=1024,
+                 max_batch=256):
+        """Create a server around a graph.
+
+        Params:
+            graph (Graph): graph to serve; a new empty one by default
+            max_queue (int): number of queued mutations before producers are
+                paused
+            max_batch (int): maximum number of mutations applied per batch
+        """
+        self.graph = graph if graph is not None else Graph()
+        self.max_batch = max_batch
+        self.snapshots = SnapshotPublisher(self.graph)
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._by_loc: Dict[Tuple[float, float], Vertex] = {
+            tuple(v.loc.tolist()): v for v in self.graph.vertices
+        }
+        self.graph.subscribe(self._on_change)
+        self._servers = []
+        self._connections: Set[asyncio.Task] = set()
+        self._applier: Optional[asyncio.Task] = None
+        self._shrunk = False
+        # Whether `_by_loc` may map to vertices that adding a point removed
+        # during the current batch; their events only arrive after it.
+        self._stale = False
+
+        self._started = time.perf_counter()
+        self.counters = {
+            'commands': 0,
+            'mutations': 0,
+            'points_added': 0,
+            'points_inside': 0,
+            'queries': 0,
+            'errors': 0,
+            'batches': 0,
+            'backpressure_waits': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+
+    ###########################################################################
+    # LIFECYCLE
+
+    async def start_tcp(self, host='127.0.0.1', port=0) -> asyncio.Server:
+        """Listen on a TCP socket. Use port 0 to pick a free port."""
+        self._start_applier()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path) -> asyncio.Server:
+        """Listen on a Unix domain socket."""
+        self._start_applier()
+        server = await asyncio.start_unix_server(self.handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        """Stop listening, disconnect clients and stop applying mutations.
+        Replies still pending are not sent.
+        """
+        for server in self._servers:
+            server.close()
+        connections = list(self._connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+        if self._applier is not None:
+            self._applier.cancel()
+            try:
+                await self._applier
+            except asyncio.CancelledError:
+                pass
+            self._applier = None
+
+    def _start_applier(self):
+        if self._applier is None:
+            self._applier = asyncio.get_running_loop().create_task(
+                self._apply_forever())
+
+    def stats(self) -> dict:
+        """Return a snapshot of the server's counters."""
+        stats = dict(self.counters)
+        elapsed = time.perf_counter() - self._started
+        mutations = stats['mutations']
+        stats['uptime'] = elapsed
+        stats['mutations_per_sec'] = mutations / elapsed if elapsed else 0.0
+        stats['latency_avg'] = (stats['latency_total'] / mutations
+                                if mutations else 0.0)
+        stats['queue_size'] = self._queue.qsize()
+        stats['vertices'] = len(self.graph)
+        return stats
+
+    ###########################################################################
+    # CONNECTIONS
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Serve one client until it disconnects."""
+        # Replies are produced in command order by a separate task, so that
+        # reading (and queueing) more commands is not held up by mutations
+        # that are still waiting to be applied.
+        task = asyncio.current_task()
+        self._connections.add(task)
+        replies: asyncio.Queue = asyncio.Queue()
+        replier = asyncio.get_running_loop().create_task(
+            self._send_replies(replies, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.counters['commands'] += 1
+                try:
+                    reply = await self._dispatch(line.decode().split(), reader)
+                except (ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                    self.counters['errors'] += 1
+                    reply = f'error {e}'
+                    if isinstance(e, _UnreadPayload):
+                        await replies.put(reply)
+                        break
+                await replies.put(reply)
+        except asyncio.CancelledError:
+            # The server is closing; drop the replies still pending. The
+            # task then ends normally, as asyncio logs connection handlers
+            # that end cancelled.
+            replier.cancel()
+        finally:
+            await replies.put(None)
+            await asyncio.gather(replier, return_exceptions=True)
+            writer.close()
+            self._connections.discard(task)
+
+    async def _send_replies(self, replies: asyncio.Queue,
+                            writer: asyncio.StreamWriter):
+        while True:
+            reply = await replies.get()
+            if reply is None:
+                break
+            if isinstance(reply, asyncio.Future):
+                reply = await reply
+            elif callable(reply):
+                reply = reply()
+            writer.write(reply.encode() + b'\n')
+            if replies.empty():
+                await writer.drain()
+        await writer.drain()
+
+    async def _dispatch(self, words, reader: asyncio.StreamReader):
+        """Parse one command and return its reply: a string, a future that
+        resolves to one, or a callable that computes one.
+        """
+        if not words:
+            raise ValueError('empty command')
+        command, args = words[0].lower(), [float(w) for w in words[1:]]
+        if not all(map(math.isfinite, args)):
+            raise ValueError('coordinates must be finite')
+
+        if command == 'add':
+            x, y = args
+            return await self._enqueue('add', np.array([[x, y]]))
+        if command == 'addmany':
+            count = int(words[1])
+            if not 0 <= count <= MAX_ADDMANY:
+                raise _UnreadPayload(
+                    f'count must be between 0 and {MAX_ADDMANY}')
+            data = await reader.readexactly(16 * count)
+            points = np.frombuffer(data, dtype='<f8').reshape(count, 2)
+            if not np.isfinite(points).all():
+                raise ValueError('coordinates must be finite')
+            return await self._enqueue('add', points)
+        if command == 'remove':
+            x, y = args
+            return await self._enqueue('remove', (x, y))
+        if command == 'flip':
+            x1, y1, x2, y2 = args
+            return await self._enqueue('flip', ((x1, y1), (x2, y2)))
+        if command == 'contains':
+            x, y = args
+            return lambda: self._contains(x, y)
+        if command == 'nearest':
+            x, y = args
+            return lambda: self._nearest(x, y)
+        if command == 'stats':
+            return lambda: json.dumps(self.stats())
+        raise ValueError(f'unknown command {command!r}')
+
+    async def _enqueue(self, op, arg) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if self._queue.full():
+            self.counters['backpressure_waits'] += 1
+        await self._queue.put((op, arg, future, time.perf_counter()))
+        return future
+
+    ###########################################################################
+    # QUERIES
+
+    def _contains(self, x, y):
+        self.counters['queries'] += 1
+        return 'yes' if self.snapshots.current.hull_contains(x, y) else 'no'
+
+    def _nearest(self, x, y):
+        self.counters['queries'] += 1
+        s = self.snapshots.current
+        vid = s.nearest_vertex(x, y)
+        if vid is None:
+            return 'none'
+        return ' '.join(repr(c) for c in s.location(vid))
+
+    ###########################################################################
+    # MUTATIONS
+
+    async def _apply_forever(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Snapshots are only published once the batch is done, so while
+            # applying it `self.snapshots.current` shows the graph as it was
+            # before the batch.
+            self._shrunk = False
+            with self.graph.batch():
+                for op, arg, future, queued_at in batch:
+                    try:
+                        result = getattr(self, '_apply_' + op)(arg)
+                    except ValueError as e:
+                        self.counters['errors'] += 1
+                        result = f'error {e}'
+                    latency = time.perf_counter() - queued_at
+                    self.counters['latency_total'] += latency
+                    self.counters['latency_max'] = max(
+                        self.counters['latency_max'], latency)
+                    self.counters['mutations'] += 1
+                    if not future.cancelled():
+                        future.set_result(result)
+            # The batch's events have been delivered to `_on_change`.
+            self._stale = False
+            self.counters['batches'] += 1
+            # Let the connections refill the queue before the next batch.
+            await asyncio.sleep(0)
+
+    def _apply_add(self, points: np.ndarray):
+        # Points already inside the hull would be no-ops; drop them all at
+        # once before adding the rest one by one. Adding and flipping only
+        # ever grow the hull, so unless a vertex was removed during this batch
+        # the hull from before the batch is a safe filter.
+        if self._shrunk:
+            outside = np.ones(len(points), dtype=bool)
+        else:
+            outside = ~self.snapshots.current.hull_contains_all(points)
+        added = 0
+        inside = int(len(points) - outside.sum())
+        for x, y in points[outside].tolist():
+            size = len(self.graph)
+            try:
+                z = self.graph.add_vertex(x, y)
+            except ValueError:
+                if len(points) == 1:
+                    raise
+                # Skip colinear points in a bulk insert rather than failing
+                # the rest of it.
+                self.counters['errors'] += 1
+                continue
+            if z is None:
+                inside += 1
+                continue
+            added += 1
+            # Later commands in the batch may refer to the new vertex, and
+            # must not find the ones it removed.
+            self._by_loc[tuple(z.loc.tolist())] = z
+            if len(self.graph) != size + 1:
+                self._stale = True
+        self.counters['points_added'] += added
+        self.counters['points_inside'] += inside
+        if len(points) == 1:
+            return 'ok' if added else 'inside'
+        return f'ok {added}'
+
+    def _apply_remove(self, loc):
+        v = self._find_vertex(loc)
+        # `remove_vertex()` does not re-triangulate, so flip away the interior
+        # edges first, leaving only the two hull edges.
+        while len(v.nbrs) > 2:
+            for n in list(v.nbrs):
+                if self.graph.can_flip(v, n):
+                    self.graph.flip_edge(v, n)
+        self.graph.remove_vertex(v)
+        del self._by_loc[tuple(loc)]
+        self._shrunk = True
+        return 'ok'
+
+    def _apply_flip(self, locs):
+        self.graph.flip_edge(*(self._find_vertex(loc) for loc in locs))
+        return 'ok'
+
+    def _find_vertex(self, loc) -> Vertex:
+        v = self._by_loc.get(tuple(loc))
+        if v is None or (self._stale and v not in self.graph.vertices):
+            raise ValueError('no vertex at ({}, {})'.format(*loc))
+        return v
+
+    def _on_change(self, events):
+        # Events arrive after each batch, so a location may already map to a
+        # vertex added later at the same place.
+        for kind, payload in events:
+            if kind == 'add_vertex':
+                self._by_loc[tuple(payload.loc.tolist())] = payload
+            elif kind == 'remove_vertex':
+                loc = tuple(payload.loc.tolist())
+                if self._by_loc.get(loc) is payload:
+                    del self._by_loc[loc]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--tcp', metavar='HOST:PORT')
+    group.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--max-queue', type=int, default=1024)
+    parser.add_argument('--max-batch', type=int, default=256)
+    args = parser.parse_args()
+
+    async def serve():
+        server = GraphServer(max_queue=args.max_queue,
+                             max_batch=args.max_batch)
+        if args.tcp:
+            host, port = args.tcp.rsplit(':', 1)
+            listener = await server.start_tcp(host, int(port))
+        else:
+            listener = await server.start_unix(args.unix)
+        async with listener:
+            await listener.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
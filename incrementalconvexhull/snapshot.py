@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .graph import Graph, Vertex
+
+
+class GraphSnapshot:
+    """Immutable view of a graph's hull and adjacency at one version.
+
+    Vertices are identified by integer ids that stay the same across
+    snapshots for as long as the vertex exists; the id of a removed vertex
+    may be given to a vertex added later. Snapshots share all unchanged
+    data with their predecessors, and are safe to read from any thread while
+    the graph keeps being modified.
+    """
+
+    def __init__(self, version, hull, chunks, chunk_size):
+        self.version: int = version
+        #: Vertex ids in ccw hull order.
+        self.hull: Tuple[int, ...] = hull
+        self._chunks = chunks
+        self._chunk_size = chunk_size
+        self._hull_coords = None
+
+    def __len__(self) -> int:
+        """Return the number of vertices in the snapshot."""
+        return len(self.hull)
+
+    def _entry(self, vid):
+        entry = self._chunks[vid // self._chunk_size][vid % self._chunk_size]
+        if entry is None:
+            raise KeyError(vid)
+        return entry
+
+    def location(self, vid: int) -> Tuple[float, float]:
+        """Return the XY location of a vertex."""
+        return self._entry(vid)[0]
+
+    def neighbors(self, vid: int) -> Tuple[int, ...]:
+        """Return the ids of a vertex's neighbors, in ccw angular order."""
+        return self._entry(vid)[1]
+
+    def edges(self):
+        """Return a generator over all edges as pairs of vertex ids."""
+        for vid in self.hull:
+            for nbr in self.neighbors(vid):
+                if vid < nbr:
+                    yield (vid, nbr)
+
+    @property
+    def hull_coords(self) -> np.ndarray:
+        """Read-only (n, 2) array of vertex locations in ccw hull order."""
+        if self._hull_coords is None:
+            coords = np.array([self.location(vid) for vid in self.hull],
+                              dtype=float).reshape(-1, 2)
+            coords.flags.writeable = False
+            self._hull_coords = coords
+        return self._hull_coords
+
+    def hull_contains(self, x, y) -> bool:
+        """Return whether an XY position is inside the convex hull. See
+        `Graph.hull_contains()`.
+        """
+        return bool(self.hull_contains_all(np.array([[x, y]]))[0])
+
+    def hull_contains_all(self, points: np.ndarray) -> np.ndarray:
+        """Vectorized `hull_contains()` for an (n, 2) array of positions."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(self) < 3:
+            return np.zeros(len(points), dtype=bool)
+        p = self.hull_coords
+        q = np.roll(p, -1, axis=0)
+        cross = ((q[:, 0] - p[:, 0]) * (points[:, 1, None] - p[:, 1])
+                 - (q[:, 1] - p[:, 1]) * (points[:, 0, None] - p[:, 0]))
+        return np.all(cross >= 0, axis=1)
+
+    def nearest_vertex(self, x, y) -> Optional[int]:
+        """Return the id of the vertex nearest to an XY position, or `None` if
+        the snapshot is empty.
+        """
+        if not self.hull:
+            return None
+        d = np.sum((self.hull_coords - (x, y)) ** 2, axis=1)
+        return self.hull[int(np.argmin(d))]
+
+
+class SnapshotPublisher:
+    """Publishes a new `GraphSnapshot` after every change to a graph.
+
+    Readers on any thread take `current` and query it without locking; the
+    writer keeps mutating the graph on its own thread and is never blocked by
+    readers. Publishing copies only the adjacency of the vertices that
+    changed (plus their chunk of `chunk_size` ids), and the hull order only
+    when vertices were added or removed.
+
+    The ids of removed vertices are reused, lowest first, so the number of
+    ids and chunks is bounded by the most vertices the graph has had at
+    once, not by how many it has ever had.
+    """
+
+    def __init__(self, graph: Graph, chunk_size=64):
+        """Start publishing snapshots of a graph.
+
+        Params:
+            graph (Graph): graph to publish; must only be mutated from one
+                thread
+            chunk_size (int): number of vertex ids per copy-on-write chunk
+        """
+        self.graph = graph
+        self.chunk_size = chunk_size
+        self._ids: Dict[Vertex, int] = {}
+        # Vertex of each id, or `None` for ids in `_free_ids`
+        self._vertices: List[Optional[Vertex]] = []
+        self._free_ids: List[int] = []
+        self._chunks: List[tuple] = []
+        # Vertices whose snapshot entry must be rebuilt, mapped to whether
+        # they are still in the graph.
+        self._dirty: Dict[Vertex, bool] = dict.fromkeys(graph.vertices, True)
+        # Ids in ccw hull order as of the last snapshot, and the vertices
+        # added or removed since, or `None` to rebuild the order
+        self._hull: List[int] = []
+        self._moved: Optional[Set[Vertex]] = None
+        self.current: GraphSnapshot = None
+        self._publish()
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        """Stop publishing snapshots. `current` remains valid."""
+        self.graph.unsubscribe(self._on_change)
+
+    def _id(self, v: Vertex) -> int:
+        vid = self._ids.get(v)
+        if vid is None:
+            if self._free_ids:
+                vid = heapq.heappop(self._free_ids)
+                self._vertices[vid] = v
+            else:
+                vid = len(self._vertices)
+                self._vertices.append(v)
+            self._ids[v] = vid
+        return vid
+
+    def _free(self, v: Vertex) -> int:
+        vid = self._ids.pop(v)
+        self._vertices[vid] = None
+        heapq.heappush(self._free_ids, vid)
+        return vid
+
+    def _moved_vertex(self, v: Vertex):
+        if self._moved is not None:
+            self._moved.add(v)
+
+    def _on_change(self, events):
+        dirty = self._dirty
+        for kind, payload in events:
+            if kind == 'add_vertex':
+                dirty[payload] = True
+                self._moved_vertex(payload)
+            elif kind == 'remove_vertex':
+                dirty[payload] = False
+                self._moved_vertex(payload)
+                # The removed vertex's neighbors lost an edge too.
+                for n in self._published_nbrs(payload):
+                    dirty.setdefault(n, True)
+            elif kind == 'flip_edge':
+                for v in payload[0] + payload[1]:
+                    dirty.setdefault(v, True)
+            else:
+                for v in payload:
+                    dirty.setdefault(v, True)
+        self._publish()
+
+    def _published_nbrs(self, v: Vertex) -> List[Vertex]:
+        vid = self._ids.get(v)
+        if vid is None or vid // self.chunk_size >= len(self._chunks):
+            return []
+        entry = self._chunks[vid // self.chunk_size][vid % self.chunk_size]
+        if entry is None:
+            return []
+        return [self._vertices[n] for n in entry[1]]
+
+    def _publish(self):
+        moved = self._moved
+        vertices = self.graph.vertices
+        # Rebuilding the hull order is cheaper than moving most of it.
+        if moved is not None and 8 * len(moved) > len(self._hull):
+            moved = None
+        if moved is not None:
+            for v in moved:
+                if v in self._ids:
+                    self._hull.remove(self._ids[v])
+
+        changed_chunks: Dict[int, list] = {}
+
+        def entry(vid):
+            c, i = divmod(vid, self.chunk_size)
+            while c >= len(self._chunks):
+                self._chunks.append((None,) * self.chunk_size)
+            if c not in changed_chunks:
+                changed_chunks[c] = list(self._chunks[c])
+            return changed_chunks[c], i
+
+        # Free the ids of removed vertices before giving out new ones.
+        for v, in_graph in self._dirty.items():
+            if not in_graph and v in self._ids:
+                chunk, i = entry(self._free(v))
+                chunk[i] = None
+        for v, in_graph in self._dirty.items():
+            if in_graph:
+                chunk, i = entry(self._id(v))
+                loc = tuple(v.loc.tolist())
+                nbrs = tuple(self._id(n) for n in v.nbrs)
+                chunk[i] = (loc, nbrs)
+        self._dirty = {}
+        for c, chunk in changed_chunks.items():
+            self._chunks[c] = tuple(chunk)
+
+        if moved is None:
+            self._hull = list(map(self._ids.__getitem__, vertices))
+        else:
+            # Inserted in order of their final positions, each lands there.
+            added = sorted((vertices.index(v), self._ids[v])
+                           for v in moved if v in self._ids)
+            for position, vid in added:
+                self._hull.insert(position, vid)
+        self._moved = set()
+
+        if moved is None or moved:
+            hull = tuple(self._hull)
+        else:
+            # Only flips and edge changes; the hull order is unchanged.
+            hull = self.current.hull
+        self.current = GraphSnapshot(self.graph.version, hull,
+                                     tuple(self._chunks), self.chunk_size)
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .graph import Graph, Vertex
+from .point import dist, dist_point_to_line_segment
+
+
+Cell = Tuple[int, int]
+
+
+# Bounds on how full the grids get before a graph indexed without a fixed cell
+# size is indexed again with cell sizes fitted to it
+MAX_VERTICES_PER_CELL = 16
+MAX_CELLS_PER_EDGE = 8
+MAX_EDGES_PER_CELL = 32
+# Grids are only checked against these bounds once they hold this many
+# elements
+MIN_FIT_SIZE = 64
+
+
+class SpatialIndex:
+    """Uniform grids over the vertices and edges of a graph, for finding the
+    elements near a point without looking at all of them.
+
+    Vertices are stored in the cell containing them, and edges in every cell
+    their segment passes through; the two grids have their own cell sizes.
+    The index subscribes to the graph's change events, so it stays in sync as
+    the graph is mutated.
+
+    Unless a fixed cell size is given, the cell sizes follow the data: vertex
+    cells are a few times the typical spacing of the vertices along the
+    hull, and edge cells half the mean edge length, so that each edge is in a
+    few cells. When a grid gets much fuller or emptier than that, the graph
+    is indexed again, at most once per quarter of its size in changes.
+    Queries over boxes that cover more cells than are occupied look at the
+    occupied cells instead, so they never cost more than the size of the
+    index.
+    """
+
+    def __init__(self, graph: Graph, cell_size=None):
+        """Index a graph.
+
+        Params:
+            graph (Graph): graph to index
+            cell_size (float): side length of every grid cell, or `None` to
+                fit the cell sizes to the graph as it changes
+        """
+        self.graph = graph
+        self.fixed = cell_size is not None
+        #: Side length of the cells of the vertex and edge grids
+        self.vertex_cell_size = self.edge_cell_size = float(cell_size or 1.0)
+        self._vertex_cells: Dict[Cell, Set[Vertex]] = {}
+        self._edge_cells: Dict[Cell, Set[frozenset]] = {}
+        self._edges: Dict[frozenset, Tuple[Vertex, Vertex]] = {}
+        self._cells_of_edge: Dict[frozenset, List[Cell]] = {}
+        self._incident: Dict[Vertex, Set[frozenset]] = {}
+        # Number of (edge, cell) pairs in `_edge_cells`
+        self._edge_entries = 0
+        # Number of changes since the graph was last indexed
+        self._changes = 0
+        self._rebuild()
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        """Stop following changes to the graph."""
+        self.graph.unsubscribe(self._on_change)
+
+    ###########################################################################
+    # QUERIES
+
+    def nearest_vertex(self, p, radius) -> Optional[Vertex]:
+        """Return the vertex nearest to `p` that is at most `radius` away, or
+        `None` if there is no such vertex.
+        """
+        p = np.asarray(p, dtype=float)
+        best, best_dist = None, radius
+        for vertices in _cells_in_box(self._vertex_cells,
+                                      self.vertex_cell_size,
+                                      p - radius, p + radius):
+            for v in vertices:
+                d = dist(p, v.loc)
+                if d <= best_dist:
+                    best, best_dist = v, d
+        return best
+
+    def nearest_edge(self, p, radius) -> Optional[Tuple[Vertex, Vertex]]:
+        """Return the edge nearest to `p` that is less than `radius` away, or
+        `None` if there is no such edge. Only edges that `p` projects onto are
+        considered; see `point.dist_point_to_line_segment()`.
+        """
+        p = np.asarray(p, dtype=float)
+        best, best_dist = None, radius
+        seen = set()
+        for keys in _cells_in_box(self._edge_cells, self.edge_cell_size,
+                                  p - radius, p + radius):
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                v1, v2 = e = self._edges[key]
+                d = dist_point_to_line_segment(
+                    v1.loc.astype(float), v2.loc.astype(float), p)
+                if d is not None and d < best_dist:
+                    best, best_dist = e, d
+        return best
+
+    def query_box(self, lo, hi):
+        """Return the vertices and edges in the grid cells overlapping the
+        axis-aligned box from `lo` to `hi`.
+
+        The result may include elements slightly outside the box, but never
+        misses one inside it. This takes time proportional to the number of
+        cells overlapping the box or the number of occupied cells, whichever
+        is smaller, plus the size of the result.
+
+        Returns:
+            ``(vertices, edges)``: a set of vertices and a list of edges
+        """
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        vertices = set()
+        keys = set()
+        for cell in _cells_in_box(self._vertex_cells, self.vertex_cell_size,
+                                  lo, hi):
+            vertices.update(cell)
+        for cell in _cells_in_box(self._edge_cells, self.edge_cell_size,
+                                  lo, hi):
+            keys.update(cell)
+        return vertices, [self._edges[key] for key in keys]
+
+    ###########################################################################
+    # UPDATES
+
+    def _cell(self, loc) -> Cell:
+        return (math.floor(loc[0] / self.vertex_cell_size),
+                math.floor(loc[1] / self.vertex_cell_size))
+
+    def _add_vertex(self, v: Vertex):
+        self._vertex_cells.setdefault(self._cell(v.loc), set()).add(v)
+        self._incident.setdefault(v, set())
+
+    def _remove_vertex(self, v: Vertex):
+        cell = self._cell(v.loc)
+        vertices = self._vertex_cells.get(cell)
+        if vertices is not None:
+            vertices.discard(v)
+            if not vertices:
+                del self._vertex_cells[cell]
+        for key in list(self._incident.pop(v, ())):
+            self._remove_edge(self._edges[key])
+
+    def _add_edge(self, e, limit=True) -> bool:
+        """Add an edge, unless `limit` is set, the cell size is not fixed and
+        the edge would be in more cells than all the other edges together
+        should be. Returns whether it was added.
+        """
+        key = frozenset(e)
+        v1, v2 = e
+        a = v1.loc / self.edge_cell_size
+        b = v2.loc / self.edge_cell_size
+        if limit and not self.fixed:
+            count = (abs(math.floor(a[0]) - math.floor(b[0]))
+                     + abs(math.floor(a[1]) - math.floor(b[1])) + 1)
+            budget = MAX_CELLS_PER_EDGE * max(len(self._edges), MIN_FIT_SIZE)
+            if count > budget:
+                return False
+        cells = segment_cells(a, b)
+        for cell in cells:
+            self._edge_cells.setdefault(cell, set()).add(key)
+        self._edge_entries += len(cells)
+        self._edges[key] = e
+        self._cells_of_edge[key] = cells
+        for v in e:
+            self._incident.setdefault(v, set()).add(key)
+        return True
+
+    def _remove_edge(self, e):
+        key = frozenset(e)
+        cells = self._cells_of_edge.pop(key, ())
+        for cell in cells:
+            keys = self._edge_cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._edge_cells[cell]
+        self._edge_entries -= len(cells)
+        self._edges.pop(key, None)
+        for v in e:
+            self._incident.get(v, set()).discard(key)
+
+    def _on_change(self, events):
+        for kind, payload in events:
+            if kind == 'flip_edge':
+                self._remove_edge(payload[0])
+                kind, payload = 'add_edge', payload[1]
+            if kind == 'add_vertex':
+                self._add_vertex(payload)
+            elif kind == 'remove_vertex':
+                self._remove_vertex(payload)
+            elif kind == 'add_edge':
+                if not self._add_edge(payload):
+                    # The graph is already in its final state, so the rest
+                    # of the events need not be applied.
+                    self._rebuild()
+                    return
+            elif kind == 'remove_edge':
+                self._remove_edge(payload)
+        self._changes += len(events)
+        if (not self.fixed and self._changes
+                >= max(MIN_FIT_SIZE, (len(self._incident) + len(self._edges))
+                       // 4) and not self._fits()):
+            self._rebuild()
+
+    def _fits(self) -> bool:
+        """Return whether both grids are within the bounds on how full they
+        are.
+        """
+        # Fitted grids have a few vertices per cell and a few cells per edge;
+        # a grid is too fine or too coarse once it is far from that.
+        vertices = len(self._incident)
+        if vertices >= MIN_FIT_SIZE:
+            occupancy = vertices / len(self._vertex_cells)
+            if not 1.5 <= occupancy <= MAX_VERTICES_PER_CELL:
+                return False
+        edges = len(self._edges)
+        if edges >= MIN_FIT_SIZE:
+            cells_per_edge = self._edge_entries / edges
+            if cells_per_edge > MAX_CELLS_PER_EDGE:
+                return False
+            if (cells_per_edge < 2 and self._edge_entries
+                    > MAX_EDGES_PER_CELL * len(self._edge_cells)):
+                return False
+        return True
+
+    def _rebuild(self):
+        """Index the whole graph again, first fitting the cell sizes to it if
+        they are not fixed.
+        """
+        vertices = self.graph.vertices
+        edges = list(self.graph.edges())
+        if not self.fixed:
+            self._fit_cell_sizes(vertices, edges)
+        self._vertex_cells = {}
+        self._edge_cells = {}
+        self._edges = {}
+        self._cells_of_edge = {}
+        self._incident = {}
+        self._edge_entries = 0
+        self._changes = 0
+        for v in vertices:
+            self._add_vertex(v)
+        for e in edges:
+            self._add_edge(e, limit=False)
+
+    def _fit_cell_sizes(self, vertices, edges):
+        if len(vertices) < 2:
+            return
+        coords = np.array([v.loc for v in vertices], dtype=float)
+        spacing = np.hypot(*(np.roll(coords, -1, axis=0) - coords).T)
+        size = float(np.median(spacing))
+        if size > 0:
+            self.vertex_cell_size = 4 * size
+        ends = np.array([(v1.loc, v2.loc) for v1, v2 in edges], dtype=float)
+        lengths = np.hypot(*(ends[:, 1] - ends[:, 0]).T)
+        size = float(np.mean(lengths))
+        if size > 0:
+            self.edge_cell_size = size / 2
+
+
+def _cells_in_box(cells: Dict[Cell, Set], cell_size, lo, hi) -> Iterator[Set]:
+    """Yield the contents of the occupied cells of a grid that overlap the
+    box from `lo` to `hi`, visiting whichever is fewer: the cells in the box,
+    or the occupied cells.
+    """
+    # Pad slightly so that points exactly on a cell boundary also find the
+    # elements in the cell on the other side.
+    eps = 1e-9
+    x1 = math.floor(lo[0] / cell_size - eps)
+    y1 = math.floor(lo[1] / cell_size - eps)
+    x2 = math.floor(hi[0] / cell_size + eps)
+    y2 = math.floor(hi[1] / cell_size + eps)
+    if (x2 - x1 + 1) * (y2 - y1 + 1) > len(cells):
+        for (cx, cy), contents in cells.items():
+            if x1 <= cx <= x2 and y1 <= cy <= y2:
+                yield contents
+        return
+    for cx in range(x1, x2 + 1):
+        for cy in range(y1, y2 + 1):
+            contents = cells.get((cx, cy))
+            if contents is not None:
+                yield contents
+
+
+def segment_cells(a, b) -> List[Cell]:
+    """Return the unit grid cells that the segment from `a` to `b` passes
+    through, in order.
+
+    Implementation based on Amanatides & Woo, "A Fast Voxel Traversal
+    Algorithm for Ray Tracing" (1987).
+    """
+    x0, y0 = float(a[0]), float(a[1])
+    x1, y1 = float(b[0]), float(b[1])
+    cx, cy = math.floor(x0), math.floor(y0)
+    ex, ey = math.floor(x1), math.floor(y1)
+    dx, dy = x1 - x0, y1 - y0
+
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    # Parameter along the segment (0 to 1) at which it next crosses a
+    # vertical or horizontal grid line, and the distance between crossings.
+    if dx:
+        t_max_x = ((cx + 1 - x0) if dx > 0 else (x0 - cx)) / abs(dx)
+        t_delta_x = 1 / abs(dx)
+    else:
+        t_max_x = t_delta_x = math.inf
+    if dy:
+        t_max_y = ((cy + 1 - y0) if dy > 0 else (y0 - cy)) / abs(dy)
+        t_delta_y = 1 / abs(dy)
+    else:
+        t_max_y = t_delta_y = math.inf
+
+    cells = [(cx, cy)]
+    for _ in range(abs(ex - cx) + abs(ey - cy)):
+        if t_max_x < t_max_y:
+            cx += step_x
+            t_max_x += t_delta_x
+        else:
+            cy += step_y
+            t_max_y += t_delta_y
+        cells.append((cx, cy))
+    return cells
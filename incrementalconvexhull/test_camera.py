@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from . import camera
+
+
+class CameraTest(unittest.TestCase):
+    def test_round_trip(self):
+        c = camera.Camera(800, 600)
+        # Initially pixels are world coordinates.
+        np.testing.assert_allclose([10, 20], c.to_world(10, 20))
+
+        c.pan(30, -40)
+        c.zoom(2.5, 100, 100)
+        for x, y in [(0, 0), (800, 600), (123, 456)]:
+            np.testing.assert_allclose([x, y], c.to_screen(c.to_world(x, y)))
+        tx, ty, s = c.transform()
+        p = np.array([7.0, -3.0])
+        np.testing.assert_allclose(p * s + (tx, ty), c.to_screen(p))
+
+    def test_zoom_keeps_anchor(self):
+        c = camera.Camera(800, 600)
+        before = c.to_world(200, 500)
+        c.zoom(4.0, 200, 500)
+        np.testing.assert_allclose(before, c.to_world(200, 500))
+        self.assertEqual(4.0, c.scale)
+        lo, hi = c.bounds()
+        np.testing.assert_allclose([200, 150], hi - lo)
+
+        # Zooming is clamped rather than collapsing to zero.
+        c.zoom(0.0, 0, 0)
+        self.assertEqual(camera.MIN_SCALE, c.scale)
+
+    def test_fit(self):
+        c = camera.Camera(800, 600)
+        c.fit((1e6, 1e6), (1e6 + 10, 1e6 + 40), margin=50)
+        lo, hi = c.bounds()
+        self.assertTrue(np.all(lo <= (1e6, 1e6)))
+        self.assertTrue(np.all(hi >= (1e6 + 10, 1e6 + 40)))
+        # The tall side fills the window minus the margins.
+        self.assertAlmostEqual(500 / 40, c.scale)
+
+        # A single point only recenters the view.
+        c.fit((5, 5), (5, 5))
+        np.testing.assert_allclose([5, 5], c.center)
+        self.assertAlmostEqual(500 / 40, c.scale)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from . import distance, graph, grouped
+
+
+def brute_force(coords, points):
+    """Return the distances and nearest points by checking every edge."""
+    n = len(coords)
+    best = np.full(len(points), np.inf)
+    closest = np.zeros_like(points)
+    for i in range(n):
+        a = coords[i]
+        e = coords[(i + 1) % n] - a
+        t = np.zeros(len(points)) if not e.any() else \
+            np.clip((points - a) @ e / (e @ e), 0, 1)
+        q = a + t[:, None] * e
+        d = np.hypot(*(points - q).T)
+        nearer = d < best
+        best[nearer] = d[nearer]
+        closest[nearer] = q[nearer]
+    if n >= 3:
+        edges = np.roll(coords, -1, axis=0) - coords
+        rel = points[:, None, :] - coords[None, :, :]
+        inside = np.all(edges[None, :, 0] * rel[:, :, 1]
+                        - edges[None, :, 1] * rel[:, :, 0] >= 0, axis=1)
+        best[inside] *= -1
+    return best, closest
+
+
+class HullDistancesTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(44)
+        for trial in range(100):
+            size = rng.integers(1, 40)
+            points = rng.normal(size=(size, 2)) * rng.uniform(0.1, 10, 2)
+            coords = grouped.grouped_hulls(points, np.zeros(size)).coords(0)
+            queries = np.vstack([
+                rng.normal(size=(100, 2)) * 5,
+                coords,                                     # vertices
+                (coords + np.roll(coords, -1, axis=0)) / 2,  # edge midpoints
+            ])
+            with self.subTest(trial=trial, vertices=len(coords)):
+                dists, closest = distance.hull_distances(coords, queries)
+                expected_dists, expected_closest = \
+                    brute_force(coords, queries)
+                np.testing.assert_allclose(expected_dists, dists, atol=1e-9)
+                np.testing.assert_allclose(expected_closest, closest,
+                                           atol=1e-9)
+
+    def test_graph(self):
+        g = graph.Graph()
+        self.assertRaises(ValueError, g.distance, 0, 0)
+        g.add_vertex(0, 0)
+        self.assertEqual(5, g.distance(3, 4))
+        for x, y in [(4, 0), (4, 4), (0, 4)]:
+            g.add_vertex(x, y)
+
+        self.assertEqual(-1, g.distance(1, 2))
+        self.assertEqual([0, 2], g.closest_point(1, 2).tolist())
+        self.assertEqual(0, g.distance(4, 2))
+        self.assertEqual(5, g.distance(7, 8))
+        self.assertEqual([4, 4], g.closest_point(7, 8).tolist())
+        self.assertEqual([1, 3], g.distances([[5, 2], [2, -3]]).tolist())
+        self.assertEqual([[4, 2], [2, 0]],
+                         g.closest_points([[5, 2], [2, -3]]).tolist())
+
+        # The cached locations follow changes to the graph.
+        g.add_vertex(8, 8)
+        self.assertAlmostEqual(0, g.distance(6, 4))
+        self.assertEqual([8, 8], g.closest_point(9, 9).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,9 @@
+import os
+import tempfile
 import unittest
+
+import numpy as np
+
 from . import graph
 
 
@@ -129,3 +134,159 @@ class PolygonTest(unittest.TestCase):
                                  len(should_return), this_index)
             last_index = this_index
         self.assertEqual(count, len(should_return))
+
+    def test_save_load(self):
+        g = graph.Graph()
+        for x, y in [(0, 0), (4, 0), (5, 3), (2, 6), (-1, 3), (6, -2)]:
+            g.add_vertex(x, y)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'snapshot')
+            g.save(path)
+            for mmap in (True, False):
+                h = graph.Graph.load(path, mmap=mmap)
+                self.assertEqual(len(g), len(h))
+                for v, w in zip(g.vertices, h.vertices):
+                    self.assertIs(np.ndarray, type(w.loc))
+                    self.assertEqual(v.loc.tolist(), w.loc.tolist())
+                    self.assertEqual(
+                        [g.index(n) for n in v.nbrs],
+                        [h.index(n) for n in w.nbrs],
+                    )
+                # Loaded graphs are still usable.
+                h.add_vertex(10, 10)
+                del h
+
+            # Saving over a directory does not change graphs mapped from it.
+            h = graph.Graph.load(path)
+            other = graph.Graph()
+            for x, y in [(1, 1), (2, 1), (1, 2)]:
+                other.add_vertex(x, y)
+            other.save(path)
+            self.assertEqual([v.loc.tolist() for v in g.vertices],
+                             [w.loc.tolist() for w in h.vertices[:len(g)]])
+            self.assertEqual(3, len(graph.Graph.load(path)))
+            self.assertEqual(['coords.npy', 'nbr_indices.npy',
+                              'nbr_offsets.npy', 'quantize.npy'],
+                             sorted(os.listdir(path)))
+            del h
+
+    def test_subscribe(self):
+        g = graph.Graph()
+        deliveries = []
+        g.subscribe(deliveries.append)
+
+        a = g.add_vertex(0, 0)
+        b = g.add_vertex(4, 0)
+        self.assertEqual([[('add_vertex', a)],
+                          [('add_vertex', b), ('add_edge', (a, b))]],
+                         deliveries)
+
+        c = g.add_vertex(6, 2)
+        g.add_vertex(4, 4)
+        g.add_vertex(0, 4)
+        self.assertEqual(5, len(deliveries))
+        version = g.version
+
+        # Adding a vertex that needs flips is still delivered all at once.
+        deliveries.clear()
+        f = g.add_vertex(-10, -10)
+        self.assertEqual(1, len(deliveries))
+        kinds = [kind for kind, _ in deliveries[0]]
+        self.assertIn('flip_edge', kinds)
+        self.assertIn(('remove_vertex', a), deliveries[0])
+        self.assertEqual(['add_vertex', 'add_edge', 'add_edge'], kinds[-3:])
+        self.assertEqual(version + len(kinds), g.version)
+        for kind, payload in deliveries[0]:
+            if kind == 'flip_edge':
+                (v1, v2), (n1, n2) = payload
+                self.assertNotIn(v2, v1.nbrs)
+                self.assertIn(n2, n1.nbrs)
+
+        deliveries.clear()
+        with g.batch():
+            g.remove_edge(f, b)
+            g.add_edge(f, b)
+        self.assertEqual([[('remove_edge', (f, b)), ('add_edge', (f, b))]],
+                         deliveries)
+
+        g.unsubscribe(deliveries.append)
+        g.remove_vertex(c)
+        self.assertEqual(1, len(deliveries))
+
+    def test_validate(self):
+        g = graph.Graph()
+        g.validate()
+        for x, y in [(0, 0), (4, 0), (5, 3), (2, 6), (-1, 3), (6, -2),
+                     (-3, -1), (1, -4)]:
+            g.add_vertex(x, y)
+            g.validate()
+
+        hub = max(g.vertices, key=lambda v: len(v.nbrs))
+        self.assertGreaterEqual(len(hub.nbrs), 3)
+
+        # Neighbors out of angular order
+        hub.nbrs.reverse()
+        self.assertRaises(ValueError, g.validate)
+        hub.nbrs.reverse()
+        g.validate()
+
+        # Hull out of ccw order
+        g.vertices[0], g.vertices[1] = g.vertices[1], g.vertices[0]
+        self.assertRaises(ValueError, g.validate)
+        g.vertices[0], g.vertices[1] = g.vertices[1], g.vertices[0]
+
+        # Missing edge, on one side and then on both
+        v = hub.nbrs[1]
+        hub.nbrs.remove(v)
+        self.assertRaises(ValueError, g.validate)
+        v.nbrs.remove(hub)
+        self.assertRaises(ValueError, g.validate)
+
+    def test_integer_coordinates(self):
+        self.assertRaises(ValueError, graph.Graph, dtype=float)
+
+        g = graph.Graph(dtype=np.int32)
+        for x, y in [(0, 0), (4, 0), (5, 3), (2, 6), (-1, 3)]:
+            g.add_vertex(x, y)
+        self.assertEqual(5, len(g))
+        self.assertTrue(all(v.loc.dtype == np.int32 for v in g.vertices))
+        self.assertIsNone(g.add_vertex(2.0, 2.0))
+        self.assertRaises(ValueError, g.add_vertex, 2.5, 2)
+        self.assertRaises(ValueError, g.add_vertex, 2 ** 31, 0)
+        self.assertRaises(ValueError, g.add_vertex, float('nan'), 0)
+        g.validate()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'snapshot')
+            g.save(path)
+            h = graph.Graph.load(path)
+            self.assertEqual(np.int32, h.dtype)
+            self.assertEqual([v.loc.tolist() for v in g.vertices],
+                             [v.loc.tolist() for v in h.vertices])
+            graph.Graph(dtype=np.int64).save(path)
+            self.assertEqual(np.int64, graph.Graph.load(path).dtype)
+
+        g = graph.Graph(dtype=np.int64, quantize=True)
+        g.add_vertex(0.4, -0.4)
+        g.add_vertex(3.6, 0.2)
+        self.assertEqual([[0, 0], [4, 0]],
+                         [v.loc.tolist() for v in g.vertices])
+        with tempfile.TemporaryDirectory() as tmp:
+            g.save(tmp)
+            h = graph.Graph.load(tmp, mmap=False)
+            self.assertTrue(h.quantize)
+            h.add_vertex(1.6, 2.4)
+            self.assertIn([2, 2], [v.loc.tolist() for v in h.vertices])
+
+        # Far from the origin, floats cannot tell these points apart, but
+        # integers are exact.
+        big = 2 ** 53
+        g = graph.Graph(dtype=np.int64)
+        for x, y in [(0, 0), (2, 1), (1, 3)]:
+            g.add_vertex(big + x, big + y)
+        self.assertRaises(ValueError, g.add_vertex, big + 4, big + 2)
+        self.assertEqual(3, len(g))
+        g.add_vertex(big + 4, big + 3)
+        self.assertEqual(4, len(g))
+        g.validate()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from . import graph, grouped
+
+
+class GroupedHullsTest(unittest.TestCase):
+    def test_matches_graph(self):
+        rng = np.random.default_rng(43)
+        points = rng.normal(size=(600, 2))
+        groups = rng.integers(0, 30, size=len(points))
+        for max_rounds in (grouped.MAX_ROUNDS, 1):
+            hulls = grouped.grouped_hulls(points, groups, max_rounds)
+            self.assertEqual(30, len(hulls))
+            for key in hulls.keys:
+                with self.subTest(key=key, max_rounds=max_rounds):
+                    g = graph.Graph()
+                    for x, y in points[groups == key]:
+                        g.add_vertex(x, y)
+                    expected = {tuple(v.loc) for v in g.vertices}
+                    coords = hulls.coords(key)
+                    self.assertEqual(expected, set(map(tuple, coords)))
+                    self.assertEqual(len(expected), len(coords))
+
+                    h = hulls.graph(key)
+                    h.validate()
+                    self.assertEqual(coords.tolist(),
+                                     [v.loc.tolist() for v in h.vertices])
+
+    def test_degenerate_groups(self):
+        points = [
+            (0, 0),                                 # single point
+            (1, 1), (1, 1), (1, 1),                 # duplicates
+            (0, 0), (2, 2), (1, 1), (3, 3),         # colinear
+            (0, 0), (2, 0), (2, 2), (0, 2), (1, 0), (1, 1), (0, 0),
+        ]
+        groups = ['a', 'b', 'b', 'b', 'c', 'c', 'c', 'c',
+                  'd', 'd', 'd', 'd', 'd', 'd', 'd']
+        hulls = grouped.grouped_hulls(points, groups)
+        self.assertEqual(['a', 'b', 'c', 'd'], hulls.keys.tolist())
+        self.assertEqual([1, 1, 2, 4], hulls.sizes().tolist())
+        self.assertEqual([[0, 0]], hulls.coords('a').tolist())
+        self.assertEqual([[1, 1]], hulls.coords('b').tolist())
+        self.assertEqual([[0, 0], [3, 3]], hulls.coords('c').tolist())
+        self.assertEqual([[0, 0], [2, 0], [2, 2], [0, 2]],
+                         hulls.coords('d').tolist())
+        self.assertEqual([8, 9, 10, 11], hulls.hull('d').tolist())
+        self.assertEqual(1, len(hulls.graph('c').vertices[0].nbrs))
+
+        self.assertIn('a', hulls)
+        self.assertNotIn('e', hulls)
+        self.assertRaises(KeyError, hulls.hull, 'e')
+
+    def test_bad_shapes(self):
+        self.assertRaises(ValueError, grouped.grouped_hulls,
+                          np.zeros((4, 3)), np.zeros(4))
+        self.assertRaises(ValueError, grouped.grouped_hulls,
+                          np.zeros((4, 2)), np.zeros(3))
+        hulls = grouped.grouped_hulls(np.zeros((0, 2)), np.zeros(0))
+        self.assertEqual(0, len(hulls))
+        self.assertEqual([0], hulls.offsets.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
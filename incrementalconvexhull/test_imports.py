@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import unittest
+
+
+HEADLESS_MODULES = [
+    'incrementalconvexhull.graph',
+    'incrementalconvexhull.point',
+    'incrementalconvexhull.journal',
+    'incrementalconvexhull.snapshot',
+    'incrementalconvexhull.server',
+    'incrementalconvexhull.spatial',
+    'incrementalconvexhull.quads',
+    'incrementalconvexhull.camera',
+    'incrementalconvexhull.preview',
+]
+
+
+class ImportTest(unittest.TestCase):
+    def test_headless_modules_do_not_load_pyglet(self):
+        # Use a fresh interpreter; this one may already have imported pyglet.
+        for module in HEADLESS_MODULES:
+            with self.subTest(module=module):
+                result = subprocess.run(
+                    [sys.executable, '-c',
+                     f"import sys, {module}; print('pyglet' in sys.modules)"],
+                    capture_output=True, text=True, check=True,
+                )
+                self.assertEqual('False', result.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import random
+import sys
+import threading
+import unittest
+
+from . import graph, journal
+
+
+class InstrumentTest(unittest.TestCase):
+    def test_disabled_by_default(self):
+        g = graph.Graph()
+        g.add_vertex(0, 0)
+        self.assertEqual({}, g.stats())
+        self.assertNotIn('add_vertex', vars(g))
+        self.assertNotIn('_orient', vars(g))
+
+    def test_remove_stats_hook(self):
+        g = graph.Graph()
+        hook = g.add_stats_hook(lambda name, seconds, counters: None)
+        self.addCleanup(g.disable_stats)
+        g.remove_stats_hook(hook)
+        self.assertRaises(ValueError, g.remove_stats_hook, hook)
+
+        g.add_stats_hook(hook)
+        g.disable_stats()
+        self.assertRaises(ValueError, g.remove_stats_hook, hook)
+        self.assertRaises(ValueError, graph.Graph().remove_stats_hook, hook)
+
+    def test_counts_work_per_operation(self):
+        rng = random.Random(41)
+        g = graph.Graph()
+        flips = []
+        g.subscribe(lambda events: flips.extend(
+            e for e in events if e[0] == 'flip_edge'))
+        g.enable_stats()
+        self.addCleanup(g.disable_stats)
+        self.assertIn('_orient', vars(g))
+
+        calls = []
+        g.add_stats_hook(lambda name, seconds, counters:
+                         calls.append((name, counters)))
+        for _ in range(50):
+            g.add_vertex(rng.uniform(-100, 100), rng.uniform(-100, 100))
+
+        stats = g.stats()
+        add = stats['operations']['add_vertex']
+        self.assertEqual(50, add['calls'])
+        self.assertEqual(50, add['latency']['count'])
+        self.assertEqual(50, sum(add['latency']['buckets'].values()))
+        self.assertLessEqual(add['latency']['p50'], add['latency']['max'])
+        # Nested calls count towards the outermost operation only.
+        self.assertEqual(len(flips), add['counters'].get('flip_edge', 0))
+        self.assertEqual(len(flips), stats['counters'].get('flip_edge', 0))
+        self.assertGreater(add['counters']['orient'], 0)
+        self.assertGreater(add['counters']['hull_contains'], 0)
+        self.assertNotIn('add_vertex', add['counters'])
+        self.assertEqual({}, stats['operations']['hull_contains']['counters'])
+
+        # Hooks only see outermost calls.
+        self.assertEqual(['add_vertex'] * 50, [name for name, _ in calls])
+        self.assertEqual(add['counters'], {
+            key: sum(c.get(key, 0) for _, c in calls)
+            for key in add['counters']
+        })
+
+        g.reset_stats()
+        self.assertEqual({}, g.stats()['counters'])
+
+        # Generators are counted once and timed while iterated.
+        a, b = g[0], g[len(g) // 2]
+        expected = len(list(graph.Graph.get_cross_edges(g, a, b)))
+        self.assertEqual(expected, len(list(g.get_cross_edges(a, b))))
+        self.assertEqual('get_cross_edges', calls[-1][0])
+        self.assertEqual(1, g.stats()['counters']['get_cross_edges'])
+        self.assertEqual(
+            1, g.stats()['operations']['get_cross_edges']['latency']['count'])
+
+        g.disable_stats()
+        self.assertEqual({}, g.stats())
+        self.assertNotIn('add_vertex', vars(g))
+        self.assertNotIn('_orient', vars(g))
+
+    def test_other_graphs_not_counted(self):
+        a, b = graph.Graph(), graph.Graph()
+        for g in (a, b):
+            for x, y in [(0, 0), (10, 0), (0, 10)]:
+                g.add_vertex(x, y)
+        a.enable_stats()
+        self.addCleanup(a.disable_stats)
+
+        # Switch threads often, so that b is queried during a's calls.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        stop = threading.Event()
+
+        def query_b():
+            while not stop.is_set():
+                b.hull_contains(1, 1)
+
+        thread = threading.Thread(target=query_b)
+        thread.start()
+        try:
+            for _ in range(2000):
+                a.hull_contains(1, 1)
+                b.hull_contains(1, 1)
+        finally:
+            stop.set()
+            thread.join()
+        # Three orientation tests per call, one for each hull edge.
+        self.assertEqual(6000, a.stats()['counters']['orient'])
+        self.assertEqual({}, b.stats())
+
+    def test_journaled_graph(self):
+        g = journal.JournaledGraph()
+        g.enable_stats()
+        self.addCleanup(g.disable_stats)
+        for x, y in [(0, 0), (10, 0), (0, 10), (10, 10)]:
+            g.add_vertex(x, y)
+        g.undo()
+        g.redo()
+        ops = g.stats()['operations']
+        self.assertEqual(1, ops['undo']['calls'])
+        self.assertEqual(1, ops['redo']['calls'])
+        self.assertEqual(4, ops['add_vertex']['calls'])
+
+
+if __name__ == '__main__':
+    unittest.main()
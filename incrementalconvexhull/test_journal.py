@@ -0,0 +1,144 @@
+import math
+import random
+import unittest
+
+from . import journal
+
+
+def state(g):
+    """Return a hashable description of the graph's hull and adjacency."""
+    index = {v: i for i, v in enumerate(g.vertices)}
+    return tuple(
+        (tuple(v.loc.tolist()), tuple(index[n] for n in v.nbrs))
+        for v in g.vertices
+    )
+
+
+class JournalTest(unittest.TestCase):
+    def build(self, checkpoint_ratio):
+        rng = random.Random(591)
+        g = journal.JournaledGraph(checkpoint_ratio=checkpoint_ratio)
+        states = [state(g)]
+        for _ in range(60):
+            op = rng.random()
+            if op < 0.6 or len(g) < 4:
+                g.add_vertex(rng.uniform(-100, 100), rng.uniform(-100, 100))
+            else:
+                edges = [e for e in g.edges() if g.can_flip(*e)]
+                g.flip_edge(*rng.choice(edges))
+            if g.position == len(states):
+                states.append(state(g))
+        return g, states
+
+    def test_undo_redo(self):
+        g, states = self.build(checkpoint_ratio=0.2)
+        self.assertEqual(len(states) - 1, g.history_length)
+
+        while g.undo():
+            self.assertEqual(states[g.position], state(g))
+        self.assertEqual(0, len(g))
+        while g.redo():
+            self.assertEqual(states[g.position], state(g))
+        self.assertEqual(g.history_length, g.position)
+
+    def test_goto(self):
+        g, states = self.build(checkpoint_ratio=0.1)
+        rng = random.Random(4)
+        for _ in range(50):
+            n = rng.randrange(len(states))
+            g.goto(n)
+            self.assertEqual(n, g.position)
+            self.assertEqual(states[n], state(g))
+        self.assertRaises(IndexError, lambda: g.goto(len(states)))
+
+    def test_checkpoint_memory(self):
+        # Many cheap flips on a large graph must not copy it every few
+        # entries.
+        rng = random.Random(27)
+        g = journal.JournaledGraph()
+        for i in range(200):
+            angle = 2 * math.pi * i / 200
+            g.add_vertex(100 * math.cos(angle), 100 * math.sin(angle))
+        edges = [e for e in g.edges() if g.can_flip(*e)]
+        for _ in range(1000):
+            v1, v2 = rng.choice(edges)
+            if g.can_flip(v1, v2):
+                n1, n2 = v1.get_next_nbr(v2), v2.get_next_nbr(v1)
+                g.flip_edge(v1, v2)
+                edges.append((n1, n2))
+        states = g._checkpoint_states.values()
+        self.assertGreater(len(states), 1)
+        self.assertLessEqual(sum(cost for _, _, cost in states),
+                             g._step_counts[-1])
+
+    def test_new_operation_discards_redo(self):
+        g, states = self.build(checkpoint_ratio=0.1)
+        g.goto(10)
+        g.add_vertex(1000, 1000)
+        self.assertEqual(11, g.history_length)
+        self.assertFalse(g.can_redo())
+        g.undo()
+        self.assertEqual(states[10], state(g))
+        g.goto(0)
+        g.goto(11)
+        self.assertEqual(11, g.position)
+
+    def test_operation_groups_entries(self):
+        g = journal.JournaledGraph()
+        with g.operation():
+            g.add_vertex(0, 0)
+            g.add_vertex(1, 0)
+            g.add_vertex(0, 1)
+        self.assertEqual(1, g.history_length)
+        g.undo()
+        self.assertEqual(0, len(g))
+
+    def test_merge_entries(self):
+        g, states = self.build(checkpoint_ratio=0.1)
+        length = g.history_length
+        g.merge_entries(g.position)
+        g.merge_entries(g.position - 1)
+        self.assertEqual(length, g.history_length)
+        self.assertRaises(ValueError, g.merge_entries, length + 1)
+
+        # Merge the entries from 3 to 10, including the checkpoints among
+        # them, and discard the undone ones.
+        g.goto(10)
+        g.merge_entries(3)
+        self.assertEqual(4, g.position)
+        self.assertEqual(4, g.history_length)
+        self.assertEqual(states[10], state(g))
+        g.undo()
+        self.assertEqual(states[3], state(g))
+        g.redo()
+        self.assertEqual(states[10], state(g))
+        for n, expected in [(0, 0), (4, 10), (2, 2), (4, 10)]:
+            g.goto(n)
+            self.assertEqual(states[expected], state(g))
+
+    def test_events_track_rewinding(self):
+        # Mirror the graph's edges using only the change events.
+        edges = set()
+
+        def on_change(events):
+            for kind, payload in events:
+                if kind == 'add_edge':
+                    edges.add(frozenset(payload))
+                elif kind == 'remove_edge':
+                    edges.discard(frozenset(payload))
+                elif kind == 'flip_edge':
+                    edges.remove(frozenset(payload[0]))
+                    edges.add(frozenset(payload[1]))
+                elif kind == 'remove_vertex':
+                    edges.difference_update(
+                        [e for e in edges if payload in e])
+
+        g = journal.JournaledGraph(checkpoint_ratio=0.1)
+        g.subscribe(on_change)
+        rng = random.Random(7)
+        for _ in range(30):
+            g.add_vertex(rng.uniform(-100, 100), rng.uniform(-100, 100))
+        last = g.history_length
+        for n in [3, last - 2, 0, last, last // 2]:
+            g.goto(n)
+            self.assertEqual({frozenset(e) for e in g.edges()}, edges)
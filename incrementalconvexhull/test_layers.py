@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from . import grouped, layers
+
+
+def peel(points):
+    """Return the layer of each point, peeling one layer at a time with
+    Andrew's monotone chain, keeping points in the middle of edges.
+    """
+    points = [tuple(p) for p in np.asarray(points, dtype=float).tolist()]
+    remaining = sorted(set(points))
+    depth = {}
+    k = 0
+    while remaining:
+        on_hull = set()
+        for chain in (remaining, remaining[::-1]):
+            stack = []
+            for p in chain:
+                while len(stack) >= 2 and _cross(stack[-2], stack[-1], p) < 0:
+                    stack.pop()
+                stack.append(p)
+            on_hull.update(stack)
+        for p in on_hull:
+            depth[p] = k
+        remaining = [p for p in remaining if p not in on_hull]
+        k += 1
+    return [depth[p] for p in points]
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+class ConvexLayersTest(unittest.TestCase):
+    def test_matches_peeling(self):
+        rng = np.random.default_rng(46)
+        for trial in range(60):
+            n = int(rng.integers(1, 120))
+            if trial % 2:
+                # Small integer grid: many duplicates and colinear points
+                points = rng.integers(0, 8, size=(n, 2)).astype(float)
+            else:
+                points = rng.normal(size=(n, 2))
+            for max_rounds in (grouped.MAX_ROUNDS, 1):
+                with self.subTest(trial=trial, max_rounds=max_rounds):
+                    result = layers.convex_layers(points, max_rounds)
+                    self.assertEqual(peel(points), result.layers.tolist())
+
+    def test_large(self):
+        # Enough points that the core is set aside and split again
+        rng = np.random.default_rng(46)
+        points = rng.uniform(size=(3000, 2))
+        result = layers.convex_layers(points)
+        self.assertEqual(peel(points), result.layers.tolist())
+
+    def test_layers(self):
+        points = [
+            (0, 0), (4, 0), (4, 4), (0, 4), (2, 0),     # square, edge point
+            (1, 1), (3, 1), (3, 3), (1, 3), (1, 1),     # square, duplicate
+            (2, 2),
+        ]
+        result = layers.convex_layers(points)
+        self.assertEqual(3, len(result))
+        self.assertEqual([5, 5, 1], result.sizes().tolist())
+        self.assertEqual([0, 1, 2, 3, 4], result.layer(0).tolist())
+        self.assertEqual([5, 6, 7, 8, 9], result.layer(1).tolist())
+        self.assertEqual([10], result.layer(2).tolist())
+        self.assertRaises(IndexError, result.layer, 3)
+        self.assertRaises(IndexError, result.layer, -1)
+
+        g = result.graph(0)
+        g.validate()
+        self.assertEqual([[0, 0], [4, 0], [4, 4], [0, 4]],
+                         [v.loc.tolist() for v in g.vertices])
+        self.assertEqual(4, len(result.graph(1).vertices))
+        self.assertEqual(1, len(result.graph(2).vertices))
+
+    def test_bad_shapes(self):
+        self.assertRaises(ValueError, layers.convex_layers, np.zeros((4, 3)))
+        self.assertRaises(ValueError, layers.convex_layers, np.zeros(4))
+        result = layers.convex_layers(np.zeros((0, 2)))
+        self.assertEqual(0, len(result))
+        self.assertEqual([0], result.offsets.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
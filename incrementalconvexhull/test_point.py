@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from . import point
+
+
+class PredicateTest(unittest.TestCase):
+    def test_orient(self):
+        a, b, c = np.array([0, 0]), np.array([4, 0]), np.array([0, 4])
+        for cast in (int, float):
+            p, q, r = (v.astype(cast) for v in (a, b, c))
+            self.assertEqual(1, point.orient(p, q, r))
+            self.assertEqual(-1, point.orient(p, r, q))
+            self.assertEqual(0, point.orient(p, q, 2 * q))
+
+    def test_orient_exact(self):
+        # Colinear, but not once rounded to floats
+        big = 2 ** 53
+        p, q, r = (np.array([big + i, big + i + 1]) for i in range(3))
+        self.assertEqual(0, point.orient(p, q, r))
+        self.assertEqual(0, point.orient_exact(p, q, r))
+        # Products that overflow int64
+        huge = np.iinfo(np.int64).max
+        p, q, r = np.array([-huge, -huge]), np.array([huge, -huge]), \
+            np.array([huge, huge])
+        self.assertEqual(1, point.orient(p, q, r))
+        self.assertEqual(-1, point.orient(r, q, p))
+
+    def test_incircle(self):
+        a, b, c = np.array([0, 0]), np.array([4, 0]), np.array([0, 4])
+        for cast in (int, float):
+            p, q, r = (v.astype(cast) for v in (a, b, c))
+            self.assertEqual(1, point.incircle(p, q, r, np.array([1, 1])))
+            self.assertEqual(0, point.incircle(p, q, r, np.array([4, 4])))
+            self.assertEqual(-1, point.incircle(p, q, r, np.array([5, 5])))
+            # Clockwise order negates the result.
+            self.assertEqual(-1, point.incircle(p, r, q, np.array([1, 1])))
+
+        huge = np.iinfo(np.int64).max // 2
+        p, q, r = np.array([-huge, 0]), np.array([huge, 0]), \
+            np.array([0, huge])
+        self.assertEqual(0, point.incircle(p, q, r, np.array([0, -huge])))
+        self.assertEqual(1, point.incircle(p, q, r,
+                                           np.array([0, 1 - huge])))
+
+    def test_dist_point_to_line_segment(self):
+        a, b = np.array([0, 0]), np.array([4, 0])
+        self.assertEqual(3, point.dist_point_to_line_segment(
+            a, b, np.array([2, 3])))
+        self.assertIsNone(point.dist_point_to_line_segment(
+            a, b, np.array([5, 3])))
+
+
+if __name__ == '__main__':
+    unittest.main()
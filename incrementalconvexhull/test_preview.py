@@ -0,0 +1,61 @@
+import random
+import unittest
+
+import numpy as np
+
+from . import graph, preview
+
+
+class TangentCacheTest(unittest.TestCase):
+    def test_matches_find_convex_nbrs(self):
+        rng = random.Random(38)
+        g = graph.Graph()
+        cache = preview.TangentCache(g)
+        with self.assertRaises(ValueError):
+            cache.find_convex_nbrs((0, 0))
+
+        for step in range(60):
+            g.add_vertex(rng.uniform(-100, 100), rng.uniform(-100, 100))
+            if step % 4 == 0:
+                edges = [e for e in g.edges() if g.can_flip(*e)]
+                if edges:
+                    g.flip_edge(*rng.choice(edges))
+            if len(g) < 2:
+                continue
+
+            # Wander around like a cursor, mostly in small steps.
+            p = np.array([rng.uniform(-200, 200), rng.uniform(-200, 200)])
+            for _ in range(30):
+                if rng.random() < 0.1:
+                    p = np.array([rng.uniform(-200, 200),
+                                  rng.uniform(-200, 200)])
+                else:
+                    p = p + [rng.uniform(-5, 5), rng.uniform(-5, 5)]
+                self.assertEqual(g.find_convex_nbrs(graph.Vertex(*p)),
+                                 cache.find_convex_nbrs(p))
+        self.assertGreater(cache.hits, cache.misses)
+
+    def test_invalidated_by_changes(self):
+        g = graph.Graph()
+        for x, y in [(0, 0), (10, 0), (0, 10)]:
+            g.add_vertex(x, y)
+        cache = preview.TangentCache(g)
+        a, b = cache.find_convex_nbrs((20, 20))
+        self.assertEqual({(10, 0), (0, 10)},
+                         {tuple(a.loc.tolist()), tuple(b.loc.tolist())})
+        self.assertEqual((a, b), cache.find_convex_nbrs((21, 20)))
+        self.assertEqual(1, cache.hits)
+
+        # A new vertex changes the answer for the same point.
+        g.add_vertex(15, 5)
+        a, b = cache.find_convex_nbrs((21, 20))
+        self.assertEqual({(15, 5), (0, 10)},
+                         {tuple(a.loc.tolist()), tuple(b.loc.tolist())})
+        self.assertEqual(2, cache.misses)
+
+        # Points inside the hull have no tangents.
+        self.assertEqual((None, None), cache.find_convex_nbrs((2, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
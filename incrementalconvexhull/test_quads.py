@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from . import quads
+
+
+def reference_edge_quad(a, b, radius):
+    """Per-edge implementation the vectorized version replaced."""
+    fwd = b - a
+    fwd *= np.true_divide(radius, np.linalg.norm(fwd))
+    left = np.array([-fwd[1], fwd[0]])
+    return [a - fwd + left, a - fwd - left, b + fwd + left, b + fwd - left]
+
+
+class QuadsTest(unittest.TestCase):
+    def test_edge_quads(self):
+        rng = np.random.default_rng(32)
+        endpoints = rng.uniform(-100, 100, size=(50, 2, 2))
+        radii = rng.uniform(0.5, 3, size=50)
+        corners = quads.edge_quads(endpoints, radii)
+        self.assertEqual((50, 4, 2), corners.shape)
+        for (a, b), r, c in zip(endpoints, radii, corners):
+            np.testing.assert_allclose(reference_edge_quad(a, b, r), c)
+
+        # A single radius applies to every edge, and zero-length edges are
+        # degenerate rather than NaN.
+        corners = quads.edge_quads([[(1, 1), (1, 1)], [(0, 0), (2, 0)]], 1.0)
+        np.testing.assert_array_equal(np.ones((4, 2)), corners[0])
+        np.testing.assert_array_equal([(-1, 1), (-1, -1), (3, 1), (3, -1)],
+                                      corners[1])
+
+    def test_vertex_quads(self):
+        corners = quads.vertex_quads([(0, 0), (10, 5)], [1, 2])
+        np.testing.assert_array_equal(
+            [[(-1, -1), (1, -1), (-1, 1), (1, 1)],
+             [(8, 3), (12, 3), (8, 7), (12, 7)]],
+            corners,
+        )
+
+    def test_quad_buffers(self):
+        corners = quads.vertex_quads([(0, 0), (10, 5)], 1)
+        coords, colors, indices = quads.quad_buffers(
+            corners, [(1, 2, 3), (4, 5, 6)], base=4)
+        self.assertEqual(np.float32, coords.dtype)
+        self.assertEqual(np.uint8, colors.dtype)
+        np.testing.assert_array_equal(corners.ravel(), coords)
+        self.assertEqual([1, 2, 3] * 4 + [4, 5, 6] * 4, colors.tolist())
+        self.assertEqual([4, 5, 6, 7, 6, 5, 8, 9, 10, 11, 10, 9],
+                         indices.tolist())
+
+        _, colors, _ = quads.quad_buffers(corners, (7, 8, 9))
+        self.assertEqual([7, 8, 9] * 8, colors.tolist())
@@ -0,0 +1,231 @@
+import unittest
+
+import numpy as np
+import pyglet
+
+# Without a display, pyglet can only load its GL bindings if it does not open
+# a hidden window on import.
+pyglet.options['shadow_window'] = False
+
+from . import graph, renderer  # noqa: E402
+
+
+class RecordingList(list):
+    """List that records the indices of the slice assignments to it."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.writes = []
+
+    def __setitem__(self, index, value):
+        self.writes.append(index)
+        super().__setitem__(index, value)
+
+
+class StubVertexList:
+    def __init__(self, vertices, colors):
+        self.vertices = RecordingList(vertices)
+        self.colors = RecordingList(colors)
+        self.deleted = False
+
+    def delete(self):
+        self.deleted = True
+
+
+class StubBatch:
+    """Stands in for a `pyglet.graphics.Batch`, which needs a GL context to
+    allocate vertex lists.
+    """
+
+    def __init__(self):
+        self.vertex_lists = []
+
+    def add_indexed(self, count, mode, group, indices, *data):
+        (_, vertices), (_, colors) = data
+        vertex_list = StubVertexList(vertices, colors)
+        self.vertex_lists.append(vertex_list)
+        return vertex_list
+
+
+def quad_of(layer, key):
+    """Return the (4, 2) corners and the (3,) color of a quad."""
+    page, i = layer._locate(layer._slots[key])
+    return (np.reshape(page.vertices[i*8:i*8+8], (4, 2)),
+            page.colors[i*12:i*12+3])
+
+
+def sorted_corners(corners):
+    """Return corners in sorted order, since the corners of an edge's quad
+    depend on its direction.
+    """
+    corners = np.asarray(corners, dtype=float)
+    return corners[np.lexsort(corners.T[::-1])]
+
+
+def vertex_style(v):
+    return 2.0, (255, 0, 0)
+
+
+def edge_style(e):
+    return 1.0, (0, 0, 255)
+
+
+class QuadLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.batch = StubBatch()
+        self.layer = renderer.QuadLayer(self.batch, None)
+
+    def test_slots_are_reused(self):
+        corners = [(0, 0), (1, 0), (0, 1), (1, 1)]
+        for key in 'abc':
+            self.layer.set(key, corners, (1, 2, 3))
+        self.assertEqual({'a': 0, 'b': 1, 'c': 2}, self.layer._slots)
+        self.assertEqual(1, len(self.batch.vertex_lists))
+        np.testing.assert_array_equal(corners, quad_of(self.layer, 'b')[0])
+        self.assertEqual([1, 2, 3], quad_of(self.layer, 'b')[1])
+
+        self.layer.remove('b')
+        self.layer.remove('b')
+        self.assertNotIn('b', self.layer)
+        self.assertEqual(2, len(self.layer))
+        page = self.batch.vertex_lists[0]
+        self.assertEqual([0.0] * 8, page.vertices[8:16])
+
+        self.layer.set('d', corners, (4, 5, 6))
+        self.assertEqual(1, self.layer._slots['d'])
+        self.layer.set_color('d', (7, 8, 9))
+        self.assertEqual([7, 8, 9], quad_of(self.layer, 'd')[1])
+
+        # A full page is followed by a new one.
+        for key in range(renderer.QUADS_PER_PAGE):
+            self.layer.set(key, corners, (0, 0, 0))
+        self.assertEqual(2, len(self.batch.vertex_lists))
+        self.assertEqual(renderer.QUADS_PER_PAGE + 3, len(self.layer))
+
+        self.layer.clear()
+        self.assertEqual(0, len(self.layer))
+        self.assertTrue(all(page.deleted for page in self.batch.vertex_lists))
+
+    def test_set_many_runs(self):
+        n = renderer.QUADS_PER_PAGE + 10
+        corners = np.arange(n * 8, dtype=float).reshape(n, 4, 2)
+        colors = np.tile(np.arange(3, dtype=np.uint8), (n, 1))
+        self.layer.set_many(list(range(n)), corners, colors)
+        # One write per page, since the slots are consecutive.
+        first, second = self.batch.vertex_lists
+        self.assertEqual([slice(0, 8 * renderer.QUADS_PER_PAGE)],
+                         first.vertices.writes)
+        self.assertEqual([slice(0, 80)], second.vertices.writes)
+        for key in (0, renderer.QUADS_PER_PAGE - 1, n - 1):
+            np.testing.assert_array_equal(corners[key],
+                                          quad_of(self.layer, key)[0])
+
+        # Freed slots are not consecutive, so each is written on its own,
+        # and keys given in any order land in their own slots.
+        self.layer.remove(3)
+        self.layer.remove(7)
+        first.vertices.writes.clear()
+        self.layer.set_many(['x', 'y', 5], corners[:3], (9, 9, 9))
+        self.assertEqual({7, 3}, {self.layer._slots['x'],
+                                  self.layer._slots['y']})
+        self.assertEqual(3, len(first.vertices.writes))
+        for i, key in enumerate(['x', 'y', 5]):
+            np.testing.assert_array_equal(corners[i],
+                                          quad_of(self.layer, key)[0])
+            self.assertEqual([9, 9, 9], quad_of(self.layer, key)[1])
+        self.assertEqual(n, len(self.layer))
+
+
+class GraphRendererTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = graph.Graph()
+        for x, y in [(0, 0), (4, 0), (5, 3), (2, 6), (-1, 3)]:
+            self.graph.add_vertex(x, y)
+        self.batch = StubBatch()
+        self.renderer = renderer.GraphRenderer(
+            self.graph, vertex_style, edge_style, batch=self.batch)
+
+    def assert_matches_graph(self):
+        vertices = self.renderer.vertex_layer
+        edges = self.renderer.edge_layer
+        self.assertEqual(set(self.graph.vertices), set(vertices.keys()))
+        self.assertEqual({frozenset(e) for e in self.graph.edges()},
+                         set(edges.keys()))
+        for v in self.graph.vertices:
+            corners, color = quad_of(vertices, v)
+            np.testing.assert_allclose(renderer.vertex_quad(v.loc, 2.0),
+                                       corners)
+            self.assertEqual([255, 0, 0], color)
+        for v1, v2 in self.graph.edges():
+            corners, color = quad_of(edges, frozenset((v1, v2)))
+            np.testing.assert_allclose(
+                sorted_corners(renderer.edge_quad(v1.loc, v2.loc, 1.0)),
+                sorted_corners(corners), atol=1e-5)
+            self.assertEqual([0, 0, 255], color)
+        # Every slot that is not in use draws nothing.
+        for layer in (vertices, edges):
+            for slot in layer._free:
+                page, i = layer._locate(slot)
+                self.assertEqual([0.0] * 8, page.vertices[i*8:i*8+8])
+
+    def test_rebuild(self):
+        self.assert_matches_graph()
+        self.renderer.rebuild()
+        self.assert_matches_graph()
+
+    def test_flip(self):
+        v1, v2 = next(e for e in self.graph.edges()
+                      if self.graph.can_flip(*e))
+        slot = self.renderer.edge_layer._slots[frozenset((v1, v2))]
+        self.graph.flip_edge(v1, v2)
+        self.assertNotIn(frozenset((v1, v2)), self.renderer.edge_layer)
+        self.assert_matches_graph()
+        # The new edge took the slot of the old one.
+        self.assertIn(slot, self.renderer.edge_layer._slots.values())
+
+    def test_remove_and_add(self):
+        pages = len(self.batch.vertex_lists)
+        v = self.graph.vertices[2]
+        self.graph.remove_vertex(v)
+        self.assertNotIn(v, self.renderer.vertex_layer)
+        self.assertFalse(any(v in key
+                             for key in self.renderer.edge_layer.keys()))
+        self.assert_matches_graph()
+
+        self.graph.add_vertex(5, 3)
+        self.graph.add_vertex(8, -2)
+        self.assert_matches_graph()
+        self.assertEqual(pages, len(self.batch.vertex_lists))
+
+    def test_lod_remove_reveals_hull_edge(self):
+        # A fan from u, where the short diagonal u-w is hidden until v is
+        # removed and it becomes a hull edge.
+        u, v, w = (0, 0), (0.5, -0.5), (1, 0)
+        g = graph.Graph.from_convex_polygon(
+            np.array([u, v, w, (1, 100), (0, 100)], dtype=float))
+        r = renderer.GraphRenderer(g, vertex_style, edge_style,
+                                   batch=StubBatch())
+        r.set_view((-10, -10), (10, 110), 0.5, lod=True)
+        u, v, w = g.vertices[:3]
+        diagonal = frozenset((u, w))
+        self.assertNotIn(diagonal, r.edge_layer)
+        self.assertIn(frozenset((u, v)), r.edge_layer)
+
+        g.remove_vertex(v)
+        self.assertIn(diagonal, r.edge_layer)
+        self.assertIn(diagonal, r._incident[u])
+        r.rebuild()
+        self.assertIn(diagonal, r.edge_layer)
+
+        # Adding the vertex back puts two short edges on the hull, and the
+        # diagonal is hidden again once the quads are rebuilt.
+        v = g.add_vertex(0.5, -0.5)
+        self.assertIn(frozenset((u, v)), r.edge_layer)
+        self.assertIn(frozenset((v, w)), r.edge_layer)
+        r.rebuild()
+        self.assertNotIn(diagonal, r.edge_layer)
+        self.assertIn(frozenset((u, v)), r.edge_layer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from . import server
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = server.GraphServer(max_queue=4, max_batch=16)
+        listener = await self.server.start_tcp('127.0.0.1', 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.server.close()
+
+    async def request(self, *lines):
+        self.writer.write(''.join(line + '\n' for line in lines).encode())
+        await self.writer.drain()
+        return [(await self.reader.readline()).decode().strip()
+                for _ in lines]
+
+    async def test_commands(self):
+        replies = await self.request(
+            'add 0 0', 'add 4 0', 'add 4 4', 'add 0 4',
+            'add 1 1', 'contains 1 1', 'contains 5 5', 'nearest 5 5',
+            'flip 0 0 4 4', 'flip 4 0 0 4', 'flip 0 0 4 4',
+            'remove 0 4', 'remove 9 9', 'bogus', 'add 1',
+        )
+        self.assertEqual(['ok', 'ok', 'ok', 'ok', 'inside', 'yes', 'no',
+                          '4.0 4.0'], replies[:8])
+        # Whichever diagonal exists, flipping one and then the other works.
+        self.assertIn(replies[8], ['ok', 'error edge does not exist'])
+        self.assertEqual(['ok', 'ok', 'ok'], replies[9:12])
+        for reply in replies[12:]:
+            self.assertTrue(reply.startswith('error'), reply)
+        self.assertEqual(3, len(self.server.graph))
+
+    async def test_addmany_and_backpressure(self):
+        rng = np.random.default_rng(30)
+        lines = []
+        for _ in range(50):
+            points = rng.normal(size=(20, 2))
+            self.writer.write(b'addmany 20\n' + points.astype('<f8').tobytes())
+            lines.append(None)
+        # Interleave enough single adds to overflow the small queue.
+        for x, y in rng.normal(size=(50, 2)).tolist():
+            self.writer.write(f'add {x} {y}\n'.encode())
+            lines.append(None)
+        self.writer.write(b'stats\n')
+        await self.writer.drain()
+
+        replies = [(await self.reader.readline()).decode().strip()
+                   for _ in lines]
+        stats = json.loads(await self.reader.readline())
+        added = sum(int(r.split()[1]) for r in replies[:50])
+        added += sum(r == 'ok' for r in replies[50:])
+        self.assertEqual(added, stats['points_added'])
+        self.assertEqual(100, stats['mutations'])
+        self.assertEqual(1050, stats['points_added'] + stats['points_inside'])
+        self.assertGreater(stats['backpressure_waits'], 0)
+        self.assertLess(stats['batches'], 100)
+        self.assertEqual(len(self.server.graph), stats['vertices'])
+
+    async def test_pipelined_mutations(self):
+        # With the default queue size, these are applied in one batch or a
+        # few, so later commands must see the vertices of earlier ones
+        # before their events are delivered.
+        graph_server = server.GraphServer()
+        listener = await graph_server.start_tcp('127.0.0.1', 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            lines = [
+                'add 0 0', 'add 4 0', 'add 0 4', 'add 2 -1', 'remove 2 -1',
+                'add 3 3', 'flip 4 0 0 4', 'flip 0 0 3 3', 'remove 3 3',
+                # This removes (0, 4), so later commands cannot find it.
+                'add -1 6', 'remove 0 4', 'add 0 4', 'remove 0 4',
+            ]
+            writer.write(''.join(line + '\n' for line in lines).encode())
+            replies = [(await reader.readline()).decode().strip()
+                       for _ in lines]
+            missing = 'error no vertex at (0.0, 4.0)'
+            self.assertEqual(['ok'] * 10 + [missing, 'inside', missing],
+                             replies)
+            self.assertEqual({(0.0, 0.0), (4.0, 0.0), (-1.0, 6.0)},
+                             set(graph_server._by_loc))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            await graph_server.close()
+
+    async def test_non_finite(self):
+        replies = await self.request(
+            'add 0 0', 'add nan 3', 'add inf 0', 'contains 1 -inf',
+            'add 4 0', 'add 0 4')
+        self.assertEqual('ok', replies[0])
+        for reply in replies[1:4]:
+            self.assertEqual('error coordinates must be finite', reply)
+        self.assertEqual(['ok', 'ok'], replies[4:])
+
+        points = np.array([[1.0, 1.0], [np.nan, 2.0]])
+        self.writer.write(b'addmany 2\n' + points.astype('<f8').tobytes())
+        self.assertEqual(b'error coordinates must be finite\n',
+                         await self.reader.readline())
+        self.assertEqual(['yes'], await self.request('contains 1 1'))
+        self.assertEqual(3, len(self.server.graph))
+
+    async def test_addmany_bad_count(self):
+        for count in (-1, server.MAX_ADDMANY + 1):
+            with self.subTest(count=count):
+                reader, writer = await asyncio.open_connection(
+                    *self.writer.get_extra_info('peername')[:2])
+                writer.write(f'addmany {count}\nadd 0 0\n'.encode())
+                self.assertEqual(
+                    f'error count must be between 0 and {server.MAX_ADDMANY}'
+                    '\n'.encode(), await reader.readline())
+                # The connection is closed instead of reading the payload
+                # as commands.
+                self.assertEqual(b'', await reader.read())
+                writer.close()
+                await writer.wait_closed()
+        self.assertEqual(0, len(self.server.graph))
+
+    async def test_remove_interior_edges(self):
+        replies = await self.request(
+            'add 0 0', 'add 10 0', 'add 12 6', 'add 5 12', 'add -2 6')
+        self.assertEqual(['ok'] * 5, replies)
+        self.assertGreaterEqual(len(self.server._by_loc[0.0, 0.0].nbrs), 3)
+        self.assertEqual(['ok', 'ok'],
+                         await self.request('remove 0 0', 'remove 5 12'))
+        self.assertEqual(3, len(self.server.graph))
+        self.server.graph.validate()
+        self.assertEqual(['yes', 'no'],
+                         await self.request('contains 10 3', 'contains 1 1'))
+
+    async def test_close_with_clients(self):
+        await self.request('add 0 0')
+        connections = list(self.server._connections)
+        self.assertEqual(1, len(connections))
+        await self.server.close()
+        self.assertTrue(all(task.done() for task in connections))
+        self.assertEqual(set(), self.server._connections)
+        self.assertEqual(b'', await self.reader.read())
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'graph.sock')
+            await self.server.start_unix(path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'add 1 2\nnearest 0 0\n')
+            self.assertEqual(b'ok\n', await reader.readline())
+            self.assertEqual(b'1.0 2.0\n', await reader.readline())
+            writer.close()
+            await writer.wait_closed()
@@ -0,0 +1,129 @@
+import random
+import threading
+import unittest
+
+import numpy as np
+
+from . import graph, journal, snapshot
+
+
+def graph_state(g):
+    return (
+        [tuple(v.loc.tolist()) for v in g.vertices],
+        {frozenset((a.loc.tobytes(), b.loc.tobytes())) for a, b in g.edges()},
+    )
+
+
+def snapshot_state(s):
+    locs = {vid: s.location(vid) for vid in s.hull}
+    return (
+        [locs[vid] for vid in s.hull],
+        {frozenset((bytes_of(s, a), bytes_of(s, b))) for a, b in s.edges()},
+    )
+
+
+def bytes_of(s, vid):
+    return np.array(s.location(vid), dtype=float).tobytes()
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_snapshots_follow_graph(self):
+        g = journal.JournaledGraph(checkpoint_ratio=0.1)
+        publisher = snapshot.SnapshotPublisher(g, chunk_size=4)
+        rng = random.Random(29)
+        snapshots = []
+        states = []
+        for _ in range(40):
+            g.add_vertex(rng.uniform(-50, 50), rng.uniform(-50, 50))
+            hull = publisher.current.hull
+            edges = [e for e in g.edges() if g.can_flip(*e)]
+            if edges:
+                g.flip_edge(*rng.choice(edges))
+                # A flip does not copy the hull order.
+                self.assertIs(hull, publisher.current.hull)
+            self.assertEqual(g.version, publisher.current.version)
+            self.assertEqual(graph_state(g), snapshot_state(publisher.current))
+            snapshots.append(publisher.current)
+            states.append(graph_state(g))
+
+        # Old snapshots are unaffected by later changes.
+        for s, state in zip(snapshots, states):
+            self.assertEqual(state, snapshot_state(s))
+
+        g.goto(5)
+        self.assertEqual(graph_state(g), snapshot_state(publisher.current))
+        g.goto(g.history_length)
+        self.assertEqual(graph_state(g), snapshot_state(publisher.current))
+
+    def test_churn_reuses_ids(self):
+        g = graph.Graph()
+        publisher = snapshot.SnapshotPublisher(g, chunk_size=8)
+        rng = random.Random(29)
+        most = 0
+        for _ in range(1000):
+            g.add_vertex(rng.gauss(0, 100), rng.gauss(0, 100))
+            while len(g) > 30:
+                g.remove_vertex(rng.choice(g.vertices))
+            most = max(most, len(g) + 1)
+            s = publisher.current
+            self.assertEqual(graph_state(g), snapshot_state(s))
+        self.assertLessEqual(len(publisher._vertices), most)
+        self.assertLessEqual(len(publisher.current._chunks),
+                             -(-most // 8))
+
+        # Ids of vertices that stay are kept, and freed ids are reused.
+        before = publisher.current
+        kept = {before.location(vid): vid for vid in before.hull[1:]}
+        with g.batch():
+            g.remove_vertex(g.vertices[0])
+            g.add_vertex(1000.0, 1000.0)
+        after = publisher.current
+        self.assertEqual(graph_state(g), snapshot_state(after))
+        for vid in after.hull:
+            loc = after.location(vid)
+            if loc in kept:
+                self.assertEqual(kept[loc], vid)
+        self.assertLessEqual(max(after.hull), max(before.hull))
+
+    def test_queries(self):
+        g = graph.Graph()
+        publisher = snapshot.SnapshotPublisher(g)
+        self.assertIsNone(publisher.current.nearest_vertex(0, 0))
+        for x, y in [(0, 0), (4, 0), (4, 4), (0, 4)]:
+            g.add_vertex(x, y)
+        s = publisher.current
+        self.assertTrue(s.hull_contains(1, 1))
+        self.assertFalse(s.hull_contains(5, 1))
+        self.assertEqual((4.0, 4.0), s.location(s.nearest_vertex(3, 5)))
+
+    def test_concurrent_readers(self):
+        g = graph.Graph()
+        publisher = snapshot.SnapshotPublisher(g)
+        done = threading.Event()
+        errors = []
+
+        def read():
+            while not done.is_set():
+                s = publisher.current
+                n = len(s)
+                edges = list(s.edges())
+                try:
+                    if n >= 3:
+                        assert len(edges) == 2 * n - 3
+                    for a, b in edges:
+                        assert a in s.neighbors(b)
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for t in readers:
+            t.start()
+        rng = random.Random(3)
+        try:
+            for _ in range(300):
+                g.add_vertex(rng.gauss(0, 100), rng.gauss(0, 100))
+        finally:
+            done.set()
+            for t in readers:
+                t.join()
+        self.assertEqual([], errors)
@@ -0,0 +1,134 @@
+import random
+import unittest
+
+import numpy as np
+
+from . import journal, spatial
+from .point import dist, dist_point_to_line_segment
+
+
+def brute_nearest_vertex(g, p, radius):
+    best = min(g.vertices, key=lambda v: dist(p, v.loc), default=None)
+    if best is None or dist(p, best.loc) > radius:
+        return None
+    return best
+
+
+def brute_nearest_edge(g, p, radius):
+    best, best_dist = None, radius
+    for a, b in g.edges():
+        d = dist_point_to_line_segment(a.loc, b.loc, p)
+        if d is not None and d < best_dist:
+            best, best_dist = frozenset((a, b)), d
+    return best
+
+
+class CountingDict(dict):
+    """Dict that counts lookups of single keys."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lookups = 0
+
+    def get(self, *args):
+        self.lookups += 1
+        return super().get(*args)
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        for cell_size in (7.0, None):
+            with self.subTest(cell_size=cell_size):
+                self.check_matches_brute_force(cell_size)
+
+    def check_matches_brute_force(self, cell_size):
+        rng = random.Random(33)
+        g = journal.JournaledGraph(checkpoint_ratio=0.2)
+        index = spatial.SpatialIndex(g, cell_size=cell_size)
+        for step in range(120):
+            g.add_vertex(rng.uniform(-100, 100), rng.uniform(-100, 100))
+            if step % 3 == 0:
+                edges = [e for e in g.edges() if g.can_flip(*e)]
+                if edges:
+                    g.flip_edge(*rng.choice(edges))
+            if step % 40 == 39:
+                g.goto(g.position // 2)
+
+            for _ in range(20):
+                p = np.array([rng.uniform(-110, 110), rng.uniform(-110, 110)])
+                self.assertIs(brute_nearest_vertex(g, p, 15),
+                              index.nearest_vertex(p, 15))
+                edge = index.nearest_edge(p, 10)
+                self.assertEqual(brute_nearest_edge(g, p, 10),
+                                 edge and frozenset(edge))
+
+    def test_query_box(self):
+        g = journal.JournaledGraph()
+        index = spatial.SpatialIndex(g, cell_size=10)
+        origin = g.add_vertex(0, 0)
+        for x, y in [(100, 0), (100, 100), (0, 100)]:
+            g.add_vertex(x, y)
+        vertices, edges = index.query_box((-5, -5), (5, 5))
+        self.assertEqual({origin}, vertices)
+        self.assertEqual(3, len(edges))
+        vertices, edges = index.query_box((45, 45), (55, 55))
+        self.assertEqual(set(), vertices)
+        self.assertEqual(1, len(edges))  # the diagonal
+
+    def test_huge_query_box(self):
+        g = journal.JournaledGraph()
+        index = spatial.SpatialIndex(g, cell_size=1)
+        for x, y in [(0, 0), (100, 0), (100, 100), (0, 100)]:
+            g.add_vertex(x, y)
+        index._vertex_cells = CountingDict(index._vertex_cells)
+        index._edge_cells = CountingDict(index._edge_cells)
+        # The box covers about 4e24 cells; only the occupied ones are seen.
+        vertices, edges = index.query_box((-1e12, -1e12), (1e12, 1e12))
+        self.assertEqual(set(g.vertices), vertices)
+        self.assertEqual(5, len(edges))
+        self.assertEqual(0, index._vertex_cells.lookups)
+        self.assertEqual(0, index._edge_cells.lookups)
+        # A small box looks up its own cells.
+        vertices, _ = index.query_box((99.5, 99.5), (100.5, 100.5))
+        self.assertEqual(1, len(vertices))
+        self.assertEqual(4, index._vertex_cells.lookups)
+        self.assertIsNotNone(index.nearest_vertex((50, 50), 1e12))
+
+    def test_cell_sizes_follow_data(self):
+        for scale in (1e-3, 1e6):
+            with self.subTest(scale=scale):
+                g = journal.JournaledGraph()
+                index = spatial.SpatialIndex(g)
+                rng = np.random.default_rng(35)
+                angles = rng.uniform(0, 2 * np.pi, 300)
+                for a in angles:
+                    g.add_vertex(scale * np.cos(a), scale * np.sin(a))
+                self.assertTrue(index._fits())
+                self.assertLess(index.vertex_cell_size, scale)
+                self.assertLessEqual(
+                    len(g) / len(index._vertex_cells),
+                    spatial.MAX_VERTICES_PER_CELL)
+                self.assertLessEqual(index._edge_entries / len(index._edges),
+                                     spatial.MAX_CELLS_PER_EDGE)
+                for v in g.vertices[::10]:
+                    self.assertIs(v, index.nearest_vertex(v.loc, scale / 1e4))
+                vertices, edges = index.query_box((-scale, -scale),
+                                                  (scale, scale))
+                self.assertEqual(len(g), len(vertices))
+                self.assertEqual(2 * len(g) - 3, len(edges))
+
+        # An edge far longer than the cells makes the index fit its cells
+        # again instead of walking through all of them.
+        g = journal.JournaledGraph()
+        index = spatial.SpatialIndex(g)
+        for x, y in [(0, 0), (1e-3, 0), (0, 1e-3), (1e12, 1e12)]:
+            g.add_vertex(x, y)
+        self.assertGreater(index.edge_cell_size, 1e9)
+        self.assertEqual(5, len(index.query_box((-1, -1), (1, 1))[1]))
+
+    def test_segment_cells(self):
+        self.assertEqual([(0, 0)], spatial.segment_cells((0.5, 0.5), (0.7, 0.2)))
+        self.assertEqual([(0, 0), (1, 0), (2, 0)],
+                         spatial.segment_cells((0.5, 0.5), (2.5, 0.5)))
+        self.assertEqual([(2, 1), (1, 1), (1, 0), (0, 0)],
+                         spatial.segment_cells((2.5, 1.9), (0.1, 0.2)))
@@ -0,0 +1,139 @@
+import math
+import random
+import unittest
+
+from . import graph
+
+
+def fan_graph(h, radius=1000.0):
+    """Return a graph of `h` vertices on a circle, all connected to the
+    first one, without going through `Graph.add_vertex()`.
+    """
+    g = graph.Graph()
+    vs = [graph.Vertex(radius * math.cos(2 * math.pi * i / h),
+                       radius * math.sin(2 * math.pi * i / h))
+          for i in range(h)]
+    vs[0].nbrs = vs[1:]
+    for i in range(1, h - 1):
+        vs[i].nbrs = [vs[i + 1], vs[0], vs[i - 1]]
+    vs[1].nbrs = vs[1].nbrs[:2]
+    vs[h - 1].nbrs = [vs[0], vs[h - 2]]
+    g.vertices = vs
+    return g
+
+
+def edge_midpoint_outside(g, i, radius=1000.0):
+    """Return a point just outside the hull edge from vertex `i` to the
+    next, which sees no other edge, on a graph made by `fan_graph()`.
+    """
+    h = len(g)
+    angle = 2 * math.pi * (i + 0.5) / h
+    r = radius * (1 + math.cos(math.pi / h)) / 2
+    return r * math.cos(angle), r * math.sin(angle)
+
+
+def remove(g, v):
+    """Flip away the interior edges of `v` and remove it."""
+    while len(v.nbrs) > 2:
+        for n in list(v.nbrs):
+            if g.can_flip(v, n):
+                g.flip_edge(v, n)
+    g.remove_vertex(v)
+
+
+def per_call(g, name, key='orient'):
+    op = g.stats()['operations'][name]
+    return op['counters'].get(key, 0) / op['calls']
+
+
+class ComplexityTest(unittest.TestCase):
+    """Count orientation tests and index scans per operation as graphs grow,
+    so that an accidental quadratic algorithm fails here rather than only
+    being slow. Counts are used instead of timings to keep the tests
+    deterministic.
+    """
+
+    SIZES = [64, 256, 1024]
+
+    def test_flip_cost_independent_of_hull_size(self):
+        costs = []
+        for h in self.SIZES:
+            g = fan_graph(h)
+            g.validate()
+            rng = random.Random(h)
+            g.enable_stats()
+            self.addCleanup(g.disable_stats)
+            for _ in range(20):
+                v = g[rng.randrange(2, h - 1)]
+                n1 = g[0].get_next_nbr(v)
+                n2 = v.get_next_nbr(g[0])
+                g.flip_edge(g[0], v)
+                g.flip_edge(n1, n2)
+            costs.append((per_call(g, 'flip_edge', 'index'),
+                          per_call(g, 'flip_edge')))
+            g.disable_stats()
+            g.validate()
+        # Checking that the edge is not on the hull must not look for its
+        # ends in the vertex list, nor test orientations around the fan's
+        # hub, which has h - 1 neighbors.
+        self.assertEqual([(0, 0)] * len(self.SIZES), costs)
+
+    def test_insert_cost_linear_in_hull_size(self):
+        costs = []
+        for h in self.SIZES:
+            g = fan_graph(h)
+            g.enable_stats()
+            self.addCleanup(g.disable_stats)
+            for i in range(h // 8, h, h // 4):
+                g.add_vertex(*edge_midpoint_outside(g, i))
+            costs.append(per_call(g, 'add_vertex') / h)
+            g.disable_stats()
+            g.validate()
+        # Finding the tangents takes a scan of the hull, but nothing may
+        # scan it once per hull vertex.
+        self.assertLessEqual(costs[-1], 2 * costs[0])
+
+    def test_random_insert_cost_sublinear(self):
+        costs = []
+        for n in [200, 800, 3200]:
+            rng = random.Random(n)
+            g = graph.Graph()
+            points = [(rng.uniform(-1, 1), rng.uniform(-1, 1))
+                      for _ in range(n)]
+            for x, y in points[:n // 2]:
+                g.add_vertex(x, y)
+            g.enable_stats()
+            self.addCleanup(g.disable_stats)
+            for x, y in points[n // 2:]:
+                g.add_vertex(x, y)
+            costs.append(per_call(g, 'add_vertex'))
+            g.disable_stats()
+            g.validate()
+        # The hull of uniform points grows logarithmically, and so should
+        # the cost of inserting them; quadrupling the input must not come
+        # close to quadrupling the cost.
+        self.assertLessEqual(costs[-1], 2 * costs[0])
+
+    def test_random_mutations_stay_valid(self):
+        rng = random.Random(42)
+        g = graph.Graph()
+        for step in range(300):
+            choice = rng.random()
+            if len(g) < 3 or choice < 0.5:
+                try:
+                    g.add_vertex(rng.uniform(-100, 100),
+                                 rng.uniform(-100, 100))
+                except ValueError:
+                    continue
+            elif choice < 0.8:
+                edges = [e for e in g.edges() if g.can_flip(*e)]
+                if edges:
+                    g.flip_edge(*rng.choice(edges))
+            else:
+                remove(g, rng.choice(g.vertices))
+            with self.subTest(step=step):
+                g.validate()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,10 +23,15 @@ setup(
         "Programming Language :: Python :: 3.9",
     ],
     packages=["incrementalconvexhull"],
-    install_requires=["numpy", "pyglet"],
+    install_requires=["numpy"],
+    extras_require={
+        # The visualizer; the geometry modules only need numpy.
+        "gui": ["pyglet>=1.5,<2"],
+    },
     entry_points={
         "console_scripts": [
-            "visualhull=incrementalconvexhull.main:main",
+            "visualhull=incrementalconvexhull.main:main [gui]",
+            "hullserver=incrementalconvexhull.server:main",
         ]
     },
 )